@@ -0,0 +1,240 @@
+"""
+Columnar result artifacts for backtest runs
+
+Each run gets a directory with one file per table (equity, benchmark,
+trades) in Parquet or Feather (Arrow IPC) format. ArtifactWriter buffers rows
+while the run streams and writes them out in blocks, so nothing is kept in
+memory until the end and there is no Excel round-trip. Readers load the
+tables back into the frame layout the Excel reports used; Excel itself is an
+optional export through openpyxl's write-only workbook.
+"""
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+
+# Column types of every artifact table
+ARTIFACT_SCHEMAS = {
+    'equity': pa.schema([
+        ('date', pa.timestamp('ns')),
+        ('portfolio_value', pa.float64()),
+    ]),
+    'benchmark': pa.schema([
+        ('date', pa.timestamp('ns')),
+        ('close', pa.float64()),
+    ]),
+    'trades': pa.schema([
+        ('date', pa.timestamp('ns')),
+        ('side', pa.string()),
+        ('size', pa.float64()),
+        ('price', pa.float64()),
+        ('value', pa.float64()),
+        ('commission', pa.float64()),
+        ('pnl', pa.float64()),
+    ]),
+}
+
+FORMATS = {'parquet': '.parquet', 'feather': '.feather'}
+
+
+class ArtifactWriter:
+    """
+    Append-only writer for the tables of one run
+
+    Rows are buffered per table and written as a row group (Parquet) or
+    record batch (Feather) every block_size rows and on flush()/close().
+    """
+
+    def __init__(self, run_dir, fmt='parquet', block_size=1024):
+        """
+        Args:
+            run_dir (str): Directory for this run's files (created if missing)
+            fmt (str): 'parquet' or 'feather'
+            block_size (int): Rows buffered per table before writing a block
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown artifact format: {fmt}")
+        os.makedirs(run_dir, exist_ok=True)
+        self.run_dir = run_dir
+        self.fmt = fmt
+        self.block_size = block_size
+        self._buffers = {}
+        self._writers = {}
+
+    def path(self, table):
+        """File path of a table"""
+        return os.path.join(self.run_dir, table + FORMATS[self.fmt])
+
+    def append(self, table, **row):
+        """
+        Buffer one row
+
+        Args:
+            table (str): Table name from ARTIFACT_SCHEMAS
+            **row: Column values; missing columns are written as null
+        """
+        buffer = self._buffer(table)
+        for name in buffer:
+            buffer[name].append(row.get(name))
+        if len(buffer['date']) >= self.block_size:
+            self.flush(table)
+
+    def append_frame(self, table, df):
+        """
+        Write a whole DataFrame to a table (columns matched by name)
+
+        Args:
+            table (str): Table name from ARTIFACT_SCHEMAS
+            df (pandas.DataFrame): Rows to append
+        """
+        self.flush(table)
+        schema = ARTIFACT_SCHEMAS[table]
+        columns = {name: df[name].tolist() if name in df else [None] * len(df) for name in schema.names}
+        self._write(table, columns)
+
+    def flush(self, table=None):
+        """Write the buffered rows of one table, or of all tables"""
+        tables = [table] if table is not None else list(self._buffers)
+        for name in tables:
+            buffer = self._buffers.get(name)
+            if buffer and buffer['date']:
+                self._write(name, buffer)
+                self._buffers[name] = {column: [] for column in buffer}
+
+    def close(self):
+        """Flush all tables and close the files"""
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _buffer(self, table):
+        if table not in self._buffers:
+            self._buffers[table] = {name: [] for name in ARTIFACT_SCHEMAS[table].names}
+        return self._buffers[table]
+
+    def _write(self, table, columns):
+        schema = ARTIFACT_SCHEMAS[table]
+        arrays = [_to_arrow(columns[field.name], field.type) for field in schema]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+        writer = self._writers.get(table)
+        if writer is None:
+            if self.fmt == 'parquet':
+                writer = pq.ParquetWriter(self.path(table), schema)
+            else:
+                writer = pa.ipc.new_file(self.path(table), schema)
+            self._writers[table] = writer
+        if self.fmt == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+
+
+def _to_arrow(values, type_):
+    if pa.types.is_timestamp(type_):
+        values = [pd.Timestamp(v) if isinstance(v, (datetime.date, np.datetime64, str)) else v
+                  for v in values]
+    return pa.array(values, type=type_, from_pandas=True)
+
+
+def read_table(run_dir, table, columns=None):
+    """
+    Read one table of a run
+
+    Args:
+        run_dir (str): Run directory
+        table (str): Table name
+        columns (list): Columns to load (default: all)
+
+    Returns:
+        pandas.DataFrame: The table, or None if the run has no such table
+    """
+    for fmt, ext in FORMATS.items():
+        path = os.path.join(run_dir, table + ext)
+        if os.path.exists(path):
+            if fmt == 'parquet':
+                return pq.read_table(path, columns=columns).to_pandas()
+            return feather.read_table(path, columns=columns).to_pandas()
+    return None
+
+
+def load_strategy_frame(path):
+    """
+    Load a run in the layout of the strategy data workbooks
+
+    Columns: Date, Portfolio_Value, Daily_Return, Cumulative_Return and, with
+    a benchmark, CSI300_Close, CSI300_Daily_Return, CSI300_Cumulative_Return.
+
+    Args:
+        path (str): Run directory, or a legacy .xlsx file
+
+    Returns:
+        pandas.DataFrame: One row per recorded bar
+    """
+    if path.endswith('.xlsx'):
+        df = pd.read_excel(path)
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    equity = read_table(path, 'equity')
+    if equity is None:
+        raise FileNotFoundError(f"No equity table in {path}")
+    df = pd.DataFrame({'Date': equity['date'], 'Portfolio_Value': equity['portfolio_value']})
+    df['Daily_Return'] = df['Portfolio_Value'].pct_change()
+    df['Cumulative_Return'] = (1 + df['Daily_Return']).cumprod()
+
+    benchmark = read_table(path, 'benchmark')
+    if benchmark is not None and len(benchmark):
+        bench = benchmark.set_index('date')['close'].sort_index()
+        bench_returns = bench.pct_change()
+        bench = pd.DataFrame({
+            'CSI300_Close': bench,
+            'CSI300_Daily_Return': bench_returns,
+            'CSI300_Cumulative_Return': (1 + bench_returns).cumprod(),
+        })
+        df = df.merge(bench, left_on='Date', right_index=True, how='left')
+    return df
+
+
+def export_excel(df, path, sheet_name='Strategy Data'):
+    """
+    Write a DataFrame to .xlsx row by row with a write-only workbook
+
+    Args:
+        df (pandas.DataFrame): Data to export (the index is not written)
+        path (str): Output .xlsx file
+        sheet_name (str): Worksheet title
+
+    Returns:
+        str: The written path
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name)
+    sheet.append([str(col) for col in df.columns])
+    for row in df.itertuples(index=False, name=None):
+        sheet.append([_excel_value(value) for value in row])
+    workbook.save(path)
+    return path
+
+
+def _excel_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
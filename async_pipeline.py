@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Asyncio pipeline that overlaps data downloads with backtests
+
+For a universe of symbols, fetcher processes download bars from Baostock
+(each with its own session, since the client blocks and keeps one global
+connection) and put the saved CSV paths on a bounded asyncio.Queue. Backtest
+worker processes take symbols off the queue as soon as their bars arrive, so
+network waits and CPU work overlap and a universe job takes about
+max(fetch, compute) instead of their sum. The bounded queue keeps the
+fetchers at most queue_size symbols ahead of the backtests.
+
+Symbols whose CSV is already cached skip the download.
+
+Usage:
+    python async_pipeline.py configs/config_rsi.json --symbols sh.600600 sh.603259 sz.000538
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from resampler import base_frequency, base_path, load_bars, periods_per_year
+
+# Per-process fetcher set by _init_fetcher
+_fetcher = {}
+
+
+def symbol_config(config, stock_code):
+    """A config with its stock code replaced"""
+    return dict(config, stock_code=stock_code)
+
+
+def _init_fetcher():
+    from data_fetcher import DataFetcher
+    _fetcher['fetcher'] = DataFetcher()
+
+
+def fetch_symbol(config, data_dir="data"):
+    """
+    Download one symbol's bars in a fetcher process
+
+    Args:
+        config (dict): Backtest config with the symbol's stock_code
+        data_dir (str): Directory for the CSV file
+
+    Returns:
+        str: Saved CSV path, or None when Baostock returned nothing
+    """
+    fetcher = _fetcher.get('fetcher')
+    if fetcher is None:
+        _init_fetcher()
+        fetcher = _fetcher['fetcher']
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fetcher.fetch_and_save(config['stock_code'], config['start_date'], config['end_date'],
+                                      frequency=base_frequency(config.get('data_frequency', 'd')),
+                                      adjustflag=config.get('adjustflag', '2'), output_dir=data_dir)
+
+
+def backtest_symbol(config, path):
+    """
+    Backtest one symbol in a worker process
+
+    Args:
+        config (dict): Backtest config
+        path (str): CSV with the symbol's base series (resampled to the
+            config's data_frequency)
+
+    Returns:
+        dict: Raw metrics (see metrics.compute_metrics) and the bar count
+    """
+    from backtest import BacktestEngine
+    from strategies import STRATEGIES
+
+    df = load_bars(path, config.get('data_frequency', 'd'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = BacktestEngine(start_cash=config.get('initial_cash', 100000), use_analyzers=False,
+                                periods_per_year=periods_per_year(config.get('data_frequency', 'd')))
+        _, _, results = engine.run_backtest(STRATEGIES[config['strategy']], df,
+                                            **config.get('strategy_params', {}))
+    return {'bars': len(df), 'metrics': engine.compute_run_metrics(results[0], len(df))}
+
+
+async def run_universe_async(config, symbols, fetch_workers=2, compute_workers=None, queue_size=8,
+                             data_dir="data", fetch_fn=fetch_symbol, backtest_fn=backtest_symbol):
+    """
+    Fetch and backtest a universe with overlapping stages
+
+    Args:
+        config (dict): Backtest config; its stock_code is replaced per symbol
+        symbols (list): Stock codes
+        fetch_workers (int): Download processes (one Baostock session each)
+        compute_workers (int): Backtest processes (default: CPU count)
+        queue_size (int): Downloaded symbols waiting for a backtest at most
+        data_dir (str): Directory of the cached CSV files
+        fetch_fn (callable): fetch_fn(config, data_dir) -> CSV path or None
+        backtest_fn (callable): backtest_fn(config, path) -> dict
+
+    Returns:
+        tuple: (results in symbol order, summary dict with wall, fetch and
+        compute seconds)
+    """
+    loop = asyncio.get_running_loop()
+    compute_workers = compute_workers or os.cpu_count()
+    pending = asyncio.Queue()
+    for symbol in symbols:
+        pending.put_nowait(symbol)
+    ready = asyncio.Queue(maxsize=queue_size)
+    results = {symbol: {'stock_code': symbol} for symbol in symbols}
+    start = time.perf_counter()
+
+    async def fetcher(pool):
+        while True:
+            try:
+                symbol = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            cfg = symbol_config(config, symbol)
+            path = base_path(cfg, data_dir)
+            fetch_start = time.perf_counter()
+            if not os.path.exists(path):
+                try:
+                    path = await loop.run_in_executor(pool, fetch_fn, cfg, data_dir)
+                except Exception as e:
+                    results[symbol].update(status='error', error=f"fetch: {e}")
+                    path = None
+            results[symbol]['fetch_seconds'] = time.perf_counter() - fetch_start
+            if path:
+                await ready.put((symbol, cfg, path))
+            elif 'status' not in results[symbol]:
+                results[symbol]['status'] = 'no_data'
+
+    async def worker(pool):
+        while True:
+            item = await ready.get()
+            if item is None:
+                return
+            symbol, cfg, path = item
+            compute_start = time.perf_counter()
+            try:
+                results[symbol].update(await loop.run_in_executor(pool, backtest_fn, cfg, path), status='ok')
+            except Exception as e:
+                results[symbol].update(status='error', error=f"backtest: {e}")
+            results[symbol]['compute_seconds'] = time.perf_counter() - compute_start
+            print(f"[INFO] {symbol}: {results[symbol]['status']} "
+                  f"({time.perf_counter() - start:.2f}s since start)")
+
+    os.makedirs(data_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=fetch_workers, initializer=_init_fetcher) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=compute_workers) as compute_pool:
+        workers = [asyncio.create_task(worker(compute_pool)) for _ in range(compute_workers)]
+        await asyncio.gather(*(fetcher(fetch_pool) for _ in range(fetch_workers)))
+        for _ in workers:
+            await ready.put(None)
+        await asyncio.gather(*workers)
+
+    ordered = [results[symbol] for symbol in symbols]
+    summary = {
+        'symbols': len(symbols),
+        'ok': sum(r.get('status') == 'ok' for r in ordered),
+        'wall_seconds': time.perf_counter() - start,
+        'fetch_seconds': sum(r.get('fetch_seconds', 0.0) for r in ordered),
+        'compute_seconds': sum(r.get('compute_seconds', 0.0) for r in ordered),
+    }
+    return ordered, summary
+
+
+def run_universe(config, symbols, **kwargs):
+    """Synchronous wrapper of run_universe_async (same arguments and result)"""
+    return asyncio.run(run_universe_async(config, symbols, **kwargs))
+
+
+def print_universe(results, summary):
+    """Table of per-symbol results and the stage timings"""
+    print("\n" + "=" * 72)
+    print(f"{'Symbol':<12} {'Status':<8} {'Bars':>6} {'Total Return':>13} {'Sharpe':>8} {'Max DD':>8}")
+    for row in results:
+        metrics = row.get('metrics') or {}
+
+        def fmt(key, pct=False):
+            value = metrics.get(key)
+            if value is None:
+                return 'N/A'
+            return f"{value * 100:.2f}%" if pct else f"{value:.2f}"
+
+        print(f"{row['stock_code']:<12} {row.get('status', ''):<8} {row.get('bars', ''):>6} "
+              f"{fmt('total_return', True):>13} {fmt('sharpe_ratio'):>8} {fmt('max_drawdown', True):>8}")
+    print("=" * 72)
+    print(f"[INFO] {summary['ok']}/{summary['symbols']} symbols in {summary['wall_seconds']:.2f}s "
+          f"(fetch {summary['fetch_seconds']:.2f}s, compute {summary['compute_seconds']:.2f}s summed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and backtest a universe with overlapping stages")
+    parser.add_argument("config", help="Backtest configuration (its stock_code is replaced per symbol)")
+    parser.add_argument("--symbols", nargs="+", default=None,
+                        help="Stock codes (default: the config's stock_codes list)")
+    parser.add_argument("--fetch-workers", type=int, default=2, help="Download processes")
+    parser.add_argument("--workers", type=int, default=None, help="Backtest processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Downloaded symbols buffered at most")
+    parser.add_argument("--data-dir", default="data", help="Price data directory")
+    args = parser.parse_args()
+
+    from backtest import load_config
+    config = load_config(args.config)
+    if config is None:
+        return
+    symbols = args.symbols or config.get('stock_codes') or [config['stock_code']]
+    results, summary = run_universe(config, symbols, fetch_workers=args.fetch_workers,
+                                    compute_workers=args.workers, queue_size=args.queue_size,
+                                    data_dir=args.data_dir)
+    print_universe(results, summary)
+
+
+if __name__ == "__main__":
+    main()
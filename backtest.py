@@ -1,20 +1,57 @@
 import backtrader as bt
+import numpy as np
 import pandas as pd
 import json
+import math
 import os
 from datetime import datetime
 from data_fetcher import DataFetcher
 from strategies import STRATEGIES
-from performance_analyzer import PerformanceAnalyzer
+from metrics import compute_metrics, METRIC_KEYS
+from trade_ledger import TRADE_DTYPE
+from instrumentation import Instrumentation
+
+# Plotting (matplotlib), the benchmark download (baostock), Arrow artifacts
+# (pyarrow) and the result database are imported inside the code paths that
+# use them, so a cached headless run only loads Backtrader, NumPy and pandas.
 
 class BacktestEngine:
-    def __init__(self, start_cash=100000):
+    def __init__(self, start_cash=100000, use_analyzers=True, artifact_dir=None,
+                 artifact_format='parquet', instrumentation=None, feed_cache=None,
+                 periods_per_year=252):
+        """
+        Args:
+            start_cash (float): Starting cash for the broker
+            use_analyzers (bool): Attach Backtrader's SharpeRatio, DrawDown,
+                Returns and TradeAnalyzer. When False, all metrics are computed
+                from the strategy's recorded equity and trades after the run
+            artifact_dir (str): Stream the run's equity and fills to this
+                directory (see artifacts.py); None disables artifacts
+            artifact_format (str): 'parquet' or 'feather'
+            instrumentation (Instrumentation): Collects phase timings and
+                bar/order counts (a private one is created if omitted)
+            feed_cache (FeedCache): Reuse preloaded feeds of DataFrames seen
+                before (see feed_cache.py); None builds a new PandasData per run
+            periods_per_year (float): Bars per year for annualized metrics
+                (see resampler.periods_per_year)
+        """
         self.start_cash = start_cash
+        self.use_analyzers = use_analyzers
+        self.artifact_dir = artifact_dir
+        self.artifact_format = artifact_format
+        self.instrumentation = instrumentation or Instrumentation()
+        self.feed_cache = feed_cache
+        self.periods_per_year = periods_per_year
 
     def run_backtest(self, strategy_cls, df, **kwargs):
         """
         Run backtest with given strategy and data
         
+        Strategies with a 'timeframes' parameter (e.g. ('w',)) also get those
+        frequencies as datas[1:], resampled from df (see resampler.py).
+        ValueError is raised when a resampled feed is shorter than the
+        strategy's timeframe_warmup().
+        
         Args:
             strategy_cls: Strategy class to use
             df: DataFrame with OHLCV data
@@ -23,54 +60,190 @@ class BacktestEngine:
         Returns:
             tuple: (metrics, cerebro, results)
         """
-        cerebro = bt.Cerebro()
-        cerebro.broker.setcash(self.start_cash)
-        datafeed = bt.feeds.PandasData(dataname=df)
-        cerebro.adddata(datafeed)
-        cerebro.addstrategy(strategy_cls, **kwargs)
-        
-        # Add analyzers
-        cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe', timeframe=bt.TimeFrame.Days, riskfreerate=0.0)
-        cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
-        cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
-        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+        inst = self.instrumentation
+        with inst.phase('setup'):
+            cerebro = bt.Cerebro()
+            cerebro.broker.setcash(self.start_cash)
+            cerebro.adddata(self._feed(df))
+            timeframes = kwargs.get('timeframes', dict(strategy_cls.params._getitems()).get('timeframes'))
+            if timeframes:
+                from resampler import resample_cached
+                warmup = getattr(strategy_cls, 'timeframe_warmup', None)
+                warmup = warmup(**kwargs) if warmup else 0
+                for frequency in timeframes:
+                    # Labeled by their last base bar, so a higher-timeframe
+                    # bar only arrives once all of its base bars have
+                    bars = resample_cached(df, frequency, keep_time=True)
+                    # Backtrader's vectorized indicators fail on shorter feeds
+                    if len(bars) < warmup:
+                        raise ValueError(f"{strategy_cls.__name__} needs at least {warmup} '{frequency}' bars, "
+                                         f"the data gives {len(bars)}")
+                    cerebro.adddata(self._feed(bars))
+            cerebro.addstrategy(strategy_cls, **kwargs)
+            
+            # Add analyzers
+            if self.use_analyzers:
+                cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe', timeframe=bt.TimeFrame.Days, riskfreerate=0.0)
+                cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+                cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
+                cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+            
+            writer = None
+            if self.artifact_dir:
+                from artifacts import ArtifactWriter
+                writer = ArtifactWriter(self.artifact_dir, fmt=self.artifact_format)
+                cerebro.artifact_writer = writer
         
         print(f"[INFO] Starting Portfolio Value: {cerebro.broker.getvalue():.2f}")
-        results = cerebro.run()
+        with inst.phase('run') as run_timer:
+            results = cerebro.run()
         strat = results[0]
         print(f"[INFO] Final Portfolio Value: {cerebro.broker.getvalue():.2f}")
+        if writer is not None:
+            with inst.phase('artifacts'):
+                writer.close()
+            print(f"[INFO] Run artifacts saved to {self.artifact_dir}")
+        self.count_activity(cerebro, strat, run_timer.seconds)
         
-        # Collect metrics
-        sharpe = strat.analyzers.sharpe.get_analysis()
-        drawdown = strat.analyzers.drawdown.get_analysis()
-        returns = strat.analyzers.returns.get_analysis()
-        trades = strat.analyzers.trades.get_analysis()
+        # Collect metrics from the recorded equity and trades
+        with inst.phase('metrics'):
+            raw = self.compute_run_metrics(strat, len(df))
+            
+            if self.use_analyzers:
+                sharpe = strat.analyzers.sharpe.get_analysis()
+                drawdown = strat.analyzers.drawdown.get_analysis()
+                returns = strat.analyzers.returns.get_analysis()
+                trades = strat.analyzers.trades.get_analysis()
+                
+                # DrawDown reports percent, Returns reports log returns
+                max_dd = drawdown.get('max', {}).get('drawdown')
+                rtot = returns.get('rtot')
+                raw.update({
+                    'sharpe_ratio': sharpe.get('sharperatio'),
+                    'max_drawdown': max_dd / 100.0 if max_dd is not None else None,
+                    'total_return': math.expm1(rtot) if rtot is not None else None,
+                    'annual_return': returns.get('rnorm'),
+                    'total_trades': trades.get('total', {}).get('total'),
+                    'winning_trades': trades.get('won', {}).get('total'),
+                    'losing_trades': trades.get('lost', {}).get('total'),
+                    'longest_win_streak': trades.get('streak', {}).get('won', {}).get('longest'),
+                    'longest_lose_streak': trades.get('streak', {}).get('lost', {}).get('longest'),
+                })
         
-        def safe_percent(val):
-            try:
-                return f"{float(val) * 100:.2f}%"
-            except (TypeError, ValueError):
-                return "N/A"
+        metrics = format_metrics(raw, cerebro.broker.getvalue())
+        return metrics, cerebro, results
+
+    def _feed(self, df):
+        if self.feed_cache is not None:
+            return self.feed_cache.feed(df)
+        return bt.feeds.PandasData(dataname=df)
+
+    def count_activity(self, cerebro, strat, run_seconds):
+        """
+        Record bars processed, orders placed and fills of a finished run
         
-        def safe_float(val):
-            try:
-                return f"{float(val):.2f}"
-            except (TypeError, ValueError):
-                return "N/A"
+        Args:
+            cerebro: Backtrader cerebro object after the run
+            strat: Strategy instance after the run
+            run_seconds (float): Wall time of cerebro.run()
+        """
+        inst = self.instrumentation
+        bars = len(strat.data)
+        inst.count('bars', bars)
+        # The default broker keeps every submitted order
+        inst.count('orders', len(getattr(cerebro.broker, 'orders', [])))
+        ledger = getattr(strat, 'ledger', None)
+        if ledger is not None:
+            inst.count('fills', len(ledger.fills))
+            inst.count('trades', len(ledger.trades))
+        if run_seconds:
+            inst.gauge('bars_per_second', bars / run_seconds)
+
+    def compute_run_metrics(self, strat, n_bars):
+        """
+        Compute metrics from the values and trades recorded by the strategy
         
-        metrics = {
-            'sharpe_ratio': safe_float(sharpe.get('sharperatio')),
-            'max_drawdown': safe_percent(drawdown.get('max', {}).get('drawdown')),
-            'total_return': safe_percent(returns.get('rtot')),
-            'annual_return': safe_percent(returns.get('rannual')),
-            'total_trades': trades.get('total', {}).get('total', 'N/A'),
-            'winning_trades': trades.get('won', {}).get('total', 'N/A'),
-            'losing_trades': trades.get('lost', {}).get('total', 'N/A'),
-            'longest_win_streak': trades.get('streak', {}).get('won', {}).get('longest', 'N/A'),
-            'longest_lose_streak': trades.get('streak', {}).get('lost', {}).get('longest', 'N/A'),
-            'final_value': cerebro.broker.getvalue(),
-        }
-        return metrics, cerebro, results
+        Args:
+            strat: Strategy instance after the run
+            n_bars (int): Number of bars in the data feed
+            
+        Returns:
+            dict: Raw metric values (see metrics.compute_metrics)
+        """
+        portfolio_values = getattr(strat, 'portfolio_values', None)
+        if not portfolio_values:
+            if not self.use_analyzers:
+                print("[WARNING] Strategy does not record portfolio values; metrics unavailable.")
+            return dict.fromkeys(METRIC_KEYS)
+        
+        # Bars before the strategy's minimum period hold the starting cash
+        warmup = max(n_bars - len(portfolio_values), 0)
+        equity = np.concatenate((np.full(warmup, float(self.start_cash)),
+                                 np.asarray(portfolio_values, dtype=np.float64)))
+        
+        ledger = getattr(strat, 'ledger', None)
+        trades = ledger.trades if ledger is not None else np.empty(0, dtype=TRADE_DTYPE)
+        closed_trades = np.column_stack([trades['pnl'], trades['pnlcomm'], trades['barlen']])
+        bars_in_market = int(trades['barlen'].sum())
+        open_trade_bar = getattr(strat, 'open_trade_bar', None)
+        if open_trade_bar is not None:
+            bars_in_market += len(strat) - open_trade_bar
+        
+        return compute_metrics(
+            equity,
+            start_value=self.start_cash,
+            trades=closed_trades,
+            open_trades=1 if open_trade_bar is not None else 0,
+            traded_value=getattr(strat, 'traded_value', 0.0),
+            bars_in_market=bars_in_market,
+            periods_per_year=self.periods_per_year,
+        )
+
+
+def format_metrics(raw, final_value):
+    """
+    Format raw metric values for display, 'N/A' where undefined
+
+    Args:
+        raw (dict): Raw metric values (see metrics.compute_metrics)
+        final_value (float): Final portfolio value
+
+    Returns:
+        dict: Metric name -> formatted value
+    """
+    def safe_percent(val):
+        try:
+            return f"{float(val) * 100:.2f}%"
+        except (TypeError, ValueError):
+            return "N/A"
+    
+    def safe_float(val):
+        try:
+            return f"{float(val):.2f}"
+        except (TypeError, ValueError):
+            return "N/A"
+    
+    def safe_int(val):
+        return 'N/A' if val is None else val
+    
+    return {
+        'sharpe_ratio': safe_float(raw.get('sharpe_ratio')),
+        'sortino_ratio': safe_float(raw.get('sortino_ratio')),
+        'calmar_ratio': safe_float(raw.get('calmar_ratio')),
+        'volatility': safe_percent(raw.get('volatility')),
+        'max_drawdown': safe_percent(raw.get('max_drawdown')),
+        'total_return': safe_percent(raw.get('total_return')),
+        'annual_return': safe_percent(raw.get('annual_return')),
+        'total_trades': safe_int(raw.get('total_trades')),
+        'winning_trades': safe_int(raw.get('winning_trades')),
+        'losing_trades': safe_int(raw.get('losing_trades')),
+        'longest_win_streak': safe_int(raw.get('longest_win_streak')),
+        'longest_lose_streak': safe_int(raw.get('longest_lose_streak')),
+        'turnover': safe_float(raw.get('turnover')),
+        'exposure': safe_percent(raw.get('exposure')),
+        'final_value': final_value,
+    }
+
 
 def load_config(config_file="configs/config.json"):
     """
@@ -110,22 +283,120 @@ def get_strategy_class(strategy_name):
         print(f"[ERROR] Strategy '{strategy_name}' not found. Available strategies: {list(STRATEGIES.keys())}")
         return None
 
+def plot_results(cerebro, results, args, run_name, strategy_name, stock_code, start_date, end_date,
+                 instrumentation=None):
+    """
+    Draw the Backtrader chart and the cumulative returns comparison
+    
+    matplotlib (and baostock, for the CSI300 benchmark) are only imported
+    here, so runs with --no-plot never load them.
+    
+    Args:
+        cerebro: Backtrader cerebro object of the finished run
+        results: Backtrader results
+        args (argparse.Namespace): CLI options (headless, output_dir, no_benchmark)
+        run_name (str): Prefix of the saved chart files
+        strategy_name, stock_code, start_date, end_date (str): Run description
+        instrumentation (Instrumentation): Times the 'plot' and
+            'cumulative_returns' (including the CSI300 download) phases
+    """
+    inst = instrumentation or Instrumentation()
+    # Backtrader chart
+    try:
+        with inst.phase('plot'):
+            _plot_cerebro(cerebro, args, run_name)
+        print("[INFO] Backtest plot generated successfully.")
+    except Exception as e:
+        print(f"[WARNING] Could not generate backtest plot: {e}")
+    
+    # Cumulative returns, compared with CSI300 unless --no-benchmark
+    try:
+        print("\n[INFO] Generating cumulative returns comparison...")
+        from performance_analyzer import PerformanceAnalyzer
+        analyzer = PerformanceAnalyzer()
+        save_path = os.path.join(args.output_dir, f"cumulative_{run_name}.png") if args.headless else None
+        with inst.phase('cumulative_returns'):
+            analyzer.analyze_performance(
+                cerebro, results, strategy_name, stock_code, 
+                start_date, end_date, save_path=save_path, show=not args.headless,
+                benchmark=not args.no_benchmark
+            )
+        print("[INFO] Cumulative returns analysis completed.")
+    except Exception as e:
+        print(f"[WARNING] Could not generate cumulative returns analysis: {e}")
+
+def _plot_cerebro(cerebro, args, run_name):
+    """Show the Backtrader chart, or save its figures in headless mode"""
+    if args.headless:
+        figures = cerebro.plot(style='candlestick', volume=True, iplot=False)
+        for i, figure in enumerate(fig for strat_figs in figures for fig in strat_figs):
+            path = os.path.join(args.output_dir, f"backtest_{run_name}_{i}.png")
+            figure.savefig(path)
+            print(f"[INFO] Backtest plot saved to {path}")
+    else:
+        cerebro.plot(style='candlestick', volume=True)
+
 def main():
     """
     Main function to run backtest based on configuration
     """
-    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run a backtest from a JSON configuration")
+    parser.add_argument("config", nargs="?", default="configs/config.json",
+                        help="Configuration file (default: configs/config.json)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Save charts to files instead of opening plot windows")
+    parser.add_argument("--output-dir", default="reports",
+                        help="Directory for charts in headless mode (default: reports)")
+    parser.add_argument("--no-plot", action="store_true",
+                        help="Skip the backtest and cumulative return charts")
+    parser.add_argument("--no-benchmark", action="store_true",
+                        help="Do not download CSI300 for the cumulative return comparison")
+    parser.add_argument("--metrics-json", default=None,
+                        help="Write phase timings, counters and memory figures to this JSON file")
+    parser.add_argument("--metrics-prom", default=None,
+                        help="Write the same figures as a Prometheus textfile (.prom)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record tracemalloc peaks per phase (slower)")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "sample"],
+                        help="Profile the backtest: cProfile plus stack samples (default) or samples only")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Directory for profile output (default: profiles)")
+    args = parser.parse_args()
     
-    # Get config file from command line argument, default to configs/config.json
-    config_file = "configs/config.json"
-    if len(sys.argv) > 1:
-        config_file = sys.argv[1]
+    if args.headless and not args.no_plot:
+        from report_renderer import use_headless_backend
+        use_headless_backend()
+        os.makedirs(args.output_dir, exist_ok=True)
     
     # Load configuration
-    config = load_config(config_file)
+    config = load_config(args.config)
     if config is None:
         return
-    
+
+    # A universe of symbols downloads and backtests in overlapping stages
+    if config.get('stock_codes'):
+        from async_pipeline import run_universe, print_universe
+        if get_strategy_class(config.get('strategy')) is None:
+            return
+        # The backtests run in worker processes, out of reach of the profiler and tracemalloc
+        if args.profile or args.trace_memory:
+            print("[ERROR] --profile and --trace-memory do not apply to stock_codes configs; "
+                  "profile a single symbol instead")
+            return
+        inst = Instrumentation(labels={'strategy': config.get('strategy'), 'stock_code': 'universe'})
+        print(f"[INFO] Running {config.get('strategy')} on {len(config['stock_codes'])} symbols")
+        with inst.phase('universe'):
+            results, summary = run_universe(config, config['stock_codes'])
+        print_universe(results, summary)
+        inst.count('symbols', summary['symbols'])
+        inst.count('symbols_ok', summary['ok'])
+        inst.gauge('fetch_seconds', summary['fetch_seconds'])
+        inst.gauge('compute_seconds', summary['compute_seconds'])
+        write_run_metrics(inst, args)
+        return
+
     # Extract configuration parameters
     stock_code = config.get('stock_code')
     start_date = config.get('start_date')
@@ -135,41 +406,68 @@ def main():
     strategy_params = config.get('strategy_params', {})
     data_frequency = config.get('data_frequency', 'd')
     adjustflag = config.get('adjustflag', '2')
+    use_analyzers = config.get('use_analyzers', True)
+    artifact_dir = config.get('artifact_dir')
+    artifact_format = config.get('artifact_format', 'parquet')
+    result_db = config.get('result_db')
+    
+    inst = Instrumentation(trace_memory=args.trace_memory,
+                           labels={'strategy': strategy_name, 'stock_code': stock_code})
     
     print(f"[INFO] Running backtest for {stock_code}")
     print(f"[INFO] Period: {start_date} to {end_date}")
-    print(f"[INFO] Strategy: {strategy_name}")
+    members = config.get('ensemble')
+    if members:
+        print(f"[INFO] Ensemble: {len(members)} members")
+    else:
+        print(f"[INFO] Strategy: {strategy_name}")
     print(f"[INFO] Initial cash: {initial_cash}")
     
     # Get strategy class
-    strategy_cls = get_strategy_class(strategy_name)
-    if strategy_cls is None:
-        return
+    strategy_cls = None
+    if not members:
+        strategy_cls = get_strategy_class(strategy_name)
+        if strategy_cls is None:
+            return
     
     # Initialize data fetcher
     fetcher = DataFetcher()
     
-    # Generate expected CSV filename
+    # Weekly, monthly and N-minute bars are resampled from the stored daily
+    # or minute series (see resampler.py)
+    from resampler import base_frequency, base_path, periods_per_year, resample
+    try:
+        base = base_frequency(data_frequency)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return
     code_short = stock_code.split('.')[-1]
-    expected_csv = f"{code_short}_{start_date}_{end_date}.csv"
     
     # Check if data file exists, if not download it
-    data_file_path = os.path.join("data", expected_csv)
+    data_file_path = base_path(config)
     if os.path.exists(data_file_path):
         print(f"[INFO] Using existing data file: {data_file_path}")
-        df = fetcher.load_data_from_csv(data_file_path)
+        with inst.phase('load_data'):
+            df = fetcher.load_data_from_csv(data_file_path)
     else:
         print(f"[INFO] Data file not found. Downloading data for {stock_code}...")
-        csv_path = fetcher.fetch_and_save(
-            stock_code, start_date, end_date, 
-            frequency=data_frequency, adjustflag=adjustflag
-        )
+        with inst.phase('download'):
+            csv_path = fetcher.fetch_and_save(
+                stock_code, start_date, end_date, 
+                frequency=base, adjustflag=adjustflag
+            )
         if csv_path:
-            df = fetcher.load_data_from_csv(csv_path)
+            with inst.phase('load_data'):
+                df = fetcher.load_data_from_csv(csv_path)
         else:
             print("[ERROR] Failed to download data.")
             return
     
+    if df is not None and str(data_frequency) != base:
+        with inst.phase('resample'):
+            df = resample(df, data_frequency)
+        print(f"[INFO] Resampled {base} bars to {data_frequency}")
+    
     if df is None or df.empty:
         print("[ERROR] No data available for backtest.")
         return
@@ -177,9 +475,62 @@ def main():
     print(f"[INFO] Data loaded successfully. Shape: {df.shape}")
     print(f"[INFO] Date range: {df.index.min()} to {df.index.max()}")
     
+    # Several strategies over the same bars run in one pass (see ensemble.py)
+    if members:
+        from ensemble import EnsembleEngine, print_ensemble
+        ensemble = EnsembleEngine(start_cash=initial_cash,
+                                  periods_per_year=periods_per_year(data_frequency))
+        name = f"ensemble_{code_short}_{start_date}_{end_date}"
+        if args.profile:
+            from profiling import RunProfiler, write_profile
+            profiler = RunProfiler(args.profile)
+            with inst.phase('backtest'), profiler:
+                results = ensemble.run(df, members)
+            paths = write_profile(profiler.result(), os.path.join(args.profile_dir, name))
+            print(f"[INFO] Profile saved to {os.path.dirname(paths['top'])} ({', '.join(sorted(paths))})")
+        else:
+            with inst.phase('backtest'):
+                results = ensemble.run(df, members)
+        inst.count('members', len(members))
+        inst.count('bars', len(df))
+        print_ensemble(results, ensemble.timings)
+        fetcher.logout()
+        write_run_metrics(inst, args)
+        return
+    
     # Run backtest
-    engine = BacktestEngine(start_cash=initial_cash)
-    metrics, cerebro, results = engine.run_backtest(strategy_cls, df, **strategy_params)
+    run_name = f"{strategy_name}_{code_short}_{start_date}_{end_date}"
+    engine = BacktestEngine(
+        start_cash=initial_cash, use_analyzers=use_analyzers,
+        artifact_dir=os.path.join(artifact_dir, run_name) if artifact_dir else None,
+        artifact_format=artifact_format, instrumentation=inst,
+        periods_per_year=periods_per_year(data_frequency)
+    )
+    if args.profile:
+        from profiling import RunProfiler, write_profile
+        profiler = RunProfiler(args.profile)
+        with inst.phase('backtest'), profiler:
+            metrics, cerebro, results = engine.run_backtest(
+                profiler.wrap_strategy(strategy_cls), df, **strategy_params)
+        paths = write_profile(profiler.result(), os.path.join(args.profile_dir, run_name))
+        print(f"[INFO] Profile saved to {os.path.dirname(paths['top'])} ({', '.join(sorted(paths))})")
+    else:
+        with inst.phase('backtest'):
+            metrics, cerebro, results = engine.run_backtest(strategy_cls, df, **strategy_params)
+    
+    # Record the run in the result database
+    if result_db:
+        from result_db import ResultStore, code_version, data_hash
+        with inst.phase('result_db'), ResultStore(result_db) as store:
+            run_id = store.add_run(
+                strategy=strategy_name, stock_code=stock_code,
+                start_date=start_date, end_date=end_date,
+                params=strategy_params, config=config,
+                code_version=code_version(), data_hash=data_hash(df),
+                artifact_dir=engine.artifact_dir,
+                metrics=engine.compute_run_metrics(results[0], len(df)),
+            )
+        print(f"[INFO] Run {run_id} stored in {result_db}")
     
     # Print results
     print("\n" + "="*50)
@@ -189,27 +540,31 @@ def main():
         print(f"{key.replace('_', ' ').title()}: {value}")
     print("="*50)
     
-    # Plot results
-    try:
-        cerebro.plot(style='candlestick', volume=True)
-        print("[INFO] Backtest plot generated successfully.")
-    except Exception as e:
-        print(f"[WARNING] Could not generate backtest plot: {e}")
-    
-    # Generate cumulative returns comparison with CSI300
-    try:
-        print("\n[INFO] Generating cumulative returns comparison...")
-        analyzer = PerformanceAnalyzer()
-        analyzer.analyze_performance(
-            cerebro, results, strategy_name, stock_code, 
-            start_date, end_date
-        )
-        print("[INFO] Cumulative returns analysis completed.")
-    except Exception as e:
-        print(f"[WARNING] Could not generate cumulative returns analysis: {e}")
+    if args.no_plot:
+        print("[INFO] Plots skipped (--no-plot).")
+    else:
+        plot_results(cerebro, results, args, run_name, strategy_name, stock_code,
+                     start_date, end_date, instrumentation=inst)
     
     # Cleanup
     fetcher.logout()
+    write_run_metrics(inst, args)
+
+
+def write_run_metrics(inst, args):
+    """
+    Print the phase timings and write the --metrics-json/--metrics-prom files
+
+    Args:
+        inst (Instrumentation): Instrumentation of the run (stopped afterwards)
+        args (argparse.Namespace): Parsed backtest.py arguments
+    """
+    print(f"[INFO] Timings: {inst.summary()}")
+    if args.metrics_json:
+        print(f"[INFO] Run metrics saved to {inst.write_json(args.metrics_json)}")
+    if args.metrics_prom:
+        print(f"[INFO] Prometheus metrics saved to {inst.write_prometheus(args.metrics_prom)}")
+    inst.stop()
 
 if __name__ == "__main__":
     main()
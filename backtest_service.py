@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Long-running backtest service
+
+A local HTTP service (TCP or Unix socket) that pays interpreter start-up,
+imports, the Baostock login and CSV parsing once instead of on every
+backtest.py invocation:
+
+- worker processes import Backtrader and the strategies at start-up and keep
+  the parsed price data and its preloaded feed (see feed_cache.py) in
+  per-process LRU caches
+- the service process keeps one Baostock session for downloads of missing
+  data and caches the CSI300 benchmark series per period
+
+Requests use the configs/*.json format:
+
+    POST /backtest  {"stock_code": ..., "strategy": ..., "strategy_params": {...}}
+    POST /sweep     {... "param_grid": {"rsi_period": [10, 14], ...}}
+    GET  /health
+
+Usage:
+    python backtest_service.py --port 8765 --workers 4 --preload configs/*.json
+    curl -s -X POST localhost:8765/backtest -d @configs/config_rsi.json
+"""
+import argparse
+import collections
+import contextlib
+import io
+import json
+import math
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from resampler import base_frequency, base_path, periods_per_year
+
+
+# Per-worker state set by _init_worker
+_worker = {}
+
+
+def _init_worker(cache_size, preload):
+    # Import the engine once per worker so requests only pay for the run
+    import backtest
+    from feed_cache import FeedCache
+    _worker['cache'] = collections.OrderedDict()
+    _worker['cache_size'] = cache_size
+    _worker['feed_cache'] = FeedCache(max_entries=cache_size)
+    for path, frequency in preload:
+        _load(path, frequency)
+
+
+def _ping(_):
+    return os.getpid()
+
+
+def _load(path, frequency="d"):
+    """Parsed (and resampled) price data from the worker's LRU cache"""
+    cache = _worker['cache']
+    mtime = os.path.getmtime(path)
+    key = (path, str(frequency))
+    entry = cache.get(key)
+    if entry is None or entry[0] != mtime:
+        from resampler import load_bars
+        entry = (mtime, load_bars(path, frequency))
+        cache[key] = entry
+        while len(cache) > _worker['cache_size']:
+            cache.popitem(last=False)
+    cache.move_to_end(key)
+    return entry[1]
+
+
+def _run_config(job):
+    """Backtest one config in a worker; returns metrics and timings"""
+    from backtest import BacktestEngine
+    from strategies import STRATEGIES
+
+    config, path, include_equity = job
+    start = time.perf_counter()
+    df = _load(path, config.get('data_frequency', 'd'))
+    loaded = time.perf_counter()
+    engine = BacktestEngine(start_cash=config.get('initial_cash', 100000),
+                            use_analyzers=config.get('use_analyzers', True), feed_cache=_worker['feed_cache'],
+                            periods_per_year=periods_per_year(config.get('data_frequency', 'd')))
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics, cerebro, results = engine.run_backtest(
+            STRATEGIES[config['strategy']], df, **config.get('strategy_params', {}))
+    strat = results[0]
+    response = {
+        'strategy': config['strategy'],
+        'stock_code': config.get('stock_code'),
+        'params': config.get('strategy_params', {}),
+        'metrics': metrics,
+        'raw_metrics': engine.compute_run_metrics(strat, len(df)),
+        'final_value': cerebro.broker.getvalue(),
+        'timings': {'load_seconds': loaded - start, 'run_seconds': time.perf_counter() - loaded},
+        'worker_pid': os.getpid(),
+    }
+    if include_equity:
+        response['equity'] = {'dates': [str(d) for d in getattr(strat, 'dates', [])],
+                              'values': list(getattr(strat, 'portfolio_values', []))}
+    return _jsonable(response)
+
+
+def _jsonable(value):
+    """Plain JSON types; NaN and infinities become null"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class BacktestService:
+    """
+    Warm worker pool plus the shared data caches of the service process
+    """
+
+    def __init__(self, workers=None, data_dir="data", cache_size=32, preload=()):
+        """
+        Args:
+            workers (int): Worker processes (default: CPU count)
+            data_dir (str): Directory of the price CSV files
+            cache_size (int): Price files kept parsed per worker
+            preload (list): Configs whose data is downloaded if missing and
+                parsed in every worker at start-up
+        """
+        from data_fetcher import DataFetcher
+
+        self.data_dir = data_dir
+        self.workers = workers or os.cpu_count()
+        # Messages are dropped instead of redirecting the process-wide stdout,
+        # which would also swallow the request threads' output
+        self.fetcher = DataFetcher(verbose=False)
+        self._lock = threading.Lock()
+        self._benchmarks = {}
+        self.started_at = time.time()
+        self.requests = collections.Counter()
+        paths = [(self.ensure_data(config), config.get('data_frequency', 'd')) for config in preload]
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(cache_size, [p for p in paths if p[0]]))
+        # Start the workers now instead of on the first request
+        list(self.pool.map(_ping, range(self.workers)))
+
+    def close(self):
+        self.pool.shutdown()
+        self.fetcher.logout()
+
+    def ensure_data(self, config):
+        """
+        Path of a config's price data, downloaded through the shared Baostock
+        session when missing
+
+        Returns:
+            str: CSV path, or None if the download failed
+        """
+        path = base_path(config, self.data_dir)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(self.data_dir, exist_ok=True)
+                path = self.fetcher.fetch_and_save(
+                    config['stock_code'], config['start_date'], config['end_date'],
+                    frequency=base_frequency(config.get('data_frequency', 'd')),
+                    adjustflag=config.get('adjustflag', '2'),
+                    output_dir=self.data_dir)
+        return path
+
+    def benchmark(self, start_date, end_date):
+        """
+        CSI300 closes for a period, downloaded once
+
+        Returns:
+            pandas.DataFrame: Benchmark data, or None when unavailable
+        """
+        key = (start_date, end_date)
+        with self._lock:
+            if key not in self._benchmarks:
+                from performance_analyzer import PerformanceAnalyzer
+                self._benchmarks[key] = PerformanceAnalyzer().fetch_csi300_data(start_date, end_date,
+                                                                                verbose=False)
+                # fetch_csi300_data logs out of the shared session
+                self.fetcher.logged_in = False
+            return self._benchmarks[key]
+
+    def _validate(self, config):
+        from strategies import STRATEGIES
+
+        missing = [key for key in ('stock_code', 'start_date', 'end_date', 'strategy') if key not in config]
+        if missing:
+            raise ValueError(f"Missing config keys: {missing}")
+        if config['strategy'] not in STRATEGIES:
+            raise ValueError(f"Strategy '{config['strategy']}' not found. "
+                             f"Available strategies: {list(STRATEGIES)}")
+        path = self.ensure_data(config)
+        if not path:
+            raise LookupError(f"No data for {config['stock_code']} {config['start_date']}..{config['end_date']}")
+        return path
+
+    def backtest(self, config):
+        """
+        Run one backtest config
+
+        Args:
+            config (dict): Backtest config; 'include_equity': true adds the
+                equity curve and 'benchmark': true the CSI300 return
+
+        Returns:
+            dict: metrics, raw_metrics, final_value, timings and the request latency
+        """
+        start = time.perf_counter()
+        self.requests['backtest'] += 1
+        path = self._validate(config)
+        result = self.pool.submit(_run_config, (config, path, bool(config.get('include_equity')))).result()
+        if config.get('benchmark'):
+            csi300 = self.benchmark(config['start_date'], config['end_date'])
+            result['benchmark_return'] = (None if csi300 is None or csi300.empty else
+                                          float(csi300['close'].iloc[-1] / csi300['close'].iloc[0] - 1))
+        result['latency_seconds'] = time.perf_counter() - start
+        return result
+
+    def sweep(self, config):
+        """
+        Run every combination of a sweep config's param_grid
+
+        Args:
+            config (dict): Sweep config (see sweep.py); with 'result_db' the
+                runs are also stored in that ResultStore
+
+        Returns:
+            dict: runs (params and raw metrics, best Sharpe first), count and latency
+        """
+        from sweep import param_grid
+
+        start = time.perf_counter()
+        self.requests['sweep'] += 1
+        path = self._validate(config)
+        combos = param_grid(config.get('param_grid', {}))
+        jobs = [(dict(config, strategy_params=dict(config.get('strategy_params', {}), **params)), path, False)
+                for params in combos]
+        chunksize = max(1, len(jobs) // (self.workers * 4))
+        runs = list(self.pool.map(_run_config, jobs, chunksize=chunksize))
+
+        if config.get('result_db'):
+            from result_db import ResultStore, code_version
+            with ResultStore(config['result_db']) as store:
+                store.add_runs([{
+                    'strategy': config['strategy'], 'stock_code': config['stock_code'],
+                    'start_date': config['start_date'], 'end_date': config['end_date'],
+                    'params': run['params'], 'config': dict(config, strategy_params=run['params']),
+                    'code_version': code_version(), 'metrics': run['raw_metrics'],
+                } for run in runs])
+
+        # Runs without a Sharpe ratio go last; 0.0 is a valid value
+        runs.sort(key=lambda run: (run['raw_metrics'].get('sharpe_ratio') is None,
+                                   -(run['raw_metrics'].get('sharpe_ratio') or 0.0)))
+        return {'count': len(runs),
+                'runs': [{'params': run['params'], 'metrics': run['raw_metrics']} for run in runs],
+                'latency_seconds': time.perf_counter() - start}
+
+    def health(self):
+        return {'status': 'ok', 'workers': self.workers, 'uptime_seconds': time.time() - self.started_at,
+                'requests': dict(self.requests), 'cached_benchmarks': [list(k) for k in self._benchmarks]}
+
+
+def make_handler(service):
+    """HTTP request handler class bound to a service"""
+
+    class Handler(BaseHTTPRequestHandler):
+        routes = {'/backtest': service.backtest, '/sweep': service.sweep}
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._reply(200, service.health())
+            else:
+                self._reply(404, {'error': f"Unknown path: {self.path}"})
+
+        def do_POST(self):
+            route = self.routes.get(self.path)
+            if route is None:
+                self._reply(404, {'error': f"Unknown path: {self.path}"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                config = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(config, dict):
+                    raise ValueError("Request body must be a JSON object")
+                self._reply(200, route(config))
+            except (ValueError, TypeError) as e:
+                self._reply(400, {'error': str(e)})
+            except LookupError as e:
+                self._reply(404, {'error': str(e)})
+            except Exception as e:
+                self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+
+        def _reply(self, status, body):
+            data = json.dumps(_jsonable(body)).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def address_string(self):
+            # Unix socket clients have no host
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, format, *args):
+            print(f"[INFO] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix domain socket"""
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+def create_server(service, host="127.0.0.1", port=8765, unix_socket=None):
+    """
+    HTTP server for a service (not yet serving)
+
+    Args:
+        service (BacktestService): Service handling the requests
+        host (str): TCP host
+        port (int): TCP port (0 picks a free one)
+        unix_socket (str): Listen on this Unix socket path instead of TCP
+
+    Returns:
+        socketserver.BaseServer: Call serve_forever() to start
+    """
+    handler = make_handler(service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return UnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve backtests and sweeps over HTTP with warm workers")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--unix", default=None, help="Listen on a Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--data-dir", default="data", help="Price data directory")
+    parser.add_argument("--cache-size", type=int, default=32, help="Price files kept parsed per worker")
+    parser.add_argument("--preload", nargs="*", default=[], help="Configs whose data is loaded at start-up")
+    args = parser.parse_args()
+
+    from backtest import load_config
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload = [config for config in map(load_config, args.preload) if config]
+    service = BacktestService(workers=args.workers, data_dir=args.data_dir, cache_size=args.cache_size,
+                              preload=preload)
+    server = create_server(service, args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{server.server_address[1]}"
+    print(f"[INFO] Backtest service listening on {where} with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[INFO] Shutting down")
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == "__main__":
+    main()
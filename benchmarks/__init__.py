@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for the backtesting system (see benchmarks/suite.py)
+"""
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Performance regression tracker
+
+Compares a benchmark suite report (benchmarks/suite.py) with a stored
+baseline. Each benchmark already has N timed runs; the comparison uses the
+ratio of their medians and a seeded bootstrap confidence interval of that
+ratio, so a benchmark is only flagged when the whole interval lies beyond
+its category's threshold:
+
+- regression: slower by more than the threshold with the given confidence
+- improvement: faster by more than the threshold with the given confidence
+- unclear: the median moved past the threshold but the runs are too noisy
+- ok: within the threshold (or an absolute change below min_delta seconds)
+
+Thresholds are per category: data loading, the backtest loop (Cerebro runs
+with and without analyzers), analysis (metrics and PerformanceAnalyzer) and
+plotting.
+
+Usage:
+    # Store a baseline (runs the suite, or takes an existing report)
+    python -m benchmarks.regression record --sizes 1000 10000 --repeat 7
+    # Compare the working tree against it; exits with 1 on regressions
+    python -m benchmarks.regression compare --sizes 1000 10000 --repeat 7
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from benchmarks.suite import ROOT, BENCHMARKS, run_suite, save_results
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Allowed slowdown per category in percent
+DEFAULT_THRESHOLDS = {'loading': 15.0, 'backtest': 10.0, 'analysis': 15.0, 'plot': 25.0}
+
+CATEGORIES = {
+    'csv_read': 'loading',
+    'load_data_from_csv': 'loading',
+    'backtest': 'backtest',
+    'analyzers': 'backtest',
+    'metrics': 'analysis',
+    'performance_analyzer': 'analysis',
+    'plot': 'plot',
+}
+
+ENVIRONMENT_KEYS = ('machine', 'cpu_count', 'python', 'numpy', 'pandas', 'backtrader')
+
+
+def category(name):
+    """Category of a benchmark name ('backtest/RSIStrategy' -> 'backtest')"""
+    return CATEGORIES.get(name.split('/')[0], 'other')
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def bootstrap_ratio(base_times, new_times, confidence=0.95, n_boot=2000, seed=0):
+    """
+    Confidence interval of median(new) / median(base)
+
+    Args:
+        base_times, new_times (array-like): Timed runs of one benchmark
+        confidence (float): Interval coverage
+        n_boot (int): Bootstrap resamples
+        seed (int): Seed, so reports are reproducible
+
+    Returns:
+        tuple: (ratio of medians, interval low, interval high)
+    """
+    base = np.asarray(base_times, dtype=np.float64)
+    new = np.asarray(new_times, dtype=np.float64)
+    ratio = np.median(new) / np.median(base)
+    rng = np.random.default_rng(seed)
+    base_medians = np.median(rng.choice(base, size=(n_boot, len(base))), axis=1)
+    new_medians = np.median(rng.choice(new, size=(n_boot, len(new))), axis=1)
+    ratios = new_medians / base_medians
+    tail = (1.0 - confidence) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return float(ratio), float(low), float(high)
+
+
+def compare_reports(baseline, current, thresholds=None, confidence=0.95, min_delta=1e-3,
+                    n_boot=2000, seed=0):
+    """
+    Compare every benchmark of a report with the baseline
+
+    Args:
+        baseline, current (dict): Suite reports
+        thresholds (dict): Category -> allowed change in percent
+            (default: DEFAULT_THRESHOLDS)
+        confidence (float): Bootstrap interval coverage
+        min_delta (float): Median changes below this many seconds count as ok
+        n_boot (int): Bootstrap resamples
+        seed (int): Bootstrap seed
+
+    Returns:
+        list: One dict per benchmark with name, dataset, category,
+        base_median, new_median, change, ci_low, ci_high (relative changes)
+        and status ('regression', 'improvement', 'unclear', 'ok', 'new' or
+        'missing')
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    base_entries = {(e['name'], e['dataset']): e for e in baseline['results']}
+    new_entries = {(e['name'], e['dataset']): e for e in current['results']}
+    rows = []
+    for key in list(base_entries) + [k for k in new_entries if k not in base_entries]:
+        name, dataset = key
+        base, new = base_entries.get(key), new_entries.get(key)
+        row = {'name': name, 'dataset': dataset, 'category': category(name),
+               'base_median': base['median_seconds'] if base else None,
+               'new_median': new['median_seconds'] if new else None,
+               'change': None, 'ci_low': None, 'ci_high': None}
+        if base is None or new is None:
+            row['status'] = 'new' if base is None else 'missing'
+            rows.append(row)
+            continue
+
+        ratio, low, high = bootstrap_ratio(base['times'], new['times'], confidence, n_boot, seed)
+        limit = thresholds.get(row['category'], max(thresholds.values())) / 100.0
+        row.update(change=ratio - 1.0, ci_low=low - 1.0, ci_high=high - 1.0, threshold=limit)
+        if abs(row['new_median'] - row['base_median']) < min_delta:
+            row['status'] = 'ok'
+        elif low - 1.0 > limit:
+            row['status'] = 'regression'
+        elif 1.0 - high > limit:
+            row['status'] = 'improvement'
+        elif abs(ratio - 1.0) > limit:
+            row['status'] = 'unclear'
+        else:
+            row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def environment_warnings(baseline, current):
+    """Differences between the machines and libraries of two reports"""
+    base_env, new_env = baseline.get('environment', {}), current.get('environment', {})
+    return [f"{key} differs: baseline {base_env.get(key)}, current {new_env.get(key)}"
+            for key in ENVIRONMENT_KEYS if base_env.get(key) != new_env.get(key)]
+
+
+def format_report(rows, baseline=None, current=None, markdown=False):
+    """
+    Readable diff of a comparison
+
+    Args:
+        rows (list): Output of compare_reports
+        baseline, current (dict): Reports, for the commit and environment header
+        markdown (bool): Markdown table instead of plain text
+
+    Returns:
+        str: Summary of flagged benchmarks followed by every benchmark per category
+    """
+    lines = []
+    if baseline and current:
+        lines.append(f"Baseline: {baseline['environment'].get('code_version')} "
+                     f"({baseline['environment'].get('timestamp')})")
+        lines.append(f"Current:  {current['environment'].get('code_version')} "
+                     f"({current['environment'].get('timestamp')})")
+        lines.extend(f"[WARNING] {warning}" for warning in environment_warnings(baseline, current))
+        lines.append("")
+
+    def pct(value):
+        return "" if value is None else f"{value * 100:+.1f}%"
+
+    def seconds(value):
+        return "" if value is None else f"{value:.4f}s"
+
+    counts = {status: sum(row['status'] == status for row in rows)
+              for status in ('regression', 'unclear', 'improvement', 'ok', 'new', 'missing')}
+    lines.append(", ".join(f"{n} {status}" for status, n in counts.items() if n))
+    for row in rows:
+        if row['status'] in ('regression', 'unclear'):
+            lines.append(f"{row['status'].upper()}: {row['name']} [{row['dataset']}] {pct(row['change'])} "
+                         f"(CI {pct(row['ci_low'])} .. {pct(row['ci_high'])}, "
+                         f"threshold {row['threshold'] * 100:.0f}%)")
+    lines.append("")
+
+    header = ('benchmark', 'dataset', 'baseline', 'current', 'change', 'CI', 'status')
+    for cat in sorted({row['category'] for row in rows}):
+        table = [(row['name'], row['dataset'], seconds(row['base_median']), seconds(row['new_median']),
+                  pct(row['change']),
+                  f"{pct(row['ci_low'])} .. {pct(row['ci_high'])}" if row['ci_low'] is not None else "",
+                  row['status'])
+                 for row in sorted((r for r in rows if r['category'] == cat),
+                                   key=lambda r: -(r['change'] or 0.0))]
+        if markdown:
+            lines.append(f"### {cat}")
+            lines.append("| " + " | ".join(header) + " |")
+            lines.append("|" + "---|" * len(header))
+            lines.extend("| " + " | ".join(row) + " |" for row in table)
+        else:
+            lines.append(f"== {cat} ==")
+            widths = [max(len(str(r[i])) for r in table + [header]) for i in range(len(header))]
+            for row in [header] + table:
+                lines.append("  ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _suite_report(args):
+    if args.results:
+        return load_report(args.results)
+    report = run_suite(sizes=args.sizes, repeat=args.repeat, seed=args.seed, bundled=not args.no_bundled,
+                       benchmarks=tuple(args.benchmarks), strategies=args.strategies,
+                       max_backtest_bars=args.max_backtest_bars)
+    print(f"[INFO] Benchmark results saved to {save_results(report)}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Track benchmark results against a stored baseline")
+    parser.add_argument("command", choices=["record", "compare"],
+                        help="record: store a baseline; compare: diff against it")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Baseline report (default: benchmarks/baseline.json)")
+    parser.add_argument("--results", default=None,
+                        help="Use this suite report instead of running the suite")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1_000, 10_000],
+                        help="Synthetic series lengths in bars")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic series")
+    parser.add_argument("--no-bundled", action="store_true", help="Skip the data/*.csv files")
+    parser.add_argument("--benchmarks", nargs="*", default=list(BENCHMARKS), choices=BENCHMARKS,
+                        help="Benchmarks to run")
+    parser.add_argument("--strategies", nargs="*", default=None, help="Strategies to backtest (default: all)")
+    parser.add_argument("--max-backtest-bars", type=int, default=10_000,
+                        help="Longest series run through Cerebro")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Allowed slowdown in percent for every category")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Bootstrap interval coverage")
+    parser.add_argument("--report", default=None, help="Also write the diff report to this file")
+    parser.add_argument("--markdown", action="store_true", help="Markdown tables in the report")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Returns:
+        int: Exit status, 1 when a regression was found
+    """
+    args = parse_args(argv)
+    if args.command == 'record':
+        report = _suite_report(args)
+        print(f"[INFO] Baseline saved to {save_results(report, args.baseline)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[ERROR] Baseline not found: {args.baseline} (create it with 'record')")
+        return 2
+    baseline = load_report(args.baseline)
+    current = _suite_report(args)
+    thresholds = dict.fromkeys(DEFAULT_THRESHOLDS, args.threshold) if args.threshold is not None else None
+    rows = compare_reports(baseline, current, thresholds=thresholds, confidence=args.confidence)
+    text = format_report(rows, baseline, current, markdown=args.markdown)
+    print(text)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(text)
+        print(f"[INFO] Report saved to {args.report}")
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Reproducible performance benchmark suite
+
+Times the main stages of a backtest on the bundled data/*.csv files and on
+seeded synthetic random walks of 1k to 10M bars:
+
+- csv_read: pandas.read_csv of the raw file
+- load_data_from_csv: DataFetcher.load_data_from_csv (parsing and typing)
+- backtest/<Strategy>: Cerebro run of every entry in STRATEGIES, no analyzers
+- analyzers/<Strategy>: the same run with Backtrader's analyzers attached
+- metrics: metrics.compute_metrics on the equity curve
+- performance_analyzer: cumulative and rolling returns of PerformanceAnalyzer
+- plot: cumulative returns chart rendered to PNG with the Agg backend
+
+Every benchmark runs `repeat` times; the JSON output keeps all times plus
+the median and the throughput in bars per second, with the commit and
+library versions, so results can be compared across commits (see
+benchmarks/regression.py).
+
+Usage:
+    python -m benchmarks.suite --sizes 1000 10000 100000 --repeat 5
+"""
+import argparse
+import contextlib
+import datetime
+import gc
+import glob
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Cerebro runs a few thousand bars per second, so longer series only run the
+# loading and vectorized benchmarks unless the cap is raised
+DEFAULT_MAX_BACKTEST_BARS = 10_000
+DEFAULT_MAX_PLOT_BARS = 1_000_000
+BENCHMARKS = ('csv_read', 'load_data_from_csv', 'backtest', 'analyzers', 'metrics',
+              'performance_analyzer', 'plot')
+
+# Bundled files in the DataFetcher layout: <code>_<start>_<end>.csv
+BUNDLED_PATTERN = re.compile(r'^\d{6}_\d{4}-\d{2}-\d{2}_\d{4}-\d{2}-\d{2}\.csv$')
+
+
+def synthetic_ohlcv(n_bars, seed=0, start_price=100.0, volatility=0.02):
+    """
+    Seeded random-walk OHLCV bars
+
+    Args:
+        n_bars (int): Number of bars
+        seed (int): Random seed; the same seed gives the same series
+        start_price (float): First close
+        volatility (float): Standard deviation of the log return per bar
+
+    Returns:
+        pandas.DataFrame: open/high/low/close/volume indexed by minute
+        timestamps (10M daily bars would not fit the pandas date range)
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, volatility, n_bars)))
+    open_ = np.concatenate(([start_price], close[:-1])) * (1 + rng.normal(0.0, volatility / 4, n_bars))
+    spread = np.abs(rng.normal(0.0, volatility / 2, n_bars))
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + spread),
+        'low': np.minimum(open_, close) * (1 - spread),
+        'close': close,
+        'volume': rng.integers(1_000, 1_000_000, n_bars).astype(np.float64),
+    }, index=pd.date_range('2000-01-03 09:30', periods=n_bars, freq='min', name='date'))
+    return df
+
+
+def write_csv(df, path, code='sh.000000'):
+    """Write bars in the layout DataFetcher.save_data produces"""
+    out = df.reset_index()
+    out.insert(1, 'code', code)
+    out.to_csv(path, index=False, float_format='%.10f')
+    return path
+
+
+def bundled_datasets(data_dir=None):
+    """
+    Returns:
+        list: (dataset name, CSV path) of the bundled price files
+    """
+    data_dir = data_dir or os.path.join(ROOT, 'data')
+    paths = sorted(p for p in glob.glob(os.path.join(data_dir, '*.csv'))
+                   if BUNDLED_PATTERN.match(os.path.basename(p)))
+    return [(f"data/{os.path.basename(p)}", p) for p in paths]
+
+
+def time_call(fn, repeat):
+    """
+    Wall times of repeated calls
+
+    Args:
+        fn (callable): Called without arguments
+        repeat (int): Number of calls
+
+    Returns:
+        tuple: (list of seconds, result of the last call)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _entry(name, dataset, bars, times):
+    median = float(np.median(times))
+    return {
+        'name': name,
+        'dataset': dataset,
+        'bars': int(bars),
+        'repeat': len(times),
+        'times': [float(t) for t in times],
+        'median_seconds': median,
+        'min_seconds': float(min(times)),
+        'bars_per_second': bars / median if median > 0 else None,
+    }
+
+
+def benchmark_dataset(dataset, csv_path, repeat=5, benchmarks=BENCHMARKS, strategies=None,
+                      max_backtest_bars=DEFAULT_MAX_BACKTEST_BARS, max_plot_bars=DEFAULT_MAX_PLOT_BARS,
+                      log=print):
+    """
+    Run the benchmarks on one CSV file
+
+    Args:
+        dataset (str): Name stored with the results
+        csv_path (str): Price data in the DataFetcher layout
+        repeat (int): Timed runs per benchmark
+        benchmarks (tuple): Names from BENCHMARKS to run
+        strategies (list): STRATEGIES keys (default: all)
+        max_backtest_bars (int): Skip Cerebro benchmarks on longer series
+        max_plot_bars (int): Skip the plot benchmark on longer series
+        log (callable): Progress output
+
+    Returns:
+        list: Result entries (see run_suite)
+    """
+    from backtest import BacktestEngine
+    from data_fetcher import DataFetcher
+    from metrics import compute_metrics
+    from performance_analyzer import PerformanceAnalyzer
+    from strategies import STRATEGIES
+
+    results = []
+
+    def record(name, bars, times):
+        entry = _entry(name, dataset, bars, times)
+        results.append(entry)
+        log(f"[INFO] {name:<32} {dataset:<44} {entry['median_seconds']:>10.4f}s "
+            f"{entry['bars_per_second']:>14,.0f} bars/s")
+
+    if 'csv_read' in benchmarks:
+        times, raw = time_call(lambda: pd.read_csv(csv_path), repeat)
+        record('csv_read', len(raw), times)
+    fetcher = DataFetcher()
+    times, df = time_call(lambda: fetcher.load_data_from_csv(csv_path), repeat)
+    if 'load_data_from_csv' in benchmarks:
+        record('load_data_from_csv', len(df), times)
+    n_bars = len(df)
+
+    equity = None
+    for name in strategies or list(STRATEGIES):
+        if n_bars > max_backtest_bars:
+            break
+        for bench, use_analyzers in (('backtest', False), ('analyzers', True)):
+            if bench not in benchmarks:
+                continue
+            engine = BacktestEngine(use_analyzers=use_analyzers)
+            try:
+                times, (_, _, runs) = time_call(lambda: engine.run_backtest(STRATEGIES[name], df), repeat)
+            except ValueError as e:
+                # e.g. too few weekly bars for a multi-timeframe strategy
+                log(f"[WARNING] Skipping {bench}/{name} on {dataset}: {e}")
+                continue
+            record(f"{bench}/{name}", n_bars, times)
+            if equity is None and getattr(runs[0], 'portfolio_values', None):
+                equity = np.asarray(runs[0].portfolio_values, dtype=np.float64)
+    if equity is None:
+        # Without a backtest, benchmark the analysis on a buy-and-hold curve
+        equity = 100_000.0 * df['close'].to_numpy(dtype=np.float64) / float(df['close'].iloc[0])
+    dates = df.index[-len(equity):]
+
+    if 'metrics' in benchmarks:
+        times, _ = time_call(lambda: compute_metrics(equity, start_value=float(equity[0])), repeat)
+        record('metrics', len(equity), times)
+    analyzer = PerformanceAnalyzer()
+    if 'performance_analyzer' in benchmarks:
+        def analyze():
+            analyzer.calculate_cumulative_returns(equity, None, dates)
+            return analyzer.rolling_analysis(equity, dates)
+        times, _ = time_call(analyze, repeat)
+        record('performance_analyzer', len(equity), times)
+    if 'plot' in benchmarks and len(equity) <= max_plot_bars:
+        from report_renderer import use_headless_backend
+        use_headless_backend()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cumulative.png')
+            times, _ = time_call(lambda: analyzer.plot_cumulative_returns(
+                equity, dates, None, 'Benchmark', dataset, save_path=path, show=False), repeat)
+        record('plot', len(equity), times)
+    return results
+
+
+def environment():
+    """Commit, interpreter, library versions and machine of a run"""
+    import backtrader
+    from result_db import code_version
+
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'code_version': code_version(ROOT),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'backtrader': backtrader.__version__,
+        'platform': platform.platform(),
+        'machine': platform.node(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=5, seed=42, bundled=True, benchmarks=BENCHMARKS,
+              strategies=None, max_backtest_bars=DEFAULT_MAX_BACKTEST_BARS,
+              max_plot_bars=DEFAULT_MAX_PLOT_BARS, log=print):
+    """
+    Benchmark the bundled files and synthetic series
+
+    Args:
+        sizes (tuple): Synthetic series lengths in bars
+        repeat (int): Timed runs per benchmark
+        seed (int): Seed of the synthetic series (size i uses seed + i)
+        bundled (bool): Include data/*.csv
+        benchmarks (tuple): Names from BENCHMARKS to run
+        strategies (list): STRATEGIES keys (default: all)
+        max_backtest_bars (int): Longest series run through Cerebro
+        max_plot_bars (int): Longest series plotted
+        log (callable): Progress output
+
+    Returns:
+        dict: {'environment': ..., 'config': ..., 'results': [entry, ...]}
+        where each entry has name, dataset, bars, repeat, times,
+        median_seconds, min_seconds and bars_per_second
+    """
+    config = {'sizes': list(sizes), 'repeat': repeat, 'seed': seed, 'bundled': bundled,
+              'benchmarks': list(benchmarks), 'strategies': strategies,
+              'max_backtest_bars': max_backtest_bars, 'max_plot_bars': max_plot_bars}
+    options = dict(repeat=repeat, benchmarks=benchmarks, strategies=strategies,
+                   max_backtest_bars=max_backtest_bars, max_plot_bars=max_plot_bars, log=log)
+    results = []
+    if bundled:
+        for dataset, path in bundled_datasets():
+            results.extend(benchmark_dataset(dataset, path, **options))
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, n_bars in enumerate(sizes):
+            path = write_csv(synthetic_ohlcv(n_bars, seed=seed + i), os.path.join(tmp, f"synthetic_{n_bars}.csv"))
+            results.extend(benchmark_dataset(f"synthetic-{n_bars}", path, **options))
+            os.remove(path)
+    return {'environment': environment(), 'config': config, 'results': results}
+
+
+def save_results(report, path=None, output_dir=None):
+    """
+    Write a suite report as JSON
+
+    Args:
+        report (dict): Output of run_suite
+        path (str): Output file (default: <output_dir>/<timestamp>_<commit>.json)
+        output_dir (str): Directory for the default file name
+            (default: benchmarks/results)
+
+    Returns:
+        str: The written path
+    """
+    if path is None:
+        env = report['environment']
+        stamp = env['timestamp'].replace(':', '').replace('-', '')
+        commit = (env.get('code_version') or 'unknown')[:12]
+        path = os.path.join(output_dir or os.path.join(ROOT, 'benchmarks', 'results'), f"{stamp}_{commit}.json")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES),
+                        help="Synthetic series lengths in bars")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic series")
+    parser.add_argument("--no-bundled", action="store_true", help="Skip the data/*.csv files")
+    parser.add_argument("--benchmarks", nargs="*", default=list(BENCHMARKS), choices=BENCHMARKS,
+                        help="Benchmarks to run")
+    parser.add_argument("--strategies", nargs="*", default=None, help="Strategies to backtest (default: all)")
+    parser.add_argument("--max-backtest-bars", type=int, default=DEFAULT_MAX_BACKTEST_BARS,
+                        help="Longest series run through Cerebro")
+    parser.add_argument("--max-plot-bars", type=int, default=DEFAULT_MAX_PLOT_BARS,
+                        help="Longest series plotted")
+    parser.add_argument("--output", default=None, help="JSON output file (default: benchmarks/results/...)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    report = run_suite(sizes=args.sizes, repeat=args.repeat, seed=args.seed, bundled=not args.no_bundled,
+                       benchmarks=tuple(args.benchmarks), strategies=args.strategies,
+                       max_backtest_bars=args.max_backtest_bars, max_plot_bars=args.max_plot_bars)
+    print(f"[INFO] Benchmark results saved to {save_results(report, args.output)}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
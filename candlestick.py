@@ -0,0 +1,182 @@
+"""
+Vectorized candlestick and volume charts
+
+Bodies, wicks and volume bars are each built from arrays as a single
+matplotlib collection, so a chart costs a handful of artists instead of two
+per bar. Colors follow the A-share convention: red when the close is above
+the open, green otherwise.
+"""
+import numpy as np
+import pandas as pd
+
+from downsample import downsample_ohlc, ohlc_groups, DEFAULT_MAX_CANDLES
+from indicators import sma
+
+
+UP_COLOR = 'red'
+DOWN_COLOR = 'green'
+
+
+def _column(df, name):
+    """Column by case-insensitive name"""
+    for col in df.columns:
+        if str(col).lower() == name:
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+    raise KeyError(f"Column '{name}' not found")
+
+
+def _dates(df):
+    """Bar timestamps from a 'date' column or the index"""
+    for col in df.columns:
+        if str(col).lower() in ('date', 'datetime'):
+            return pd.to_datetime(df[col]).to_numpy()
+    return pd.to_datetime(df.index).to_numpy()
+
+
+def bar_width(x):
+    """Candle width in x units: 80% of the typical spacing between bars"""
+    if len(x) < 2:
+        return 0.8
+    return 0.8 * float(np.median(np.diff(x)))
+
+
+def _colors(open_, close):
+    return np.where(close > open_, UP_COLOR, DOWN_COLOR)
+
+
+def _rectangles(x, bottom, top, width):
+    """(n, 4, 2) vertices of bars centered on x"""
+    left, right = x - width / 2, x + width / 2
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+
+
+def plot_candlestick(ax, x, open_, high, low, close, width=None, alpha=0.7):
+    """
+    Draw candles on an axis
+
+    Args:
+        ax (matplotlib.axes.Axes): Target axis
+        x (array-like): Bar positions (matplotlib date numbers or integers)
+        open_, high, low, close (array-like): Prices
+        width (float): Body width in x units (default: from the bar spacing)
+        alpha (float): Body opacity
+
+    Returns:
+        tuple: (bodies PolyCollection, wicks LineCollection)
+    """
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    x = np.asarray(x, dtype=np.float64)
+    open_, high, low, close = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    width = bar_width(x) if width is None else width
+    colors = _colors(open_, close)
+
+    wicks = LineCollection(np.stack([np.column_stack([x, low]), np.column_stack([x, high])], axis=1),
+                           colors='black', linewidths=1, zorder=1)
+    bodies = PolyCollection(_rectangles(x, np.minimum(open_, close), np.maximum(open_, close), width),
+                            facecolors=colors, edgecolors=colors, alpha=alpha, zorder=2)
+    ax.add_collection(wicks)
+    ax.add_collection(bodies)
+    ax.update_datalim(np.column_stack([np.concatenate([x - width, x + width]),
+                                       np.concatenate([low, high])]))
+    ax.autoscale_view()
+    return bodies, wicks
+
+
+def plot_volume(ax, x, volume, open_, close, width=None, alpha=0.7):
+    """
+    Draw volume bars colored like the candles
+
+    Args:
+        ax (matplotlib.axes.Axes): Target axis
+        x (array-like): Bar positions
+        volume (array-like): Volume per bar
+        open_, close (array-like): Prices used for the bar colors
+        width (float): Bar width in x units (default: from the bar spacing)
+        alpha (float): Bar opacity
+
+    Returns:
+        PolyCollection: The volume bars
+    """
+    from matplotlib.collections import PolyCollection
+
+    x = np.asarray(x, dtype=np.float64)
+    volume = np.nan_to_num(np.asarray(volume, dtype=np.float64))
+    width = bar_width(x) if width is None else width
+    colors = _colors(np.asarray(open_, dtype=np.float64), np.asarray(close, dtype=np.float64))
+    bars = PolyCollection(_rectangles(x, np.zeros_like(volume), volume, width),
+                          facecolors=colors, edgecolors='none', alpha=alpha)
+    ax.add_collection(bars)
+    ax.update_datalim(np.column_stack([np.concatenate([x - width, x + width]),
+                                       np.concatenate([np.zeros_like(volume), volume])]))
+    ax.autoscale_view()
+    return bars
+
+
+def plot_kline(df, title=None, volume=True, mav=(), kind='candle', max_bars=DEFAULT_MAX_CANDLES,
+               figsize=(15, 8)):
+    """
+    K-line chart with optional moving averages and a volume panel
+
+    Args:
+        df (pandas.DataFrame): Bars with open/high/low/close[/volume] columns
+            (any case) and dates in a 'date' column or the index
+        title (str): Chart title
+        volume (bool): Add a volume panel below the prices
+        mav (tuple): Moving average periods drawn over the closes (in
+            trading days, also when candles are merged)
+        kind (str): 'candle' or 'line' (close prices only)
+        max_bars (int): Longer histories are merged into this many candles
+        figsize (tuple): Figure size in inches
+
+    Returns:
+        tuple: (figure, price axis, volume axis or None)
+    """
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    # Moving averages use every bar, taken at the last bar of each candle
+    _, ends = ohlc_groups(len(df), max_bars)
+    averages = {period: sma(_column(df, 'close'), period)[ends] for period in mav}
+    df = downsample_ohlc(df, max_bars=max_bars)
+    x = mdates.date2num(_dates(df))
+    open_, high, low, close = (_column(df, name) for name in ('open', 'high', 'low', 'close'))
+
+    if volume:
+        fig, (ax, vol_ax) = plt.subplots(2, 1, figsize=figsize, sharex=True,
+                                         gridspec_kw={'height_ratios': [3, 1]})
+    else:
+        fig, ax = plt.subplots(figsize=figsize)
+        vol_ax = None
+
+    if kind == 'candle':
+        plot_candlestick(ax, x, open_, high, low, close)
+    elif kind == 'line':
+        ax.plot(x, close, linewidth=1, color='blue')
+    else:
+        raise ValueError(f"Unknown chart type: {kind}")
+    for period, average in averages.items():
+        ax.plot(x, average, linewidth=1, label=f'MA{period}')
+    if mav:
+        ax.legend(fontsize=9, loc='upper left')
+
+    if vol_ax is not None:
+        plot_volume(vol_ax, x, _column(df, 'volume'), open_, close)
+        vol_ax.set_ylabel('Volume', fontsize=10)
+        vol_ax.grid(True, alpha=0.3)
+
+    if title:
+        ax.set_title(title, fontsize=14)
+    ax.set_ylabel('Price (¥)', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    bottom_ax = vol_ax if vol_ax is not None else ax
+    bottom_ax.xaxis_date()
+    bottom_ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    bottom_ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    plt.setp(bottom_ax.get_xticklabels(), rotation=45)
+    return fig, ax, vol_ax
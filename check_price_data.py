@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime
 import baostock as bs
 import sys
 import os
+from candlestick import plot_kline
 
 def fetch_and_plot_kline():
     """Fetch stock data and plot K-line chart"""
@@ -66,35 +66,8 @@ def fetch_and_plot_kline():
     print(f"[INFO] Price range: {df['low'].min():.2f} to {df['high'].max():.2f}")
     
     # Plot K-line chart
-    plt.figure(figsize=(15, 8))
-    
-    # Plot candlestick chart
-    for i, row in df.iterrows():
-        date = row['date']
-        open_price = row['open']
-        high = row['high']
-        low = row['low']
-        close = row['close']
-        
-        # Determine color based on open/close
-        color = 'red' if close > open_price else 'green'
-        
-        # Plot the body
-        plt.bar(date, close - open_price, bottom=min(open_price, close), 
-                color=color, alpha=0.7, width=0.8)
-        
-        # Plot the wick
-        plt.plot([date, date], [low, high], color='black', linewidth=1)
-    
-    plt.title(f'K-Line Chart: {stock_code} ({start_date} to {end_date})', fontsize=14)
+    plot_kline(df, title=f'K-Line Chart: {stock_code} ({start_date} to {end_date})', volume=False)
     plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Price (¥)', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    
-    # Format x-axis
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-    plt.gca().xaxis.set_major_locator(mdates.WeekdayLocator(interval=2))
-    plt.xticks(rotation=45)
     
     # Add price statistics
     stats_text = f"""
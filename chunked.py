@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Out-of-core processing of stored bar files in bounded memory
+
+load_data_from_csv materializes a whole file, which does not scale to the
+whole-market minute history. This module reads the stored CSVs in fixed
+row chunks instead and processes the market file by file in worker
+processes:
+
+- csv_partitions lists the symbol partitions (one stored file each, named
+  as DataFetcher.save_data names them)
+- iter_chunks reads one file in chunks, optionally repeating the last rows
+  of the previous chunk so rolling windows stay exact across chunk
+  boundaries; rolling_apply builds on it to compute indicators chunk by chunk
+- iter_periods regroups the chunks into complete days, weeks or months
+  (date partitions), carrying an incomplete period over to the next chunk
+- SeriesStats accumulates the equity metrics of metrics.compute_metrics in
+  one ordered pass, without keeping the series
+- map_partitions / map_reduce run a function over partitions in a process
+  pool with a bounded number of tasks in flight; scan and screen apply
+  symbol_stats to every partition and filter the resulting table
+
+Memory per worker is about one chunk plus the lookback rows; the parent
+only holds the per-partition results of the tasks in flight.
+
+Usage:
+    python chunked.py data --frequency 5 --workers 8 --chunksize 500000 --screen "sharpe_ratio > 0.02"
+"""
+import argparse
+import collections
+import functools
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DataFetcher
+from resampler import calendar_keys, periods_per_year
+
+# Rows per chunk; about 35 MB of prepared 5-minute bars
+DEFAULT_CHUNKSIZE = 500_000
+
+# Files saved by DataFetcher.save_data: <code>_<start>_<end>[_<n>min].csv
+FILE_PATTERN = re.compile(r'^(\d{6})_(\d{4}-\d{2}-\d{2})_(\d{4}-\d{2}-\d{2})(?:_(\d+)min)?\.csv$')
+
+Partition = collections.namedtuple('Partition', ['key', 'symbol', 'frequency', 'path'])
+
+
+def csv_partitions(data_dir="data", frequency=None):
+    """
+    Symbol partitions of a data directory
+
+    Args:
+        data_dir (str): Directory with CSVs saved by DataFetcher.save_data
+        frequency (str): Only files of this stored frequency ('d' or minutes)
+
+    Returns:
+        list: Partition(key, symbol, frequency, path) per file, sorted by key
+    """
+    partitions = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+        match = FILE_PATTERN.match(os.path.basename(path))
+        if match is None:
+            continue
+        file_frequency = match.group(4) or 'd'
+        if frequency is not None and file_frequency != str(frequency):
+            continue
+        key = os.path.basename(path)[:-len('.csv')]
+        partitions.append(Partition(key, match.group(1), file_frequency, path))
+    return partitions
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, overlap=0):
+    """
+    Prepared bars of a stored CSV, chunk by chunk
+
+    Args:
+        path (str): CSV saved by DataFetcher.save_data
+        chunksize (int): New rows per chunk
+        overlap (int): Rows of the previous chunk repeated at the start of
+            each chunk, e.g. window - 1 for a rolling window
+
+    Yields:
+        tuple: (chunk, n_overlap) with the repeated rows first
+    """
+    chunks = DataFetcher().load_data_from_csv(path, chunksize=chunksize)
+    if chunks is None:
+        return
+    tail = None
+    for chunk in chunks:
+        n_overlap = 0
+        if tail is not None and len(tail):
+            n_overlap = len(tail)
+            chunk = pd.concat([tail, chunk])
+        yield chunk, n_overlap
+        if overlap:
+            tail = chunk.iloc[-overlap:]
+
+
+def rolling_apply(path, func, lookback=0, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Apply an indicator to a stored file chunk by chunk
+
+    Args:
+        path (str): CSV saved by DataFetcher.save_data
+        func (callable): Maps a bar DataFrame to an array or Series with one
+            value per row, e.g. lambda df: indicators.sma(df['close'], 20)
+        lookback (int): Earlier rows each value depends on (window - 1);
+            values equal those of func on the whole file as long as func
+            only looks back that far
+        chunksize (int): New rows per chunk
+
+    Yields:
+        pandas.Series: Values of the new rows of each chunk
+    """
+    for chunk, n_overlap in iter_chunks(path, chunksize, overlap=lookback):
+        values = np.asarray(func(chunk))
+        yield pd.Series(values[n_overlap:], index=chunk.index[n_overlap:])
+
+
+def iter_periods(path, period='d', chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Complete days, weeks or months of a stored file
+
+    Args:
+        path (str): CSV saved by DataFetcher.save_data
+        period (str): 'd', 'w' or 'm'
+        chunksize (int): Rows read per chunk
+
+    Yields:
+        pandas.DataFrame: The bars of one period, in time order
+    """
+    carry = None
+    for chunk, _ in iter_chunks(path, chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        keys = calendar_keys(chunk.index, period)
+        # The last period may continue in the next chunk
+        last = np.searchsorted(keys, keys[-1])
+        starts = np.concatenate(([0], np.flatnonzero(keys[1:last] != keys[:last - 1]) + 1)) if last else []
+        bounds = list(starts) + [last]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            yield chunk.iloc[start:end]
+        carry = chunk.iloc[last:]
+    if carry is not None and len(carry):
+        yield carry
+
+
+class SeriesStats:
+    """
+    Streaming equity metrics of one series (see metrics.compute_metrics)
+
+    Values must be added in time order. The result equals compute_metrics
+    on the whole series with the first value as the start value.
+    """
+
+    def __init__(self):
+        self.bars = 0
+        self.first = None
+        self.last = None
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.downsq = 0.0
+
+    def update(self, values):
+        """
+        Add the next values of the series
+
+        Args:
+            values (array-like): Equity or close values in time order
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        if self.first is None:
+            self.first = values[0]
+            self.last = values[0]
+        returns = np.diff(values, prepend=self.last) / np.concatenate(([self.last], values[:-1]))
+        peak = np.maximum.accumulate(np.maximum(values, self.peak))
+        self.max_drawdown = max(self.max_drawdown, float(np.max(1.0 - values / peak)))
+        self.peak = peak[-1]
+        self.sum += returns.sum()
+        self.sumsq += (returns * returns).sum()
+        self.downsq += (np.minimum(returns, 0.0) ** 2).sum()
+        self.bars += values.size
+        self.last = values[-1]
+
+    def result(self, periods_per_year=252):
+        """
+        Args:
+            periods_per_year (float): Bars per year for annualization
+
+        Returns:
+            dict: bars, total/annual return, volatility, Sharpe, Sortino and
+            max drawdown (None where undefined)
+        """
+        stats = dict.fromkeys(['total_return', 'annual_return', 'volatility', 'sharpe_ratio',
+                               'sortino_ratio', 'max_drawdown'])
+        stats['bars'] = self.bars
+        if not self.bars:
+            return stats
+        mean = self.sum / self.bars
+        std = np.sqrt(max(self.sumsq / self.bars - mean * mean, 0.0))
+        downside = np.sqrt(self.downsq / self.bars)
+        total_return = self.last / self.first - 1.0
+        stats.update({
+            'total_return': float(total_return),
+            'annual_return': float((1.0 + total_return) ** (periods_per_year / self.bars) - 1.0
+                                   if total_return > -1.0 else -1.0),
+            'volatility': float(std * np.sqrt(periods_per_year)),
+            'sharpe_ratio': float(mean / std) if std > 0 else None,
+            'sortino_ratio': float(mean / downside) if downside > 0 else None,
+            'max_drawdown': self.max_drawdown,
+        })
+        return stats
+
+
+def symbol_stats(partition, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Buy-and-hold metrics, last close and average volume of one partition
+
+    Args:
+        partition (Partition): Stored file to scan
+        chunksize (int): Rows per chunk
+
+    Returns:
+        dict: 'key', 'symbol', first/last date and SeriesStats results
+    """
+    stats = SeriesStats()
+    first_date = last_date = None
+    volume = 0.0
+    for chunk, _ in iter_chunks(partition.path, chunksize):
+        if first_date is None:
+            first_date = chunk.index[0]
+        last_date = chunk.index[-1]
+        stats.update(chunk['close'].to_numpy())
+        volume += np.nansum(chunk['volume'].to_numpy(dtype=np.float64))
+    row = {'key': partition.key, 'symbol': partition.symbol,
+           'first_date': first_date, 'last_date': last_date}
+    row.update(stats.result(periods_per_year(partition.frequency)))
+    row['last_close'] = stats.last
+    row['avg_volume'] = volume / stats.bars if stats.bars else None
+    return row
+
+
+def map_partitions(func, items, workers=None, max_pending=None):
+    """
+    Apply a function to every item in worker processes, in order
+
+    At most max_pending tasks are submitted ahead of the one being
+    returned, so results do not pile up when the consumer is slower.
+
+    Args:
+        func (callable): Picklable function of one item (use
+            functools.partial for extra arguments)
+        items (iterable): Partitions or other work items
+        workers (int): Worker processes (default: CPU count)
+        max_pending (int): Tasks in flight (default: 2 per worker)
+
+    Yields:
+        tuple: (item, result) in the order of items
+    """
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for item in items:
+            pending.append((item, pool.submit(func, item)))
+            if len(pending) >= max_pending:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def map_reduce(func, items, reduce, initial, workers=None, max_pending=None):
+    """
+    Fold the results of map_partitions into one value
+
+    Args:
+        func (callable): Picklable function of one item
+        items (iterable): Work items
+        reduce (callable): reduce(accumulator, result) -> accumulator,
+            called in item order in the parent process
+        initial: Starting accumulator
+        workers (int): Worker processes (default: CPU count)
+        max_pending (int): Tasks in flight (default: 2 per worker)
+
+    Returns:
+        The final accumulator
+    """
+    accumulator = initial
+    for _, result in map_partitions(func, items, workers, max_pending):
+        accumulator = reduce(accumulator, result)
+    return accumulator
+
+
+def scan(partitions, func=symbol_stats, chunksize=DEFAULT_CHUNKSIZE, workers=None, max_pending=None):
+    """
+    Table of per-partition results
+
+    Args:
+        partitions (list): Partitions from csv_partitions
+        func (callable): Picklable function(partition, chunksize) -> dict
+        chunksize (int): Rows per chunk in the workers
+        workers (int): Worker processes (default: CPU count)
+        max_pending (int): Tasks in flight
+
+    Returns:
+        pandas.DataFrame: One row per partition, indexed by key
+    """
+    rows = map_reduce(functools.partial(func, chunksize=chunksize), partitions,
+                      lambda acc, row: acc + [row], [], workers, max_pending)
+    return pd.DataFrame(rows).set_index('key') if rows else pd.DataFrame()
+
+
+def screen(partitions, query, **kwargs):
+    """
+    Partitions whose scan results satisfy a pandas query
+
+    Args:
+        partitions (list): Partitions from csv_partitions
+        query (str): DataFrame.query expression, e.g. "sharpe_ratio > 0.02"
+        **kwargs: scan arguments
+
+    Returns:
+        pandas.DataFrame: Matching rows of the scan table
+    """
+    table = scan(partitions, **kwargs)
+    return table.query(query) if len(table) else table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan stored bar files in bounded memory")
+    parser.add_argument("data_dir", nargs="?", default="data", help="Directory with saved CSVs")
+    parser.add_argument("--frequency", default=None, help="Stored frequency to scan ('d' or minutes)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--screen", default=None, help="Keep rows matching this query, e.g. 'sharpe_ratio > 0'")
+    parser.add_argument("--output", default=None, help="Write the table to this CSV")
+    args = parser.parse_args()
+
+    partitions = csv_partitions(args.data_dir, args.frequency)
+    if not partitions:
+        print(f"[ERROR] No stored bar files in {args.data_dir}")
+        return
+    print(f"[INFO] Scanning {len(partitions)} files with {args.workers or os.cpu_count()} workers")
+    if args.screen:
+        table = screen(partitions, args.screen, chunksize=args.chunksize, workers=args.workers)
+    else:
+        table = scan(partitions, chunksize=args.chunksize, workers=args.workers)
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(table)
+    if args.output:
+        table.to_csv(args.output)
+        print(f"[INFO] Table saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
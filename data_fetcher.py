@@ -1,34 +1,53 @@
-import baostock as bs
-import pandas as pd
 import os
 from datetime import datetime
 
+import pandas as pd
+
+from ingest import read_result, write_csv
+
+
+def _baostock():
+    """Baostock client, imported on first use so cached runs never load it"""
+    import baostock
+    return baostock
+
+
 class DataFetcher:
     """
     Data fetcher class that downloads historical stock data using Baostock API
     """
     
-    def __init__(self):
+    def __init__(self, verbose=True):
+        """
+        Args:
+            verbose (bool): Print progress and error messages (a service
+                sharing the process with other threads turns them off)
+        """
         self.logged_in = False
+        self.verbose = verbose
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
         
     def login(self):
         """Login to Baostock API"""
         if not self.logged_in:
-            print("[INFO] Logging in to Baostock...")
-            lg = bs.login()
+            self._log("[INFO] Logging in to Baostock...")
+            lg = _baostock().login()
             if lg.error_code != '0':
-                print(f"[ERROR] Login failed: {lg.error_msg}")
+                self._log(f"[ERROR] Login failed: {lg.error_msg}")
                 return False
             else:
-                print("[INFO] Login successful.")
+                self._log("[INFO] Login successful.")
                 self.logged_in = True
         return True
     
     def logout(self):
         """Logout from Baostock API"""
         if self.logged_in:
-            print("[INFO] Logging out from Baostock...")
-            bs.logout()
+            self._log("[INFO] Logging out from Baostock...")
+            _baostock().logout()
             self.logged_in = False
     
     def fetch_data(self, stock_code, start_date, end_date, frequency="d", adjustflag="2"):
@@ -39,20 +58,38 @@ class DataFetcher:
             stock_code (str): Stock code (e.g., 'sh.600600')
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
-            frequency (str): Data frequency ('d' for daily, 'w' for weekly, 'm' for monthly)
+            frequency (str): Data frequency ('d' for daily, 'w' for weekly, 'm' for monthly,
+                '5'/'15'/'30'/'60' for minute bars, which also get their 'time')
             adjustflag (str): Adjustment flag ('1' for forward, '2' for backward, '3' for none)
             
         Returns:
-            pandas.DataFrame: Historical price data
+            pandas.DataFrame: Historical price data with datetime64 'date',
+            float64 prices and volume (and datetime64 'time' for minute bars)
         """
+        rs = self._query(stock_code, start_date, end_date, frequency, adjustflag)
+        if rs is None:
+            return None
+        
+        # Typed columns, converted a page at a time (see ingest.py)
+        df = read_result(rs)
+        if df.empty:
+            self._log("[WARNING] No data returned for the given query.")
+            return None
+        return df
+    
+    def _query(self, stock_code, start_date, end_date, frequency, adjustflag):
+        """Run the K-line query; returns the result set or None"""
         if not self.login():
             return None
             
-        print(f"[INFO] Querying historical K data for {stock_code} from {start_date} to {end_date}...")
+        self._log(f"[INFO] Querying historical K data for {stock_code} from {start_date} to {end_date}...")
         
-        rs = bs.query_history_k_data_plus(
+        fields = "date,code,open,high,low,close,volume"
+        if str(frequency).isdigit():
+            fields = "date,time,code,open,high,low,close,volume"
+        rs = _baostock().query_history_k_data_plus(
             stock_code,
-            "date,code,open,high,low,close,volume",
+            fields,
             start_date=start_date, 
             end_date=end_date,
             frequency=frequency, 
@@ -60,23 +97,12 @@ class DataFetcher:
         )
         
         if rs.error_code != '0':
-            print(f"[ERROR] Query failed: {rs.error_msg}")
+            self._log(f"[ERROR] Query failed: {rs.error_msg}")
             return None
-        else:
-            print("[INFO] Query successful. Processing data...")
-        
-        data_list = []
-        while (rs.error_code == '0') & rs.next():
-            data_list.append(rs.get_row_data())
-        
-        if not data_list:
-            print("[WARNING] No data returned for the given query.")
-            return None
-        else:
-            df = pd.DataFrame(data_list, columns=rs.fields)
-            return df
+        self._log("[INFO] Query successful. Processing data...")
+        return rs
     
-    def save_data(self, df, stock_code, start_date, end_date, output_dir="data"):
+    def save_data(self, df, stock_code, start_date, end_date, output_dir="data", frequency="d"):
         """
         Save data to CSV file
         
@@ -86,25 +112,31 @@ class DataFetcher:
             start_date (str): Start date
             end_date (str): End date
             output_dir (str): Output directory
+            frequency (str): Data frequency; minute bars get a '_<n>min'
+                suffix so they do not overwrite the daily file
             
         Returns:
             str: Path to saved CSV file
         """
         if df is None or df.empty:
-            print("[ERROR] No data to save.")
+            self._log("[ERROR] No data to save.")
             return None
             
-        # Create filename
-        code_short = stock_code.split('.')[-1]  # Extract code without exchange prefix
-        filename = f"{code_short}_{start_date}_{end_date}.csv"
-        filepath = os.path.join(output_dir, filename)
+        filepath = self.data_path(stock_code, start_date, end_date, output_dir, frequency)
         
         # Save to CSV
         df.to_csv(filepath, index=False)
-        print(f"[INFO] Data saved to {filepath}")
+        self._log(f"[INFO] Data saved to {filepath}")
         
         return filepath
     
+    @staticmethod
+    def data_path(stock_code, start_date, end_date, output_dir="data", frequency="d"):
+        """CSV path of a download, e.g. data/600600_2020-04-01_2025-04-01.csv"""
+        code_short = stock_code.split('.')[-1]  # Extract code without exchange prefix
+        suffix = f"_{frequency}min" if str(frequency).isdigit() else ""
+        return os.path.join(output_dir, f"{code_short}_{start_date}_{end_date}{suffix}.csv")
+    
     def fetch_and_save(self, stock_code, start_date, end_date, frequency="d", adjustflag="2", output_dir="data"):
         """
         Fetch data and save to CSV in one operation
@@ -120,44 +152,81 @@ class DataFetcher:
         Returns:
             str: Path to saved CSV file
         """
-        df = self.fetch_data(stock_code, start_date, end_date, frequency, adjustflag)
-        if df is not None:
-            return self.save_data(df, stock_code, start_date, end_date, output_dir)
-        return None
+        rs = self._query(stock_code, start_date, end_date, frequency, adjustflag)
+        if rs is None:
+            return None
+        
+        # Blocks go straight to the file, so a long minute history is never
+        # held in memory as a whole
+        os.makedirs(output_dir, exist_ok=True)
+        filepath = self.data_path(stock_code, start_date, end_date, output_dir, frequency)
+        rows = write_csv(rs, filepath)
+        if rows == 0:
+            self._log("[WARNING] No data returned for the given query.")
+            return None
+        self._log(f"[INFO] Data saved to {filepath} ({rows} rows)")
+        return filepath
     
-    def load_data_from_csv(self, filepath):
+    def load_data_from_csv(self, filepath, chunksize=None):
         """
         Load data from CSV file and prepare for backtesting
         
         Args:
             filepath (str): Path to CSV file
+            chunksize (int): Read the file in chunks of this many rows and
+                return an iterator of prepared chunks instead (see chunked.py)
             
         Returns:
-            pandas.DataFrame: Prepared data for backtesting
+            pandas.DataFrame: Prepared data for backtesting (an iterator of
+            DataFrames when chunksize is given)
         """
+        if chunksize:
+            if not os.path.exists(filepath):
+                self._log(f"[ERROR] File not found: {filepath}")
+                return None
+            return (self.prepare_bars(chunk) for chunk in pd.read_csv(filepath, chunksize=chunksize))
         try:
             df = pd.read_csv(filepath)
-            print(f"[INFO] Loaded data from {filepath}")
-            
-            # Prepare data for backtesting
-            df['date'] = pd.to_datetime(df['date'])
-            df.set_index('date', inplace=True)
-            
-            # Convert numeric columns
-            numeric_columns = ['open', 'high', 'low', 'close', 'volume']
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            return df
+            self._log(f"[INFO] Loaded data from {filepath}")
+            return self.prepare_bars(df)
             
         except FileNotFoundError:
-            print(f"[ERROR] File not found: {filepath}")
+            self._log(f"[ERROR] File not found: {filepath}")
             return None
         except Exception as e:
-            print(f"[ERROR] Error loading data: {e}")
+            self._log(f"[ERROR] Error loading data: {e}")
             return None
-
+    
+    @staticmethod
+    def prepare_bars(df):
+        """
+        Index raw CSV rows by date and convert the price columns
+        
+        Args:
+            df (pandas.DataFrame): Rows as read from a saved CSV
+            
+        Returns:
+            pandas.DataFrame: The same frame, indexed by date
+        """
+        # Minute bars are indexed by their end time (raw Baostock 'time' is
+        # YYYYMMDDHHMMSSsss, files written by ingest.py hold ISO times)
+        if 'time' in df.columns:
+            time = df.pop('time')
+            if pd.api.types.is_numeric_dtype(time):
+                df['date'] = pd.to_datetime(time.astype(str).str[:14], format='%Y%m%d%H%M%S')
+            else:
+                df['date'] = pd.to_datetime(time)
+        else:
+            df['date'] = pd.to_datetime(df['date'])
+        df.set_index('date', inplace=True)
+        
+        # Convert numeric columns
+        numeric_columns = ['open', 'high', 'low', 'close', 'volume']
+        for col in numeric_columns:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        return df
 
 if __name__ == "__main__":
     # Example usage
@@ -2,16 +2,21 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import os
+from artifacts import load_strategy_frame, read_table
+from trade_ledger import round_trips, trade_stats
 
-def detailed_analysis():
+def detailed_analysis(path="results/RSIStrategy_600600_2020-04-01_2025-04-01", save_path=None, show=True):
     """
     Perform detailed analysis of the strategy performance
-    """
-    excel_filename = "strategy_data_RSIStrategy_600600_2020-04-01_2025-04-01.xlsx"
     
-    # Read data from Excel
-    df = pd.read_excel(excel_filename)
-    df['Date'] = pd.to_datetime(df['Date'])
+    Args:
+        path (str): Run artifact directory, or a legacy .xlsx workbook
+        save_path (str): Write the chart to this file (.png/.svg)
+        show (bool): Display the chart with plt.show()
+    """
+    # Read the saved run
+    df = load_strategy_frame(path)
     
     print("="*60)
     print("DETAILED STRATEGY ANALYSIS")
@@ -72,7 +77,13 @@ def detailed_analysis():
         ax.tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.show()
+    if save_path:
+        plt.savefig(save_path)
+        print(f"[INFO] Chart saved to {save_path}")
+    if show:
+        plt.show()
+    else:
+        plt.close()
     
     # Calculate and display performance metrics
     print(f"\nPERFORMANCE METRICS:")
@@ -101,46 +112,33 @@ def detailed_analysis():
         benchmark_volatility = benchmark_returns.std() * np.sqrt(252) * 100
         print(f"CSI300 Volatility: {benchmark_volatility:.2f}%")
     
-    # Show the actual trades from the backtest log
+    # Show the trades recorded in the run's fills table
     print(f"\nACTUAL TRADES EXECUTED:")
     print(f"="*40)
-    trades = [
-        ("2021-03-01", "BUY", 72.53),
-        ("2021-04-22", "SELL", 84.24),
-        ("2021-08-02", "BUY", 71.64),
-        ("2021-11-01", "SELL", 95.09),
-        ("2022-03-30", "BUY", 70.25),
-        ("2022-06-28", "SELL", 90.37),
-        ("2022-10-28", "BUY", 79.57),
-        ("2023-04-11", "SELL", 113.12),
-        ("2023-05-31", "BUY", 90.35),
-        ("2024-02-26", "SELL", 78.12),
-        ("2024-05-31", "BUY", 72.92),
-        ("2024-09-30", "SELL", 72.69),
-        ("2025-02-06", "BUY", 65.43)
-    ]
-    
-    for date, action, price in trades:
-        print(f"  {date}: {action} at ¥{price:.2f}")
+    fills = read_table(path, 'trades') if os.path.isdir(path) else None
+    if fills is None or fills.empty:
+        print("  No fills recorded for this run.")
+        return
+    
+    for row in fills.itertuples(index=False):
+        print(f"  {row.date.strftime('%Y-%m-%d')}: {row.side} at ¥{row.price:.2f}")
     
     # Calculate trade returns
     print(f"\nTRADE ANALYSIS:")
     print(f"="*40)
-    trade_returns = []
-    for i in range(0, len(trades)-1, 2):
-        if i+1 < len(trades):
-            buy_price = trades[i][2]
-            sell_price = trades[i+1][2]
-            trade_return = (sell_price - buy_price) / buy_price * 100
-            trade_returns.append(trade_return)
-            print(f"  Trade {i//2 + 1}: Buy ¥{buy_price:.2f} → Sell ¥{sell_price:.2f} = {trade_return:+.2f}%")
-    
-    if trade_returns:
+    trades = round_trips(fills)
+    for i, trade in enumerate(trades):
+        print(f"  Trade {i + 1}: Buy ¥{trade['entry_price']:.2f} → Sell ¥{trade['exit_price']:.2f} = {trade['ret'] * 100:+.2f}%")
+    
+    if len(trades):
+        stats = trade_stats(trades)
         print(f"\nTrade Statistics:")
-        print(f"  Average trade return: {np.mean(trade_returns):.2f}%")
-        print(f"  Best trade: {max(trade_returns):.2f}%")
-        print(f"  Worst trade: {min(trade_returns):.2f}%")
-        print(f"  Winning trades: {sum(1 for r in trade_returns if r > 0)}/{len(trade_returns)}")
+        print(f"  Average trade return: {stats['avg_return'] * 100:.2f}%")
+        print(f"  Best trade: {stats['best_return'] * 100:.2f}%")
+        print(f"  Worst trade: {stats['worst_return'] * 100:.2f}%")
+        # trade_stats' win rate, so break-even trades count as wins in both reports
+        wins = round(stats['win_rate'] * stats['total_trades'])
+        print(f"  Winning trades: {wins}/{stats['total_trades']} ({stats['win_rate'] * 100:.1f}%)")
 
 if __name__ == "__main__":
     detailed_analysis() 
\ No newline at end of file
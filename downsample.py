@@ -0,0 +1,200 @@
+"""
+Downsampling of long series for plotting
+
+A chart is only a few thousand pixels wide, so plotting every bar of a
+multi-year minute series wastes time and memory in matplotlib without
+changing the picture. These helpers pick a bounded number of points to draw:
+
+- lttb_indices: Largest-Triangle-Three-Buckets, keeps the visual shape of a line
+- minmax_indices: first/last plus the minimum and maximum of every bucket
+- downsample_indices: what the charts use; LTTB (or min/max) plus the global
+  extremes and the maximum drawdown peak and trough, so they are never lost
+- downsample_ohlc: merges consecutive bars into coarser candles (first open,
+  highest high, lowest low, last close, summed volume)
+
+Series at or below the point limit are returned unchanged.
+"""
+import numpy as np
+import pandas as pd
+
+
+# Above this many points line charts are downsampled
+DEFAULT_MAX_POINTS = 2000
+# Above this many bars candlestick charts merge bars
+DEFAULT_MAX_CANDLES = 600
+
+
+def lttb_indices(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    Args:
+        y (array-like): Series values, plotted against their position
+        n_out (int): Number of points to keep (first and last included)
+
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Each bucket is scored against the average of the next one
+    avg_x = np.append(np.add.reduceat(x[:-1], edges[:-1])[1:] / counts[1:], x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], edges[:-1])[1:] / counts[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        area = np.where(np.isnan(area), -1.0, area)
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_buckets):
+    """
+    First and last point plus the minimum and maximum of each bucket
+
+    Args:
+        y (array-like): Series values
+        n_buckets (int): Number of equal-width buckets
+
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points (at most 2 * n_buckets + 2)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= 2 * n_buckets + 2 or n_buckets < 1:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    padded_len = -(-n // size) * size
+    offsets = np.arange(0, padded_len, size)
+    low = np.full(padded_len, np.inf)
+    high = np.full(padded_len, -np.inf)
+    low[:n] = np.where(np.isnan(y), np.inf, y)
+    high[:n] = np.where(np.isnan(y), -np.inf, y)
+    argmin = low.reshape(-1, size).argmin(axis=1) + offsets
+    argmax = high.reshape(-1, size).argmax(axis=1) + offsets
+    keep = np.concatenate(([0, n - 1], argmin, argmax))
+    return np.unique(keep[keep < n])
+
+
+def extreme_indices(y):
+    """
+    Indices that must survive downsampling: global minimum and maximum and
+    the peak and trough of the maximum drawdown
+
+    Args:
+        y (array-like): Series values
+
+    Returns:
+        numpy.ndarray: Sorted unique indices
+    """
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    if not valid.any():
+        return np.empty(0, dtype=np.int64)
+    filled = np.where(valid, y, np.nanmin(y))
+    peak = np.maximum.accumulate(filled)
+    trough = int(np.argmax(peak - filled))
+    peak_index = int(np.argmax(filled[:trough + 1]))
+    return np.unique([int(np.nanargmin(y)), int(np.nanargmax(y)), peak_index, trough])
+
+
+def downsample_indices(y, max_points=DEFAULT_MAX_POINTS, method='lttb'):
+    """
+    Indices to plot for one or several series that share an x axis
+
+    Args:
+        y (array-like): One series, or (series x points) for several
+        max_points (int): Point budget; shorter series are kept whole
+        method (str): 'lttb' or 'minmax'
+
+    Returns:
+        numpy.ndarray: Sorted indices into the points axis
+    """
+    rows = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    n = rows.shape[1]
+    if n <= max_points:
+        return np.arange(n)
+
+    budget = max(max_points // len(rows), 3)
+    keep = []
+    for row in rows:
+        if method == 'minmax':
+            keep.append(minmax_indices(row, max(budget // 2 - 1, 1)))
+        elif method == 'lttb':
+            keep.append(lttb_indices(row, budget))
+        else:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        keep.append(extreme_indices(row))
+    return np.unique(np.concatenate(keep))
+
+
+def ohlc_groups(n, max_bars=DEFAULT_MAX_CANDLES):
+    """
+    First and last bar of every candle downsample_ohlc merges
+
+    Args:
+        n (int): Number of bars
+        max_bars (int): Maximum number of candles
+
+    Returns:
+        tuple: (starts, ends) index arrays, one bar per candle when n <= max_bars
+    """
+    if n <= max_bars:
+        index = np.arange(n)
+        return index, index
+    size = -(-n // max_bars)
+    starts = np.arange(0, n, size)
+    return starts, np.minimum(starts + size, n) - 1
+
+
+def downsample_ohlc(df, max_bars=DEFAULT_MAX_CANDLES):
+    """
+    Merge consecutive bars so at most max_bars candles are drawn
+
+    Columns are matched case-insensitively: open takes the first value,
+    high the maximum, low the minimum, volume/amount the sum and every
+    other column the last value. Each merged bar is labeled with the
+    timestamp of its first bar.
+
+    Args:
+        df (pandas.DataFrame): Bars in time order
+        max_bars (int): Maximum number of bars to return
+
+    Returns:
+        pandas.DataFrame: The original frame if it is short enough, otherwise
+        the merged bars
+    """
+    if len(df) <= max_bars:
+        return df
+
+    starts, ends = ohlc_groups(len(df), max_bars)
+    merged = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        name = str(col).lower()
+        if name == 'open':
+            merged[col] = values[starts]
+        elif name == 'high':
+            merged[col] = np.fmax.reduceat(values.astype(np.float64), starts)
+        elif name == 'low':
+            merged[col] = np.fmin.reduceat(values.astype(np.float64), starts)
+        elif name in ('volume', 'amount'):
+            merged[col] = np.add.reduceat(np.nan_to_num(values.astype(np.float64)), starts)
+        elif name in ('date', 'datetime'):
+            merged[col] = values[starts]
+        else:
+            merged[col] = values[ends]
+    return pd.DataFrame(merged, index=df.index[starts], columns=df.columns)
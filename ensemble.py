@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Ensemble runs: many strategies over one symbol in a single pass
+
+Comparing strategies or parameter sets with BacktestEngine costs one full
+Cerebro run each (feed preload, indicator lines, bar loop, analyzers).
+EnsembleEngine evaluates N members at once instead:
+
+- signals come from the vectorized kernels in signals.py, computed on one
+  set of price arrays; indicator calls go through SharedIndicators, so an
+  SMA, RSI or band used by several members is computed once
+- every member gets an independent virtual broker (cash, position, pending
+  order); the brokers are rows of NumPy arrays advanced together in one
+  loop over the bars with the fill/order logic of signals.py, which
+  mirrors the strategies' all-in/all-out orders and Backtrader's fills at
+  the next open
+- metrics come from each row's equity and fills (metrics.compute_metrics
+  and trade_ledger.round_trips), as in BacktestEngine's analyzer-free mode
+
+Members without a kernel (e.g. MultiTimeframeMAStrategy) run through
+BacktestEngine with a shared FeedCache, so the feed is still preloaded once.
+
+Config:
+    "ensemble": [
+        {"strategy": "MAStrategy", "strategy_params": {"short_window": 5}},
+        {"strategy": "RSIStrategy", "name": "rsi-wide", "strategy_params": {"oversold": 20}}
+    ]
+
+Usage:
+    python ensemble.py configs/config_ensemble.json
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+import indicators
+from metrics import compute_metrics
+from signals import create_orders, fill_pending, get_signal_kernel, SIGNALS
+from strategies import STRATEGIES
+from trade_ledger import round_trips
+
+
+class SharedIndicators:
+    """
+    Memoizing stand-in for the indicators module
+
+    Calls with the same input arrays and parameters return the cached
+    result. Bollinger Bands are built from the shared sma and stddev, so
+    they also reuse an SMA computed for a moving average member.
+
+    Attributes:
+        hits (int): Calls answered from the cache
+        misses (int): Calls computed
+    """
+
+    def __init__(self):
+        self._memo = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _call(self, name, func, args):
+        # Arrays are keyed by identity and kept alive with the entry
+        key = (name,) + tuple(('array', id(arg)) if isinstance(arg, np.ndarray) else arg for arg in args)
+        entry = self._memo.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        result = func(*args)
+        self._memo[key] = (args, result)
+        return result
+
+    def bollinger(self, close, period=20, devfactor=2.0):
+        """indicators.bollinger on the shared sma and stddev"""
+        mid = self.sma(close, period)
+        dev = devfactor * self.stddev(close, period)
+        return mid, mid + dev, mid - dev
+
+    def __getattr__(self, name):
+        func = getattr(indicators, name)
+        if not callable(func):
+            return func
+        return lambda *args: self._call(name, func, args)
+
+
+def member_name(member):
+    """Display name of an ensemble member, e.g. 'MAStrategy(long_window=20, short_window=5)'"""
+    if member.get('name'):
+        return member['name']
+    params = member.get('strategy_params', {})
+    return f"{member['strategy']}({', '.join(f'{k}={params[k]}' for k in sorted(params))})"
+
+
+class EnsembleEngine:
+    """
+    Evaluates many strategy members over one DataFrame with one pass over the bars
+    """
+
+    def __init__(self, start_cash=100000, periods_per_year=252, feed_cache=None):
+        """
+        Args:
+            start_cash (float): Starting cash of every member's broker
+            periods_per_year (float): Bars per year for annualized metrics
+                (see resampler.periods_per_year)
+            feed_cache (FeedCache): Cache for members that run through
+                Backtrader (a private one is created if omitted)
+        """
+        self.start_cash = start_cash
+        self.periods_per_year = periods_per_year
+        self.feed_cache = feed_cache
+        self.shared = None
+        self.timings = {}
+
+    def run(self, df, members):
+        """
+        Run all members over the same bars
+
+        Args:
+            df (pandas.DataFrame): OHLCV data indexed by date
+            members (list): Dicts with 'strategy', optional 'strategy_params'
+                and optional 'name'
+
+        Returns:
+            list: One dict per member, in order, with 'name', 'strategy',
+            'params', 'engine' ('vectorized' or 'backtrader'), raw
+            'metrics' (see metrics.compute_metrics) and the 'equity' curve
+        """
+        start = time.perf_counter()
+        self.shared = SharedIndicators()
+        close = df['close'].to_numpy(dtype=np.float64)
+        open_ = df['open'].to_numpy(dtype=np.float64)
+
+        results = []
+        kernels = []
+        for member in members:
+            name = member['strategy']
+            if name not in STRATEGIES:
+                raise ValueError(f"Unknown strategy '{name}'. Available: {list(STRATEGIES.keys())}")
+            params = dict(member.get('strategy_params', {}))
+            results.append({'name': member_name(member), 'strategy': name, 'params': params})
+            kernels.append(get_signal_kernel(name, **params) if name in SIGNALS else None)
+
+        vectorized = [i for i, kernel in enumerate(kernels) if kernel is not None]
+        if vectorized:
+            entry = np.zeros((len(vectorized), len(close)), dtype=bool)
+            exit_ = np.zeros_like(entry)
+            for row, i in enumerate(vectorized):
+                kernel = kernels[i]
+                member_entry, member_exit = kernel.signals(close, self.shared)
+                # The strategies' next() starts at their minimum period
+                entry[row, kernel.minperiod:] = member_entry[kernel.minperiod:]
+                exit_[row, kernel.minperiod:] = member_exit[kernel.minperiod:]
+            self.timings['signals'] = time.perf_counter() - start
+
+            broker_start = time.perf_counter()
+            books = self.simulate(entry, exit_, open_, close)
+            for row, i in enumerate(vectorized):
+                results[i].update(engine='vectorized', equity=books['equity'][row],
+                                  metrics=self._metrics(books, row, df.index))
+            self.timings['brokers'] = time.perf_counter() - broker_start
+
+        fallback_start = time.perf_counter()
+        for i, kernel in enumerate(kernels):
+            if kernel is None:
+                results[i].update(self._run_backtrader(df, results[i]))
+        if len(vectorized) < len(kernels):
+            self.timings['backtrader'] = time.perf_counter() - fallback_start
+        self.timings['total'] = time.perf_counter() - start
+        return results
+
+    def simulate(self, entry, exit_, open_, close):
+        """
+        Advance one virtual broker per row over the bars
+
+        Args:
+            entry (numpy.ndarray): (members x bars) entry signals
+            exit_ (numpy.ndarray): (members x bars) exit signals
+            open_ (numpy.ndarray): Open prices per bar
+            close (numpy.ndarray): Close prices per bar
+
+        Returns:
+            dict: 'equity' (members x bars) valued at each close, final
+            'cash' and 'position' per row and the 'fills' as
+            (row, bar, size, price) arrays
+        """
+        rows, bars = entry.shape
+        cash = np.full(rows, float(self.start_cash))
+        position = np.zeros(rows)
+        pending = np.zeros(rows)
+        equity = np.empty((rows, bars))
+        fills = []
+        for t in range(bars):
+            if pending.any():
+                before = position.copy()
+                fill_pending(pending, position, cash, np.full(rows, open_[t]))
+                for row in np.flatnonzero(position != before):
+                    fills.append((row, t, position[row] - before[row], open_[t]))
+            create_orders(entry[:, t], exit_[:, t], np.full(rows, close[t]), pending, position, cash)
+            # A flat broker is worth its cash even when the close is missing
+            equity[:, t] = cash + np.where(position != 0, position * close[t], 0.0)
+        fills = np.array(fills, dtype=[('row', np.int64), ('bar', np.int64),
+                                       ('size', np.float64), ('price', np.float64)])
+        return {'equity': equity, 'cash': cash, 'position': position, 'fills': fills}
+
+    def _metrics(self, books, row, index):
+        fills = books['fills'][books['fills']['row'] == row]
+        trades = round_trips({'date': index.values[fills['bar']], 'size': fills['size'],
+                              'price': fills['price'], 'bar': fills['bar']})
+        bars = books['equity'].shape[1]
+        bars_in_market = int(trades['barlen'].sum())
+        open_trades = 0
+        if books['position'][row] != 0:
+            # Open since the last fill that left the position flat
+            open_trades = 1
+            bars_in_market += bars - 1 - int(fills['bar'][-1])
+        return compute_metrics(
+            books['equity'][row],
+            start_value=self.start_cash,
+            trades=np.column_stack([trades['pnl'], trades['pnlcomm'], trades['barlen']]),
+            open_trades=open_trades,
+            traded_value=float(np.sum(np.abs(fills['size']) * fills['price'])),
+            bars_in_market=bars_in_market,
+            periods_per_year=self.periods_per_year,
+        )
+
+    def _run_backtrader(self, df, result):
+        from backtest import BacktestEngine
+        from feed_cache import FeedCache
+
+        if self.feed_cache is None:
+            self.feed_cache = FeedCache()
+        engine = BacktestEngine(start_cash=self.start_cash, use_analyzers=False,
+                                feed_cache=self.feed_cache, periods_per_year=self.periods_per_year)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, results = engine.run_backtest(STRATEGIES[result['strategy']], df, **result['params'])
+        strat = results[0]
+        raw = engine.compute_run_metrics(strat, len(df))
+        warmup = len(df) - len(strat.portfolio_values)
+        equity = np.concatenate((np.full(warmup, float(self.start_cash)), strat.portfolio_values))
+        return {'engine': 'backtrader', 'equity': equity, 'metrics': raw}
+
+
+def print_ensemble(results, timings=None):
+    """Table of member results ranked by total return"""
+    def fmt(metrics, key, pct=False):
+        value = metrics.get(key)
+        if value is None:
+            return 'N/A'
+        return f"{value * 100:.2f}%" if pct else f"{value:.2f}"
+
+    width = max([len(row['name']) for row in results] + [6])
+    print("\n" + "=" * (width + 52))
+    print(f"{'Member':<{width}} {'Total Return':>13} {'Sharpe':>8} {'Max DD':>8} {'Trades':>7} {'Engine':>11}")
+    # Members without a total return go last; 0.0 is a valid return
+    ranked = sorted(results, key=lambda row: (row['metrics'].get('total_return') is None,
+                                              -(row['metrics'].get('total_return') or 0.0)))
+    for row in ranked:
+        metrics = row['metrics']
+        print(f"{row['name']:<{width}} {fmt(metrics, 'total_return', True):>13} "
+              f"{fmt(metrics, 'sharpe_ratio'):>8} {fmt(metrics, 'max_drawdown', True):>8} "
+              f"{metrics.get('total_trades', 0):>7} {row['engine']:>11}")
+    print("=" * (width + 52))
+    if timings:
+        print(f"[INFO] {len(results)} members in {timings['total']:.3f}s "
+              f"({', '.join(f'{k} {v:.3f}s' for k, v in timings.items() if k != 'total')})")
+
+
+def main():
+    from backtest import load_config
+    from resampler import base_path, load_bars, periods_per_year
+
+    parser = argparse.ArgumentParser(description="Run several strategies over one symbol in one pass")
+    parser.add_argument("config", help="Configuration with an 'ensemble' list of members")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if config is None:
+        return
+    if not config.get('ensemble'):
+        print(f"[ERROR] {args.config} has no 'ensemble' list")
+        return
+    path = base_path(config)
+    frequency = config.get('data_frequency', 'd')
+    df = load_bars(path, frequency)
+    if df is None or df.empty:
+        print(f"[ERROR] No data in {path} (run backtest.py once to download it)")
+        return
+    engine = EnsembleEngine(start_cash=config.get('initial_cash', 100000),
+                            periods_per_year=periods_per_year(frequency))
+    results = engine.run(df, config['ensemble'])
+    print_ensemble(results, engine.timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DataFetcher
+from signals import get_signal_kernel, replay_positions, fill_pending, create_orders
+
+
+class EODPipeline:
+    """
+    End-of-day signal pipeline over a universe of (symbol, strategy) pairs
+
+    Indicator and position state is kept per strategy in .npz files under
+    state_dir. A daily run loads the state, fills yesterday's orders at
+    today's open, appends today's bar, evaluates the strategies and emits
+    the orders for the next session, without replaying any history.
+    """
+
+    def __init__(self, strategy_configs, state_dir="state/eod", fetcher=None):
+        """
+        Args:
+            strategy_configs (list): Config dicts in the configs/*.json format
+                (only 'strategy', 'strategy_params' and 'initial_cash' are used)
+            state_dir (str): Directory holding the saved state
+            fetcher (DataFetcher): Fetcher used to load history and bars
+        """
+        self.strategy_configs = strategy_configs
+        self.state_dir = state_dir
+        self.fetcher = fetcher or DataFetcher()
+        self.timings = {}
+
+    @staticmethod
+    def state_key(config):
+        """
+        File-safe key for a strategy and its parameters
+
+        Args:
+            config (dict): Strategy config
+
+        Returns:
+            str: Key such as 'RSIStrategy_overbought=70_oversold=30_rsi_period=14'
+        """
+        params = config.get('strategy_params', {})
+        parts = [config['strategy']] + [f"{k}={params[k]}" for k in sorted(params)]
+        return "_".join(parts)
+
+    def _state_path(self, config):
+        return os.path.join(self.state_dir, f"{self.state_key(config)}.npz")
+
+    def _stage(self, name, start):
+        self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+        return time.perf_counter()
+
+    def bootstrap(self, history):
+        """
+        Build and save the state of every strategy from price history
+
+        Args:
+            history (dict): Stock code -> DataFrame with open and close
+                columns indexed by date, as returned by load_data_from_csv
+
+        Returns:
+            int: Number of symbols in the saved state
+        """
+        self.timings = {}
+        t = time.perf_counter()
+        codes, last_dates, open_, close, lengths = build_panel(history)
+        t = self._stage('build_panel', t)
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        for config in self.strategy_configs:
+            kernel = get_signal_kernel(config['strategy'], **config.get('strategy_params', {}))
+            if kernel is None:
+                continue
+            entry, exit_ = kernel.signals(close)
+            replay = replay_positions(entry, exit_, open_, close,
+                                      config.get('initial_cash', 100000),
+                                      start=kernel.minperiod)
+            state = kernel.init_state(close, lengths)
+            t = self._stage('replay', t)
+            self._save_state(config, codes, last_dates, replay, state)
+            t = self._stage('save_state', t)
+        print(f"[INFO] Bootstrapped {len(codes)} symbols x {len(self.strategy_configs)} strategies")
+        return len(codes)
+
+    def bootstrap_from_csv(self, paths):
+        """
+        Bootstrap from CSV files written by DataFetcher.save_data
+
+        Args:
+            paths (list): CSV file paths, one symbol per file
+
+        Returns:
+            int: Number of symbols in the saved state
+        """
+        history = {}
+        for path in paths:
+            df = self.fetcher.load_data_from_csv(path)
+            if df is None or df.empty:
+                continue
+            code = df['code'].iloc[0] if 'code' in df.columns else os.path.basename(path).split('_')[0]
+            history[code] = df
+        return self.bootstrap(history)
+
+    def run(self, bars):
+        """
+        Run the end-of-day step for one trading day
+
+        Only the symbols of the saved state are evaluated; codes in bars
+        without state are reported and ignored until bootstrap is rerun
+        with their history.
+
+        Args:
+            bars (pandas.DataFrame): One row per symbol with 'date', 'code',
+                'open' and 'close' columns
+
+        Returns:
+            pandas.DataFrame: Orders for the next session with date, code,
+            strategy, side, size and reference price columns
+        """
+        self.timings = {}
+        t = time.perf_counter()
+        bars = bars.drop_duplicates('code', keep='last').set_index('code')
+        bar_date = str(pd.to_datetime(bars['date']).max().date()) if 'date' in bars.columns else None
+        t = self._stage('prepare_bars', t)
+
+        aligned = {}
+        orders = []
+        for config in self.strategy_configs:
+            kernel = get_signal_kernel(config['strategy'], **config.get('strategy_params', {}))
+            if kernel is None:
+                continue
+            saved = self._load_state(config)
+            t = self._stage('load_state', t)
+            if saved is None:
+                continue
+            codes = saved['codes']
+            if bar_date is not None and bar_date <= str(saved['last_date']):
+                print(f"[WARNING] {self.state_key(config)} already processed {saved['last_date']}, skipping.")
+                continue
+
+            key = codes.tobytes()
+            if key not in aligned:
+                # Symbols are fixed at bootstrap; new ones need a new bootstrap
+                unknown = bars.index.difference(codes)
+                if len(unknown):
+                    print(f"[WARNING] {len(unknown)} codes have no saved state and are ignored "
+                          f"(rerun bootstrap to add them): {', '.join(map(str, unknown))}")
+                today = bars.reindex(codes)
+                aligned[key] = (
+                    pd.to_numeric(today['open'], errors='coerce').to_numpy(np.float64),
+                    pd.to_numeric(today['close'], errors='coerce').to_numpy(np.float64),
+                )
+            open_today, close_today = aligned[key]
+            mask = ~np.isnan(close_today)
+            t = self._stage('align_bars', t)
+
+            cash, position, pending = saved['cash'], saved['position'], saved['pending']
+            fill_pending(pending, position, cash, open_today)
+            t = self._stage('fill_orders', t)
+
+            entry, exit_ = kernel.update(saved['state'], close_today, mask)
+            t = self._stage('update_signals', t)
+
+            create_orders(entry & mask, exit_ & mask, close_today, pending, position, cash)
+            new = np.flatnonzero(mask & (pending != 0))
+            orders.append(pd.DataFrame({
+                'date': bar_date,
+                'code': codes[new],
+                'strategy': self.state_key(config),
+                'side': np.where(pending[new] > 0, 'BUY', 'SELL'),
+                'size': np.abs(pending[new]).astype(np.int64),
+                'price': close_today[new],
+            }))
+            t = self._stage('emit_orders', t)
+
+            replay = {'cash': cash, 'position': position, 'pending': pending}
+            self._save_state(config, codes, bar_date or saved['last_date'], replay, saved['state'])
+            t = self._stage('save_state', t)
+
+        orders = pd.concat(orders, ignore_index=True) if orders else pd.DataFrame(
+            columns=['date', 'code', 'strategy', 'side', 'size', 'price'])
+        print(f"[INFO] {len(orders)} orders emitted for {bar_date}")
+        return orders
+
+    def load_daily_bars(self, codes, date):
+        """
+        Download one day's bars for a list of symbols through DataFetcher
+
+        Args:
+            codes (list): Stock codes (e.g. ['sh.600600'])
+            date (str): Trading date in YYYY-MM-DD format
+
+        Returns:
+            pandas.DataFrame: Bars with date, code, open, high, low, close and volume
+        """
+        frames = []
+        for code in codes:
+            df = self.fetcher.fetch_data(code, date, date)
+            if df is not None:
+                frames.append(df)
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def report_timings(self):
+        """Print the time spent in each stage of the last run"""
+        total = sum(self.timings.values())
+        print("\n" + "="*50)
+        print("EOD PIPELINE STAGE TIMINGS")
+        print("="*50)
+        for name, seconds in self.timings.items():
+            print(f"{name:<16} {seconds * 1000:10.2f} ms")
+        print(f"{'total':<16} {total * 1000:10.2f} ms")
+        print("="*50)
+
+    def _save_state(self, config, codes, last_date, replay, state):
+        arrays = {f"state_{name}": value for name, value in state.items()}
+        np.savez(
+            self._state_path(config),
+            codes=codes,
+            last_date=np.array(str(last_date)),
+            cash=replay['cash'],
+            position=replay['position'],
+            pending=replay['pending'],
+            **arrays,
+        )
+
+    def _load_state(self, config):
+        path = self._state_path(config)
+        if not os.path.exists(path):
+            print(f"[ERROR] No saved state at {path}. Run bootstrap first.")
+            return None
+        with np.load(path) as data:
+            return {
+                'codes': data['codes'],
+                'last_date': str(data['last_date']),
+                'cash': data['cash'].copy(),
+                'position': data['position'].copy(),
+                'pending': data['pending'].copy(),
+                'state': {name[len('state_'):]: data[name].copy()
+                          for name in data.files if name.startswith('state_')},
+            }
+
+
+def build_panel(history):
+    """
+    Stack per-symbol histories into left-aligned (symbols x bars) matrices
+
+    Each row holds one symbol's own bars from column 0, padded with NaN at
+    the end, so indicators see the same sequence as a single-symbol run.
+
+    Args:
+        history (dict): Stock code -> DataFrame with open and close columns
+
+    Returns:
+        tuple: (codes, last_date, open, close, lengths)
+    """
+    codes = np.array(sorted(history), dtype=str)
+    lengths = np.array([len(history[code]) for code in codes], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    open_ = np.full((len(codes), width), np.nan)
+    close = np.full((len(codes), width), np.nan)
+    last_date = None
+    for row, code in enumerate(codes):
+        df = history[code]
+        open_[row, :lengths[row]] = df['open'].to_numpy(np.float64)
+        close[row, :lengths[row]] = df['close'].to_numpy(np.float64)
+        if len(df):
+            end = pd.Timestamp(df.index.max())
+            last_date = end if last_date is None else max(last_date, end)
+    last_date = str(last_date.date()) if last_date is not None else ''
+    return codes, last_date, open_, close, lengths
+
+
+def _load_configs(paths):
+    configs = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            configs.append(json.load(f))
+    return configs
+
+
+def main():
+    """
+    Command line entry point
+
+    Examples:
+        python eod_pipeline.py bootstrap --configs configs/*.json --history data/600600_*.csv
+        python eod_pipeline.py run --configs configs/*.json --bars bars_2025-08-01.csv
+    """
+    parser = argparse.ArgumentParser(description="End-of-day signal pipeline")
+    parser.add_argument('command', choices=['bootstrap', 'run'])
+    parser.add_argument('--configs', nargs='+', default=sorted(glob.glob("configs/*.json")))
+    parser.add_argument('--state-dir', default="state/eod")
+    parser.add_argument('--history', nargs='*', default=[], help="CSV files for bootstrap")
+    parser.add_argument('--bars', help="CSV with one bar per symbol for the day")
+    parser.add_argument('--codes', nargs='*', help="Download today's bars for these codes")
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--orders', help="Output CSV for the emitted orders")
+    args = parser.parse_args()
+
+    pipeline = EODPipeline(_load_configs(args.configs), state_dir=args.state_dir)
+    if args.command == 'bootstrap':
+        pipeline.bootstrap_from_csv(args.history)
+    else:
+        if args.bars:
+            bars = pd.read_csv(args.bars)
+        else:
+            bars = pipeline.load_daily_bars(args.codes or [], args.date)
+            pipeline.fetcher.logout()
+        if bars is None or bars.empty:
+            print("[ERROR] No bars available for the EOD run.")
+            return
+        orders = pipeline.run(bars)
+        orders_path = args.orders or os.path.join(args.state_dir, f"orders_{args.date}.csv")
+        orders.to_csv(orders_path, index=False)
+        print(f"[INFO] Orders saved to {orders_path}")
+    pipeline.report_timings()
+
+
+if __name__ == "__main__":
+    main()
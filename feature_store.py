@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Persistent per-symbol feature store
+
+A batch job computes a fixed set of daily features for every symbol once and
+keeps them in one Parquet file per symbol under the store root; new bars are
+appended incrementally. Strategies, screeners and research queries then read
+features by name instead of recomputing indicators:
+
+- close, volume, ret_1 (simple daily return)
+- sma_5/10/20/30/60 and ema_12/26 (Backtrader SMA/EMA definitions)
+- rsi_14 (Wilder), bb_mid_20/bb_top_20/bb_bot_20 (2 standard deviations)
+- volatility_20 (annualized standard deviation of daily returns)
+- turnover_z_20 (z-score of close * volume against its 20-day mean)
+
+An update only computes the new rows. Windowed features use the last
+LOOKBACK stored rows; EMA and RSI continue their recursion from the stored
+values (the RSI's smoothed up/down moves are kept in hidden '_' columns),
+so an updated file equals a full rebuild. Missing closes (NaN) are skipped by
+the recursions, which carry their last value over the gap.
+
+Files hold each symbol's own bars. The trading calendar (the union of all
+stored dates) is kept next to them, and reads align to it, so suspended
+days show up as NaN rows.
+
+Usage:
+    python feature_store.py build data --workers 4
+    python feature_store.py update --bars bars_today.csv
+    python feature_store.py show rsi_14 --start 2025-01-01
+"""
+import argparse
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import indicators
+
+SMA_WINDOWS = (5, 10, 20, 30, 60)
+EMA_WINDOWS = (12, 26)
+RSI_PERIOD = 14
+BB_PERIOD = 20
+BB_DEV = 2.0
+VOLATILITY_WINDOW = 20
+ZSCORE_WINDOW = 20
+
+# Stored rows the windowed features of a new bar depend on
+LOOKBACK = max(SMA_WINDOWS + (BB_PERIOD, VOLATILITY_WINDOW + 1, ZSCORE_WINDOW))
+
+FEATURES = (
+    ['close', 'volume', 'ret_1']
+    + [f'sma_{w}' for w in SMA_WINDOWS]
+    + [f'ema_{w}' for w in EMA_WINDOWS]
+    + [f'rsi_{RSI_PERIOD}', f'bb_mid_{BB_PERIOD}', f'bb_top_{BB_PERIOD}', f'bb_bot_{BB_PERIOD}',
+       f'volatility_{VOLATILITY_WINDOW}', f'turnover_z_{ZSCORE_WINDOW}']
+)
+# Recursion state stored with the features
+STATE_COLUMNS = [f'_rsi_{RSI_PERIOD}_up', f'_rsi_{RSI_PERIOD}_down']
+
+
+def compute_features(bars, history=None):
+    """
+    Features of new bars
+
+    Args:
+        bars (pandas.DataFrame): Daily bars with close and volume, in time order
+        history (pandas.DataFrame): Stored feature rows before the bars (at
+            least the last LOOKBACK), None for a full build
+
+    Returns:
+        pandas.DataFrame: FEATURES and STATE_COLUMNS, indexed like bars
+    """
+    new_close = bars['close'].to_numpy(dtype=np.float64)
+    new_volume = bars['volume'].to_numpy(dtype=np.float64)
+    tail = history.iloc[-LOOKBACK:] if history is not None else None
+    k = len(tail) if tail is not None else 0
+    close = np.concatenate((tail['close'].to_numpy(), new_close)) if k else new_close
+    volume = np.concatenate((tail['volume'].to_numpy(), new_volume)) if k else new_volume
+    last = tail.iloc[-1] if k else None
+    # Recursions that are not seeded yet start over on the whole history
+    full_close = np.concatenate((history['close'].to_numpy(), new_close)) if k else new_close
+    n_full = len(full_close) - len(new_close)
+
+    def recursive(column):
+        # State from the last stored row; NaN means the history has fewer
+        # finite closes than the period
+        return last[column] if k and np.isfinite(last[column]) else None
+
+    out = {'close': new_close, 'volume': new_volume}
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1.0
+    out['ret_1'] = returns[k:]
+    for window in SMA_WINDOWS:
+        out[f'sma_{window}'] = indicators.sma(close, window)[k:]
+    for window in EMA_WINDOWS:
+        state = recursive(f'ema_{window}')
+        out[f'ema_{window}'] = (indicators.ema(new_close, window, initial=state, skip_nan=True)
+                                if state is not None
+                                else indicators.ema(full_close, window, skip_nan=True)[n_full:])
+
+    change = np.zeros(full_close.shape)
+    change[1:] = np.diff(full_close)
+    up, down = STATE_COLUMNS
+    averages = {}
+    for column, moves in ((up, np.maximum(change, 0.0)), (down, np.maximum(-change, 0.0))):
+        state = recursive(column)
+        averages[column] = (indicators.smma(moves[n_full:], RSI_PERIOD, initial=state, skip_nan=True)
+                            if state is not None
+                            else indicators.smma(moves, RSI_PERIOD, start=1, skip_nan=True)[n_full:])
+    out[f'rsi_{RSI_PERIOD}'] = indicators.rsi_from_averages(averages[up], averages[down])
+
+    mid, top, bot = indicators.bollinger(close, BB_PERIOD, BB_DEV)
+    out.update({f'bb_mid_{BB_PERIOD}': mid[k:], f'bb_top_{BB_PERIOD}': top[k:], f'bb_bot_{BB_PERIOD}': bot[k:]})
+    out[f'volatility_{VOLATILITY_WINDOW}'] = \
+        indicators.stddev(returns, VOLATILITY_WINDOW)[k:] * np.sqrt(252)
+
+    turnover = close * volume
+    spread = indicators.stddev(turnover, ZSCORE_WINDOW)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscore = np.where(spread > 0, (turnover - indicators.sma(turnover, ZSCORE_WINDOW)) / spread, np.nan)
+    out[f'turnover_z_{ZSCORE_WINDOW}'] = zscore[k:]
+    out.update(averages)
+    return pd.DataFrame(out, index=pd.DatetimeIndex(bars.index, name='date'), columns=FEATURES + STATE_COLUMNS)
+
+
+class FeatureStore:
+    """
+    Parquet feature files per symbol plus the shared trading calendar
+    """
+
+    def __init__(self, root="features"):
+        """
+        Args:
+            root (str): Store directory (created on the first write)
+        """
+        self.root = root
+
+    def path(self, symbol):
+        return os.path.join(self.root, f"{symbol}.parquet")
+
+    def symbols(self):
+        """Symbols with a feature file, sorted"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len('.parquet')] for name in os.listdir(self.root)
+                      if name.endswith('.parquet') and name != 'calendar.parquet')
+
+    @staticmethod
+    def names():
+        """Feature names that can be read"""
+        return list(FEATURES)
+
+    @property
+    def calendar(self):
+        """pandas.DatetimeIndex of every date stored for any symbol"""
+        path = os.path.join(self.root, 'calendar.parquet')
+        if not os.path.exists(path):
+            return pd.DatetimeIndex([], name='date')
+        return pd.DatetimeIndex(pq.read_table(path).column('date').to_numpy(), name='date')
+
+    def merge_calendar(self, dates):
+        """Add trading dates to the calendar"""
+        calendar = self.calendar.append(pd.DatetimeIndex(dates)).unique().sort_values().rename('date')
+        self._write(os.path.join(self.root, 'calendar.parquet'), pd.DataFrame(index=calendar))
+
+    def build(self, symbol, bars, calendar=True):
+        """
+        Compute all features of a symbol from scratch
+
+        Args:
+            symbol (str): Symbol key, e.g. '600600'
+            bars (pandas.DataFrame): Daily bars indexed by date
+            calendar (bool): Add the dates to the calendar (batch jobs merge
+                the calendar once in the parent instead)
+
+        Returns:
+            int: Rows stored
+        """
+        features = compute_features(bars)
+        self._write(self.path(symbol), features)
+        if calendar:
+            self.merge_calendar(features.index)
+        return len(features)
+
+    def update(self, symbol, bars):
+        """
+        Append the features of bars after the last stored date
+
+        Args:
+            symbol (str): Symbol key
+            bars (pandas.DataFrame): Daily bars indexed by date; bars up to
+                the last stored date are ignored
+
+        Returns:
+            int: Rows added
+        """
+        if not os.path.exists(self.path(symbol)):
+            return self.build(symbol, bars)
+        stored = self._read(symbol, None)
+        bars = bars[bars.index > stored.index[-1]]
+        if bars.empty:
+            return 0
+        features = compute_features(bars, stored)
+        self._write(self.path(symbol), pd.concat([stored, features]))
+        self.merge_calendar(features.index)
+        return len(features)
+
+    def update_bars(self, bars):
+        """
+        Update every symbol in a table of new bars
+
+        Args:
+            bars (pandas.DataFrame): Columns date, code ('sh.600600'), close
+                and volume, as EODPipeline.fetch_bars returns them
+
+        Returns:
+            dict: Symbol -> rows added
+        """
+        bars = bars.assign(date=pd.to_datetime(bars['date']))
+        added = {}
+        for code, group in bars.groupby('code', sort=True):
+            group = group.set_index('date').sort_index()
+            for col in ('close', 'volume'):
+                group[col] = pd.to_numeric(group[col], errors='coerce')
+            added[code.split('.')[-1]] = self.update(code.split('.')[-1], group)
+        return added
+
+    def read(self, symbol, names=None, start=None, end=None, align=True):
+        """
+        Read features of one symbol
+
+        Args:
+            symbol (str): Symbol key
+            names (list): Feature names (default: all)
+            start, end (str): Date range, inclusive
+            align (bool): Reindex to the trading calendar from the symbol's
+                first date, with NaN rows for days without a bar
+
+        Returns:
+            pandas.DataFrame: Dates x features
+        """
+        names = self._check(names)
+        df = self._read(symbol, names)
+        if align and len(df):
+            calendar = self.calendar
+            df = df.reindex(calendar[calendar >= df.index[0]])
+        return df.loc[start:end]
+
+    def panel(self, name, symbols=None, start=None, end=None):
+        """
+        One feature across symbols, aligned on the trading calendar
+
+        Args:
+            name (str): Feature name, e.g. 'rsi_14'
+            symbols (list): Symbol keys (default: all stored)
+            start, end (str): Date range, inclusive
+
+        Returns:
+            pandas.DataFrame: Dates x symbols
+        """
+        self._check([name])
+        symbols = symbols or self.symbols()
+        columns = {symbol: self._read(symbol, [name])[name] for symbol in symbols}
+        frame = pd.DataFrame(columns, index=self.calendar, columns=symbols)
+        return frame.loc[start:end]
+
+    def with_features(self, symbol, df, names):
+        """Bars joined with stored features on their dates (e.g. for feature_feed)"""
+        return df.join(self.read(symbol, names, align=False))
+
+    def _check(self, names):
+        names = list(FEATURES) if names is None else list(names)
+        unknown = [name for name in names if name not in FEATURES]
+        if unknown:
+            raise KeyError(f"Unknown features {unknown}. Available: {FEATURES}")
+        return names
+
+    def _read(self, symbol, names):
+        columns = None if names is None else ['date'] + names
+        return pq.read_table(self.path(symbol), columns=columns).to_pandas().set_index('date')
+
+    def _write(self, path, df):
+        os.makedirs(self.root, exist_ok=True)
+        table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+        # Readers never see a half-written file
+        pq.write_table(table, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+
+def feature_feed(df, names):
+    """
+    Backtrader feed with feature columns as extra lines
+
+    Args:
+        df (pandas.DataFrame): Bars with the feature columns (see
+            FeatureStore.with_features)
+        names (list): Feature names; strategies read them as
+            self.data.<name>[0]
+
+    Returns:
+        bt.feeds.PandasData: Feed to pass to cerebro.adddata
+    """
+    import backtrader as bt
+
+    cls = type('FeatureData', (bt.feeds.PandasData,),
+               {'lines': tuple(names), 'params': tuple((name, name) for name in names)})
+    return cls(dataname=df)
+
+
+def _build_partition(partition, root):
+    from resampler import load_bars
+
+    bars = load_bars(partition.path, 'd')
+    if bars is None or bars.empty:
+        return partition.symbol, 0, None
+    rows = FeatureStore(root).build(partition.symbol, bars, calendar=False)
+    return partition.symbol, rows, bars.index.values
+
+
+def build_universe(root="features", data_dir="data", workers=None):
+    """
+    Build the feature files of every symbol with a stored daily CSV
+
+    A symbol with several CSVs uses the one reaching the latest end date
+    (and the earliest start among those).
+
+    Args:
+        root (str): Store directory
+        data_dir (str): Directory with CSVs saved by DataFetcher.save_data
+        workers (int): Worker processes (default: CPU count)
+
+    Returns:
+        dict: Symbol -> rows stored
+    """
+    from chunked import csv_partitions, map_partitions
+
+    latest = {}
+    for partition in csv_partitions(data_dir, 'd'):
+        _, start, end = partition.key.split('_')
+        best = latest.get(partition.symbol)
+        if best is None or end > best[2] or (end == best[2] and start < best[1]):
+            latest[partition.symbol] = (partition, start, end)
+    store = FeatureStore(root)
+    rows = {}
+    dates = []
+    for _, (symbol, count, index) in map_partitions(functools.partial(_build_partition, root=root),
+                                                    [entry[0] for entry in latest.values()], workers):
+        rows[symbol] = count
+        if index is not None:
+            dates.append(index)
+    if dates:
+        store.merge_calendar(np.concatenate(dates))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, update and query the feature store")
+    parser.add_argument("--root", default="features", help="Store directory (default: features)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Compute features for every stored daily CSV")
+    build.add_argument("data_dir", nargs="?", default="data")
+    build.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    update = commands.add_parser("update", help="Append features of new bars")
+    update.add_argument("--bars", required=True, help="CSV with date, code, close and volume columns")
+    show = commands.add_parser("show", help="Print one feature across symbols")
+    show.add_argument("feature", help=f"One of: {', '.join(FEATURES)}")
+    show.add_argument("--start", default=None)
+    show.add_argument("--end", default=None)
+    args = parser.parse_args()
+
+    store = FeatureStore(args.root)
+    if args.command == "build":
+        rows = build_universe(args.root, args.data_dir, args.workers)
+        print(f"[INFO] Built features for {len(rows)} symbols ({sum(rows.values())} rows) in {args.root}")
+    elif args.command == "update":
+        added = store.update_bars(pd.read_csv(args.bars))
+        print(f"[INFO] Added {sum(added.values())} rows for {len(added)} symbols")
+    else:
+        if not store.symbols():
+            print(f"[ERROR] No feature files in {args.root} (run the build command first)")
+            return
+        print(store.panel(args.feature, start=args.start, end=args.end).dropna(how='all').tail(20))
+
+
+if __name__ == "__main__":
+    main()
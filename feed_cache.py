@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Reusable preloaded Backtrader feeds
+
+bt.feeds.PandasData preloads a DataFrame bar by bar through iloc, and every
+Cerebro run repeats that conversion for the same data. FeedCache keeps the
+preloaded line buffers (one array.array('d') per line) of each DataFrame and
+hands out CachedFeed instances that fill their lines with a C-level array
+copy instead, so parameter sweeps on one symbol and range pay the
+conversion once. Every feed gets its own copy of the buffers, so runs cannot
+see each other's state.
+
+Feeds with filters (resampling, replay) and runs without preloading fall
+back to the regular bar-by-bar load.
+
+Usage:
+    cache = FeedCache()
+    for params in grid:
+        cerebro = bt.Cerebro()
+        cerebro.adddata(cache.feed(df, key=('sh.600600', start, end)))
+"""
+import array
+import collections
+import weakref
+
+import backtrader as bt
+
+
+class CachedFeed(bt.feeds.PandasData):
+    """PandasData that takes its preloaded lines from a FeedCache entry"""
+
+    params = (('cache_entry', None),)
+
+    def preload(self):
+        entry = self.p.cache_entry
+        if entry is None or self._filters or self._ffilters:
+            return super().preload()
+        if entry.buffers is None:
+            # First feed of this data: load it the regular way and keep the buffers
+            entry.cache.misses += 1
+            starts = [len(line.array) for line in self.lines]
+            super().preload()
+            entry.buffers = [array.array('d', line.array[start:]) for line, start in zip(self.lines, starts)]
+            return
+        entry.cache.hits += 1
+        for line, buffer in zip(self.lines, entry.buffers):
+            line.array.extend(buffer)
+        self.home()
+
+
+class _Entry:
+    __slots__ = ('cache', 'ref', 'buffers')
+
+    def __init__(self, cache, ref):
+        self.cache = cache
+        self.ref = ref
+        self.buffers = None
+
+
+class FeedCache:
+    """
+    LRU cache of preloaded line buffers per DataFrame
+
+    Args:
+        max_entries (int): DataFrames kept at most
+
+    Attributes:
+        hits (int): Feeds preloaded from cached buffers
+        misses (int): Feeds preloaded bar by bar
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def feed(self, df, key=None, **kwargs):
+        """
+        A new data feed for a DataFrame
+
+        Args:
+            df (pandas.DataFrame): OHLCV data indexed by date
+            key (hashable): Identity of the data, e.g. (stock_code, start, end);
+                by default the DataFrame object itself (entries of collected
+                DataFrames are dropped)
+            **kwargs: PandasData parameters (part of the cache key)
+
+        Returns:
+            CachedFeed: Feed to pass to cerebro.adddata
+        """
+        cache_key = (key if key is not None else ('id', id(df)), tuple(sorted(kwargs.items())))
+        entry = self._entries.get(cache_key)
+        if entry is not None and key is None and entry.ref() is not df:
+            entry = None
+        if entry is None:
+            entry = _Entry(self, weakref.ref(df))
+            self._entries[cache_key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(cache_key)
+        return CachedFeed(dataname=df, cache_entry=entry, **kwargs)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
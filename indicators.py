@@ -0,0 +1,242 @@
+"""
+Array implementations of the indicators used by the strategies in strategies.py
+
+Every function works along the last axis, so a 1-D price series and a
+(symbols x bars) matrix are handled the same way. Values follow the
+Backtrader definitions (SMA, Wilder-smoothed RSI, population standard
+deviation for Bollinger Bands, CrossOver on the last non-zero difference)
+and are NaN until the indicator has enough bars.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_float_array(x):
+    return np.asarray(x, dtype=np.float64)
+
+
+def sma(x, period):
+    """
+    Simple moving average
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        period (int): Window length
+
+    Returns:
+        numpy.ndarray: Moving average, NaN for the first period-1 bars
+    """
+    x = _as_float_array(x)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= period:
+        out[..., period - 1:] = sliding_window_view(x, period, axis=-1).mean(axis=-1)
+    return out
+
+
+def stddev(x, period):
+    """
+    Population standard deviation over a moving window (Backtrader StdDev)
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        period (int): Window length
+
+    Returns:
+        numpy.ndarray: Standard deviation, NaN for the first period-1 bars
+    """
+    x = _as_float_array(x)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= period:
+        windows = sliding_window_view(x, period, axis=-1)
+        mean = windows.mean(axis=-1)
+        meansq = (windows * windows).mean(axis=-1)
+        out[..., period - 1:] = np.sqrt(np.maximum(meansq - mean * mean, 0.0))
+    return out
+
+
+def _smooth(x, period, alpha, start=0, initial=None, skip_nan=False):
+    x = _as_float_array(x)
+    if skip_nan and np.isnan(x[..., start:]).any():
+        return _smooth_gaps(x, period, alpha, start, initial)
+    out = np.full(x.shape, np.nan)
+    if initial is None:
+        seed = start + period - 1
+        if x.shape[-1] <= seed:
+            return out
+        value = x[..., start:seed + 1].mean(axis=-1)
+        out[..., seed] = value
+        first = seed + 1
+    else:
+        value = np.asarray(initial, dtype=np.float64)
+        first = start
+    alpha1 = 1.0 - alpha
+    for i in range(first, x.shape[-1]):
+        value = value * alpha1 + x[..., i] * alpha
+        out[..., i] = value
+    return out
+
+
+def _smooth_gaps(x, period, alpha, start, initial):
+    # NaN inputs are skipped: the seed is the mean of the first period finite
+    # values and the state carries over a gap unchanged, so a smoothing
+    # continued from a stored state equals one over the whole series
+    out = np.full(x.shape, np.nan)
+    shape = x.shape[:-1]
+    if initial is None:
+        value = np.full(shape, np.nan)
+        total = np.zeros(shape)
+        count = np.zeros(shape, dtype=np.int64)
+    else:
+        value = np.broadcast_to(np.asarray(initial, dtype=np.float64), shape).copy()
+        total = None
+        count = np.full(shape, period)
+    alpha1 = 1.0 - alpha
+    for i in range(start, x.shape[-1]):
+        xi = x[..., i]
+        valid = ~np.isnan(xi)
+        seeded = count >= period
+        value = np.where(seeded & valid, value * alpha1 + xi * alpha, value)
+        if total is not None:
+            seeding = ~seeded & valid
+            total = total + np.where(seeding, xi, 0.0)
+            count = count + seeding
+            value = np.where(seeding & (count == period), total / period, value)
+        out[..., i] = np.where(count >= period, value, np.nan)
+    return out
+
+
+def smma(x, period, start=0, initial=None, skip_nan=False):
+    """
+    Wilder's smoothed moving average, seeded with the SMA of the first period values
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        period (int): Smoothing period (alpha = 1 / period)
+        start (int): Index of the first valid input value
+        initial (float or numpy.ndarray): Last smoothed value of earlier
+            data; the recursion continues from it instead of seeding
+        skip_nan (bool): Skip NaN inputs and carry the last value over
+            them; by default a NaN propagates as in Backtrader
+
+    Returns:
+        numpy.ndarray: Smoothed average, NaN before start + period - 1
+    """
+    return _smooth(x, period, 1.0 / period, start, initial, skip_nan)
+
+
+def ema(x, period, start=0, initial=None, skip_nan=False):
+    """
+    Exponential moving average (Backtrader EMA, alpha = 2 / (period + 1))
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        period (int): EMA period
+        start (int): Index of the first valid input value
+        initial (float or numpy.ndarray): Last EMA value of earlier data;
+            the recursion continues from it instead of seeding
+        skip_nan (bool): Skip NaN inputs and carry the last value over
+            them; by default a NaN propagates as in Backtrader
+
+    Returns:
+        numpy.ndarray: Moving average, seeded with the SMA of the first
+        period values and NaN before that
+    """
+    return _smooth(x, period, 2.0 / (period + 1), start, initial, skip_nan)
+
+
+def rsi_from_averages(avg_up, avg_down):
+    """
+    RSI value from smoothed up/down moves, using Backtrader's safediv values
+
+    Args:
+        avg_up (numpy.ndarray): Smoothed upward moves
+        avg_down (numpy.ndarray): Smoothed downward moves
+
+    Returns:
+        numpy.ndarray: RSI in the 0-100 range
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+    value = np.where(avg_down == 0.0, np.where(avg_up == 0.0, 50.0, 100.0), value)
+    return np.where(np.isnan(avg_up) | np.isnan(avg_down), np.nan, value)
+
+
+def rsi(close, period=14):
+    """
+    Relative Strength Index with Wilder smoothing
+
+    Args:
+        close (array-like): Close prices, time on the last axis
+        period (int): RSI period
+
+    Returns:
+        tuple: (rsi, avg_up, avg_down) arrays, the averages are kept so
+        callers can continue the recursion bar by bar
+    """
+    close = _as_float_array(close)
+    change = np.zeros(close.shape)
+    change[..., 1:] = np.diff(close, axis=-1)
+    avg_up = smma(np.maximum(change, 0.0), period, start=1)
+    avg_down = smma(np.maximum(-change, 0.0), period, start=1)
+    return rsi_from_averages(avg_up, avg_down), avg_up, avg_down
+
+
+def bollinger(close, period=20, devfactor=2.0):
+    """
+    Bollinger Bands
+
+    Args:
+        close (array-like): Close prices, time on the last axis
+        period (int): Moving average period
+        devfactor (float): Standard deviation multiplier
+
+    Returns:
+        tuple: (mid, top, bot) arrays
+    """
+    mid = sma(close, period)
+    dev = devfactor * stddev(close, period)
+    return mid, mid + dev, mid - dev
+
+
+def nonzero_difference(a, b):
+    """
+    Difference a - b carrying the last non-zero value forward (Backtrader NZD)
+
+    Args:
+        a (array-like): First series
+        b (array-like): Second series
+
+    Returns:
+        numpy.ndarray: Last non-zero difference, NaN while a or b is NaN
+    """
+    diff = _as_float_array(a) - _as_float_array(b)
+    n = diff.shape[-1]
+    idx = np.where((diff != 0.0) & ~np.isnan(diff), np.arange(n), -1)
+    # The first valid bar seeds the series even when the difference is zero
+    first_valid = np.argmax(~np.isnan(diff), axis=-1)
+    seed = np.arange(n) == np.expand_dims(first_valid, -1)
+    idx = np.where(seed, np.arange(n), idx)
+    idx = np.maximum.accumulate(idx, axis=-1)
+    out = np.take_along_axis(diff, np.maximum(idx, 0), axis=-1)
+    return np.where((idx < 0) | np.isnan(diff), np.nan, out)
+
+
+def crossover(a, b):
+    """
+    Crossover signal: +1 when a crosses above b, -1 when it crosses below
+
+    Args:
+        a (array-like): Fast series
+        b (array-like): Slow series
+
+    Returns:
+        numpy.ndarray: Signal array of -1, 0 and +1
+    """
+    a = _as_float_array(a)
+    b = _as_float_array(b)
+    nzd = nonzero_difference(a, b)
+    before = np.full(nzd.shape, np.nan)
+    before[..., 1:] = nzd[..., :-1]
+    up = (before < 0.0) & (a > b)
+    down = (before > 0.0) & (a < b)
+    return up.astype(np.int8) - down.astype(np.int8)
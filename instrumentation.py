@@ -0,0 +1,263 @@
+"""
+Per-phase timing and resource instrumentation for backtest runs
+
+An Instrumentation object collects, for one run:
+
+- wall and CPU time of each phase (phases nest: 'backtest/run' is the run
+  phase inside the backtest phase)
+- optionally tracemalloc peaks per phase and the top allocation sites
+- peak RSS of the process
+- counters such as bars processed and orders placed, and gauges such as
+  bars per second
+
+The record is written as JSON and as a Prometheus textfile (for the
+node_exporter textfile collector), so dashboards can follow throughput and
+spot regressions across runs.
+"""
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+
+class PhaseTimer:
+    """Timing of one phase execution; seconds is set when the phase ends"""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = None
+        self.cpu_seconds = None
+        self.memory_peak = 0
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process
+
+    Returns:
+        int: Bytes, or None where the resource module is unavailable (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+
+class Instrumentation:
+    """
+    Phase timers, counters and memory figures of one run
+    """
+
+    def __init__(self, trace_memory=False, labels=None, top_allocations=10):
+        """
+        Args:
+            trace_memory (bool): Trace Python allocations with tracemalloc
+                (slows the run down noticeably)
+            labels (dict): Run description (strategy, stock_code, ...) added
+                to the JSON record and to every Prometheus sample
+            top_allocations (int): Allocation sites kept from the final snapshot
+        """
+        self.labels = dict(labels or {})
+        self.top_allocations = top_allocations
+        self.phases = {}
+        self.counters = {}
+        self.gauges = {}
+        self._stack = []
+        self._started_tracing = False
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.started_at = time.time()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Time a block of code
+
+        Repeated phases with the same path accumulate their times and calls.
+
+        Args:
+            name (str): Phase name; nested phases are recorded as 'outer/inner'
+
+        Yields:
+            PhaseTimer: Holds this execution's seconds after the block
+        """
+        if self.trace_memory:
+            self._close_memory_window()
+        timer = PhaseTimer('/'.join([t.name for t in self._stack] + [name]))
+        self._stack.append(timer)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield timer
+        finally:
+            timer.seconds = time.perf_counter() - start_wall
+            timer.cpu_seconds = time.process_time() - start_cpu
+            if self.trace_memory:
+                self._close_memory_window()
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].memory_peak = max(self._stack[-1].memory_peak, timer.memory_peak)
+            entry = self.phases.setdefault(timer.name, {'seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+            entry['seconds'] += timer.seconds
+            entry['cpu_seconds'] += timer.cpu_seconds
+            entry['calls'] += 1
+            if self.trace_memory:
+                entry['tracemalloc_peak_bytes'] = max(entry.get('tracemalloc_peak_bytes', 0),
+                                                      timer.memory_peak)
+
+    def _close_memory_window(self):
+        """Credit the traced peak since the last reset to the innermost phase"""
+        if not tracemalloc.is_tracing():
+            return
+        if self._stack:
+            self._stack[-1].memory_peak = max(self._stack[-1].memory_peak,
+                                              tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    def count(self, name, n=1):
+        """Add n to a counter (e.g. 'bars', 'orders')"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        """Set a gauge (e.g. 'bars_per_second')"""
+        self.gauges[name] = value
+
+    def record(self):
+        """
+        Returns:
+            dict: labels, timestamp, phases, counters, gauges, peak_rss_bytes
+            and, with trace_memory, a tracemalloc section with the traced peak
+            and the top allocation sites
+        """
+        record = {
+            'labels': self.labels,
+            'timestamp': datetime.datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'total_seconds': time.time() - self.started_at,
+            'phases': self.phases,
+            'counters': self.counters,
+            'gauges': self.gauges,
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            record['tracemalloc'] = {
+                'current_bytes': tracemalloc.get_traced_memory()[0],
+                'peak_bytes': max((p.get('tracemalloc_peak_bytes', 0) for p in self.phases.values()),
+                                  default=0),
+                'top': [{
+                    'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_bytes': stat.size,
+                    'count': stat.count,
+                } for stat in snapshot.statistics('lineno')[:self.top_allocations]],
+            }
+        return record
+
+    def summary(self):
+        """One-line summary of the top-level phases and peak RSS"""
+        parts = [f"{name} {entry['seconds']:.3f}s" for name, entry in self.phases.items() if '/' not in name]
+        rss = peak_rss_bytes()
+        if rss is not None:
+            parts.append(f"peak RSS {rss / 2**20:.0f} MB")
+        return ", ".join(parts)
+
+    def write_json(self, path):
+        """
+        Write the record as JSON
+
+        Args:
+            path (str): Output file (parent directories are created)
+
+        Returns:
+            str: The written path
+        """
+        return _write_atomic(path, json.dumps(self.record(), indent=2, default=str))
+
+    def write_prometheus(self, path, prefix='backtest'):
+        """
+        Write the record in the Prometheus text exposition format
+
+        The file is replaced atomically, as the node_exporter textfile
+        collector expects.
+
+        Args:
+            path (str): Output .prom file
+            prefix (str): Metric name prefix
+
+        Returns:
+            str: The written path
+        """
+        return _write_atomic(path, prometheus_text(self.record(), prefix=prefix))
+
+    def stop(self):
+        """Stop tracemalloc if this object started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def prometheus_text(record, prefix='backtest'):
+    """
+    Format an instrumentation record as Prometheus samples
+
+    Args:
+        record (dict): Output of Instrumentation.record()
+        prefix (str): Metric name prefix
+
+    Returns:
+        str: Text exposition format with HELP/TYPE lines
+    """
+    labels = record.get('labels', {})
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        samples = [(extra, value) for extra, value in samples if value is not None]
+        if not samples:
+            return
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for extra, value in samples:
+            lines.append(f"{prefix}_{name}{_labels(dict(labels, **extra))} {float(value):.10g}")
+
+    phases = record.get('phases', {})
+    metric('phase_seconds', 'gauge', 'Wall time of each run phase.',
+           [({'phase': name}, entry['seconds']) for name, entry in phases.items()])
+    metric('phase_cpu_seconds', 'gauge', 'CPU time of each run phase.',
+           [({'phase': name}, entry['cpu_seconds']) for name, entry in phases.items()])
+    metric('phase_tracemalloc_peak_bytes', 'gauge', 'Peak traced Python allocations of each phase.',
+           [({'phase': name}, entry.get('tracemalloc_peak_bytes')) for name, entry in phases.items()])
+    for name, value in sorted(record.get('counters', {}).items()):
+        metric(f"{name}_total", 'counter', f"Number of {name.replace('_', ' ')} in the run.", [({}, value)])
+    for name, value in sorted(record.get('gauges', {}).items()):
+        metric(name, 'gauge', f"{name.replace('_', ' ').capitalize()} of the run.", [({}, value)])
+    metric('peak_rss_bytes', 'gauge', 'Peak resident set size of the process.',
+           [({}, record.get('peak_rss_bytes'))])
+    metric('duration_seconds', 'gauge', 'Wall time of the whole run.', [({}, record.get('total_seconds'))])
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path, text):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
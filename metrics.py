@@ -0,0 +1,131 @@
+"""
+Backtest metrics computed from recorded equity and trade arrays
+
+This is the lightweight alternative to attaching Backtrader analyzers: the
+strategies already record their portfolio value per bar and their closed
+trades, so every metric can be computed after the run in one NumPy pass.
+Definitions follow the analyzers used by BacktestEngine:
+
+- sharpe_ratio: mean / standard deviation of per-bar returns (SharpeRatio
+  with timeframe=Days, riskfreerate=0, not annualized)
+- max_drawdown: largest peak-to-trough decline as a fraction (DrawDown)
+- total_return / annual_return: simple total return and its compounded
+  annual rate (Returns analyzer rtot/rnorm)
+- trade counts and streaks: as TradeAnalyzer (a trade with pnlcomm >= 0 wins)
+"""
+import numpy as np
+
+
+METRIC_KEYS = (
+    'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'volatility',
+    'max_drawdown', 'total_return', 'annual_return',
+    'total_trades', 'winning_trades', 'losing_trades',
+    'longest_win_streak', 'longest_lose_streak',
+    'turnover', 'exposure', 'final_value',
+)
+
+
+def compute_metrics(equity, start_value=None, trades=None, open_trades=0,
+                    traded_value=0.0, bars_in_market=None, periods_per_year=252,
+                    riskfree_rate=0.0):
+    """
+    Compute performance metrics from an equity curve and closed trades
+
+    Args:
+        equity (array-like): Portfolio value at the end of each bar
+        start_value (float): Value before the first bar (default: equity[0])
+        trades (array-like): (n_trades x 3) rows of (pnl, pnlcomm, barlen)
+        open_trades (int): Trades still open at the end of the run
+        traded_value (float): Sum of executed order values
+        bars_in_market (int): Bars with an open position, defaults to the
+            summed bar length of the closed trades
+        periods_per_year (int): Bars per year used for annualization
+        riskfree_rate (float): Annual risk-free rate
+
+    Returns:
+        dict: Metric name -> float or int, None where undefined
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    trades = _trade_array(trades)
+    metrics = dict.fromkeys(METRIC_KEYS)
+    metrics.update(trade_metrics(trades, open_trades))
+    if equity.size == 0:
+        return metrics
+
+    base = equity[0] if start_value is None else float(start_value)
+    values = np.concatenate(([base], equity))
+    returns = values[1:] / values[:-1] - 1.0
+    excess = returns - riskfree_rate / periods_per_year
+    n = returns.size
+
+    mean = excess.mean()
+    std = excess.std()
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2))
+    peak = np.maximum.accumulate(values)
+    max_drawdown = float(np.max(1.0 - values / peak))
+    total_return = values[-1] / values[0] - 1.0
+    annual_return = (1.0 + total_return) ** (periods_per_year / n) - 1.0 if total_return > -1.0 else -1.0
+
+    if bars_in_market is None:
+        bars_in_market = trades[:, 2].sum()
+
+    metrics.update({
+        'sharpe_ratio': float(mean / std) if std > 0 else None,
+        'sortino_ratio': float(mean / downside) if downside > 0 else None,
+        'calmar_ratio': float(annual_return / max_drawdown) if max_drawdown > 0 else None,
+        'volatility': float(returns.std() * np.sqrt(periods_per_year)),
+        'max_drawdown': max_drawdown,
+        'total_return': float(total_return),
+        'annual_return': float(annual_return),
+        'turnover': float(traded_value / values.mean()) if values.mean() > 0 else None,
+        'exposure': float(min(bars_in_market / n, 1.0)),
+        'final_value': float(values[-1]),
+    })
+    return metrics
+
+
+def trade_metrics(trades, open_trades=0):
+    """
+    Trade counts and win/loss streaks from closed trades
+
+    Args:
+        trades (array-like): (n_trades x 3) rows of (pnl, pnlcomm, barlen)
+        open_trades (int): Trades still open at the end of the run
+
+    Returns:
+        dict: total_trades, winning_trades, losing_trades, longest_win_streak
+        and longest_lose_streak
+    """
+    trades = _trade_array(trades)
+    won = trades[:, 1] >= 0.0
+    return {
+        'total_trades': int(len(trades) + open_trades),
+        'winning_trades': int(won.sum()),
+        'losing_trades': int((~won).sum()),
+        'longest_win_streak': longest_run(won),
+        'longest_lose_streak': longest_run(~won),
+    }
+
+
+def longest_run(flags):
+    """
+    Length of the longest run of True values
+
+    Args:
+        flags (numpy.ndarray): Boolean array
+
+    Returns:
+        int: Longest consecutive run of True
+    """
+    flags = np.asarray(flags, dtype=bool)
+    if not flags.any():
+        return 0
+    padded = np.concatenate(([False], flags, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[0::2]).max())
+
+
+def _trade_array(trades):
+    if trades is None or len(trades) == 0:
+        return np.empty((0, 3))
+    return np.asarray(trades, dtype=np.float64).reshape(-1, 3)
@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import baostock as bs
 from datetime import datetime, timedelta
 import warnings
+from rolling_analytics import rolling_report
+from downsample import downsample_indices, DEFAULT_MAX_POINTS
+from ingest import read_result
 warnings.filterwarnings('ignore')
 
 class PerformanceAnalyzer:
@@ -14,23 +15,27 @@ class PerformanceAnalyzer:
     def __init__(self):
         self.csi300_data = None
         
-    def fetch_csi300_data(self, start_date, end_date):
+    def fetch_csi300_data(self, start_date, end_date, verbose=True):
         """
         Fetch CSI300 index data for comparison
         
         Args:
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
+            verbose (bool): Print progress and error messages
             
         Returns:
             pandas.DataFrame: CSI300 data
         """
-        print("[INFO] Fetching CSI300 data for comparison...")
+        log = print if verbose else (lambda message: None)
+        log("[INFO] Fetching CSI300 data for comparison...")
         
+        import baostock as bs
+
         # Login to Baostock
         lg = bs.login()
         if lg.error_code != '0':
-            print(f"[ERROR] Baostock login failed: {lg.error_msg}")
+            log(f"[ERROR] Baostock login failed: {lg.error_msg}")
             return None
             
         try:
@@ -45,94 +50,171 @@ class PerformanceAnalyzer:
             )
             
             if rs.error_code != '0':
-                print(f"[ERROR] CSI300 query failed: {rs.error_msg}")
+                log(f"[ERROR] CSI300 query failed: {rs.error_msg}")
                 return None
                 
-            # Process data
-            data_list = []
-            while (rs.error_code == '0') & rs.next():
-                data_list.append(rs.get_row_data())
-                
-            if not data_list:
-                print("[WARNING] No CSI300 data returned.")
+            # Typed date and close columns (see ingest.py)
+            df = read_result(rs)
+            if df.empty:
+                log("[WARNING] No CSI300 data returned.")
                 return None
-                
-            # Create DataFrame
-            df = pd.DataFrame(data_list, columns=rs.fields)
-            df['date'] = pd.to_datetime(df['date'])
-            df['close'] = pd.to_numeric(df['close'], errors='coerce')
             df.set_index('date', inplace=True)
             
-            print(f"[INFO] CSI300 data loaded: {len(df)} records")
+            log(f"[INFO] CSI300 data loaded: {len(df)} records")
             return df
             
         finally:
             bs.logout()
     
-    def calculate_cumulative_returns(self, portfolio_values, benchmark_data=None):
+    def calculate_cumulative_returns(self, portfolio_values, benchmark_data=None, dates=None):
         """
         Calculate cumulative returns for portfolio and benchmark
         
         Args:
-            portfolio_values (list): List of portfolio values over time
-            benchmark_data (pandas.DataFrame): Benchmark data (CSI300)
+            portfolio_values (array-like): Portfolio values over time (list,
+                numpy array or pandas Series; float64 arrays are not copied)
+            benchmark_data (pandas.DataFrame): Benchmark data (CSI300) with a
+                'close' column indexed by date
+            dates (array-like): Dates of the portfolio values. When given, the
+                benchmark is aligned to them by date (last close on or before
+                each date); otherwise it is truncated or padded by position
             
         Returns:
-            tuple: (portfolio_returns, benchmark_returns)
+            tuple: (portfolio_returns, benchmark_returns) as numpy arrays
+            starting at 1.0, benchmark_returns is None when unavailable
         """
-        if not portfolio_values or len(portfolio_values) < 2:
+        values = np.asarray(portfolio_values, dtype=np.float64)
+        if values.ndim != 1 or values.size < 2:
             print("[ERROR] Insufficient portfolio values for calculation")
-            return [1.0], None
-        
-        # Calculate daily returns from portfolio values
-        daily_returns = []
-        for i in range(1, len(portfolio_values)):
-            if portfolio_values[i-1] > 0:  # Avoid division by zero
-                daily_return = (portfolio_values[i] - portfolio_values[i-1]) / portfolio_values[i-1]
-                daily_returns.append(daily_return)
-            else:
-                daily_returns.append(0.0)
-        
-        # Calculate cumulative returns starting from 100%
-        cumulative_portfolio = [1.0]  # Start at 100%
-        for daily_return in daily_returns:
-            cumulative_portfolio.append(cumulative_portfolio[-1] * (1 + daily_return))
-        
-        print(f"[INFO] Portfolio values range: {min(portfolio_values):.2f} to {max(portfolio_values):.2f}")
-        print(f"[INFO] Daily returns range: {min(daily_returns):.4f} to {max(daily_returns):.4f}")
-        print(f"[INFO] Cumulative returns range: {min(cumulative_portfolio):.2f} to {max(cumulative_portfolio):.2f}")
+            return np.ones(1), None
+        
+        daily_returns = self.daily_returns(values)
+        cumulative_portfolio = self.cumulative_from_returns(daily_returns)
+        
+        print(f"[INFO] Portfolio values range: {values.min():.2f} to {values.max():.2f}")
+        print(f"[INFO] Daily returns range: {daily_returns.min():.4f} to {daily_returns.max():.4f}")
+        print(f"[INFO] Cumulative returns range: {cumulative_portfolio.min():.2f} to {cumulative_portfolio.max():.2f}")
         
         # Calculate benchmark returns if available
         cumulative_benchmark = None
         if benchmark_data is not None and not benchmark_data.empty:
             try:
-                # Calculate benchmark daily returns
-                benchmark_daily_returns = benchmark_data['close'].pct_change().dropna()
-                
-                # Calculate cumulative benchmark returns
-                cumulative_benchmark = [1.0]  # Start at 100%
-                for daily_return in benchmark_daily_returns:
-                    cumulative_benchmark.append(cumulative_benchmark[-1] * (1 + daily_return))
-                
-                # Align with portfolio data length
-                if len(cumulative_benchmark) > len(cumulative_portfolio):
-                    cumulative_benchmark = cumulative_benchmark[:len(cumulative_portfolio)]
-                elif len(cumulative_benchmark) < len(cumulative_portfolio):
-                    # Pad with last value
-                    last_val = cumulative_benchmark[-1] if cumulative_benchmark else 1.0
-                    while len(cumulative_benchmark) < len(cumulative_portfolio):
-                        cumulative_benchmark.append(last_val)
-                
-                print(f"[INFO] Benchmark daily returns range: {min(benchmark_daily_returns):.4f} to {max(benchmark_daily_returns):.4f}")
-                print(f"[INFO] Benchmark cumulative returns range: {min(cumulative_benchmark):.2f} to {max(cumulative_benchmark):.2f}")
+                cumulative_benchmark = self.align_benchmark(benchmark_data, len(values), dates)
+                benchmark_daily_returns = self.daily_returns(cumulative_benchmark)
+                print(f"[INFO] Benchmark daily returns range: {np.nanmin(benchmark_daily_returns):.4f} to {np.nanmax(benchmark_daily_returns):.4f}")
+                print(f"[INFO] Benchmark cumulative returns range: {np.nanmin(cumulative_benchmark):.2f} to {np.nanmax(cumulative_benchmark):.2f}")
             except Exception as e:
                 print(f"[WARNING] Error calculating benchmark returns: {e}")
                 cumulative_benchmark = None
         
         return cumulative_portfolio, cumulative_benchmark
     
+    def calculate_cumulative_returns_batch(self, equity_curves):
+        """
+        Calculate cumulative and daily returns for many equity curves at once
+        
+        Args:
+            equity_curves (array-like): (runs x days) matrix of portfolio values
+            
+        Returns:
+            tuple: (cumulative, daily_returns) matrices of shape (runs x days)
+            and (runs x days-1), cumulative starting at 1.0
+        """
+        values = np.asarray(equity_curves, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[np.newaxis, :]
+        daily_returns = self.daily_returns(values)
+        return self.cumulative_from_returns(daily_returns), daily_returns
+    
+    @staticmethod
+    def daily_returns(values):
+        """
+        Period returns along the last axis, 0 where the previous value is not positive
+        
+        Args:
+            values (numpy.ndarray): Portfolio values or price levels
+            
+        Returns:
+            numpy.ndarray: Returns, one shorter than values on the last axis
+        """
+        previous = values[..., :-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(values, axis=-1) / previous
+        return np.where(previous > 0, returns, 0.0)
+    
+    @staticmethod
+    def cumulative_from_returns(daily_returns):
+        """
+        Compound period returns into a cumulative curve starting at 1.0
+        
+        Args:
+            daily_returns (numpy.ndarray): Returns along the last axis
+            
+        Returns:
+            numpy.ndarray: Cumulative curve, one longer than the returns
+        """
+        shape = daily_returns.shape[:-1] + (daily_returns.shape[-1] + 1,)
+        cumulative = np.empty(shape)
+        cumulative[..., 0] = 1.0
+        np.cumprod(1.0 + daily_returns, axis=-1, out=cumulative[..., 1:])
+        return cumulative
+    
+    @staticmethod
+    def align_benchmark(benchmark_data, length, dates=None):
+        """
+        Cumulative benchmark curve aligned to the portfolio's trading days
+        
+        Args:
+            benchmark_data (pandas.DataFrame or pandas.Series): Benchmark closes
+            length (int): Number of portfolio values
+            dates (array-like): Portfolio dates, aligned by date when given
+            
+        Returns:
+            numpy.ndarray: Cumulative benchmark curve of the given length,
+            starting at 1.0 on the first common date (NaN before it)
+        """
+        close = benchmark_data['close'] if isinstance(benchmark_data, pd.DataFrame) else benchmark_data
+        levels = close.to_numpy(dtype=np.float64)
+        
+        if dates is not None and len(dates) == length and isinstance(close.index, pd.DatetimeIndex):
+            # Last benchmark close on or before each trading day
+            trading_days = pd.DatetimeIndex(pd.to_datetime(list(dates)))
+            position = close.index.searchsorted(trading_days, side='right') - 1
+            # Days before the first benchmark close have no value (no back-fill)
+            aligned = np.where(position >= 0, levels[np.maximum(position, 0)], np.nan)
+        elif len(levels) >= length:
+            aligned = levels[:length]
+        else:
+            # Pad with the last value
+            aligned = np.pad(levels, (0, length - len(levels)), mode='edge')
+        finite = np.flatnonzero(np.isfinite(aligned))
+        return aligned / aligned[finite[0]] if finite.size else aligned
+    
+    def rolling_analysis(self, equity_curves, dates=None, benchmark_data=None, window=63):
+        """
+        Rolling Sharpe, volatility, beta/alpha, max drawdown and underwater curves
+        
+        Args:
+            equity_curves (array-like): Portfolio values of one strategy, or a
+                (strategies x days) matrix sharing the same trading days
+            dates (array-like): Trading days of the equity curves, used to align
+                the benchmark by date
+            benchmark_data (pandas.DataFrame): Benchmark data (CSI300), adds
+                rolling beta and alpha when given
+            window (int): Rolling window in trading days
+            
+        Returns:
+            dict: Arrays of shape (strategies x days), see rolling_analytics.rolling_report
+        """
+        equity = np.atleast_2d(np.asarray(equity_curves, dtype=np.float64))
+        benchmark = None
+        if benchmark_data is not None and not benchmark_data.empty:
+            benchmark = self.align_benchmark(benchmark_data, equity.shape[1], dates)
+        return rolling_report(equity, window=window, benchmark=benchmark)
+    
     def plot_cumulative_returns(self, portfolio_values, dates, benchmark_data=None, 
-                               strategy_name="Strategy", stock_code="Unknown"):
+                               strategy_name="Strategy", stock_code="Unknown",
+                               save_path=None, show=True, max_points=DEFAULT_MAX_POINTS):
         """
         Plot cumulative returns comparison
         
@@ -142,10 +224,15 @@ class PerformanceAnalyzer:
             benchmark_data (pandas.DataFrame): CSI300 data
             strategy_name (str): Name of the strategy
             stock_code (str): Stock code being tested
+            save_path (str): Write the chart to this file (.png/.svg)
+            show (bool): Display the chart with plt.show()
+            max_points (int): Longer series are downsampled to about this many points
         """
+        import matplotlib.pyplot as plt
+
         # Calculate cumulative returns
         cumulative_portfolio, cumulative_benchmark = self.calculate_cumulative_returns(
-            portfolio_values, benchmark_data
+            portfolio_values, benchmark_data, dates
         )
         
         # Create the plot
@@ -161,13 +248,19 @@ class PerformanceAnalyzer:
             x_axis = dates
             x_label = 'Date'
         
+        # Only draw a bounded number of points for long series (extremes are kept)
+        has_benchmark = cumulative_benchmark is not None and len(cumulative_benchmark) == len(cumulative_portfolio)
+        series = [cumulative_portfolio, cumulative_benchmark] if has_benchmark else [cumulative_portfolio]
+        keep = downsample_indices(np.vstack(series), max_points=max_points)
+        x_axis = np.asarray(x_axis)[keep]
+        
         # Plot portfolio returns
-        plt.plot(x_axis, cumulative_portfolio, label=f'{strategy_name} ({stock_code})', 
+        plt.plot(x_axis, cumulative_portfolio[keep], label=f'{strategy_name} ({stock_code})', 
                 linewidth=2, color='blue')
         
         # Plot benchmark returns if available
-        if cumulative_benchmark and len(cumulative_benchmark) == len(cumulative_portfolio):
-            plt.plot(x_axis, cumulative_benchmark, label='CSI300 Index', 
+        if has_benchmark:
+            plt.plot(x_axis, cumulative_benchmark[keep], label='CSI300 Index', 
                     linewidth=2, color='red', linestyle='--')
         
         # Customize the plot
@@ -190,7 +283,7 @@ class PerformanceAnalyzer:
                 transform=plt.gca().transAxes, fontsize=10, 
                 bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8))
         
-        if cumulative_benchmark:
+        if cumulative_benchmark is not None:
             final_benchmark_return = (cumulative_benchmark[-1] - 1) * 100
             plt.text(0.02, 0.92, f'Final CSI300 Return: {final_benchmark_return:.2f}%', 
                     transform=plt.gca().transAxes, fontsize=10,
@@ -204,7 +297,13 @@ class PerformanceAnalyzer:
                     bbox=dict(boxstyle="round,pad=0.3", facecolor=color, alpha=0.8))
         
         plt.tight_layout()
-        plt.show()
+        if save_path:
+            plt.savefig(save_path)
+            print(f"[INFO] Cumulative returns chart saved to {save_path}")
+        if show:
+            plt.show()
+        else:
+            plt.close()
         
         # Print summary statistics
         print("\n" + "="*60)
@@ -214,25 +313,27 @@ class PerformanceAnalyzer:
         print(f"Stock: {stock_code}")
         print(f"Final Portfolio Return: {final_portfolio_return:.2f}%")
         
-        if cumulative_benchmark:
+        if cumulative_benchmark is not None:
             print(f"Final CSI300 Return: {final_benchmark_return:.2f}%")
             print(f"Outperformance: {outperformance:+.2f}%")
             
-            # Calculate additional metrics
-            portfolio_volatility = np.std(cumulative_portfolio) * np.sqrt(252) * 100
-            benchmark_volatility = np.std(cumulative_benchmark) * np.sqrt(252) * 100
+            # Volatility from daily returns, annualized
+            portfolio_daily = self.daily_returns(cumulative_portfolio)
+            benchmark_daily = self.daily_returns(cumulative_benchmark)
+            portfolio_volatility = portfolio_daily.std() * np.sqrt(252) * 100
+            benchmark_volatility = benchmark_daily.std() * np.sqrt(252) * 100
             print(f"Portfolio Volatility: {portfolio_volatility:.2f}%")
             print(f"CSI300 Volatility: {benchmark_volatility:.2f}%")
             
-            # Sharpe ratio approximation
+            # Annualized Sharpe ratio (risk-free rate 0)
             if portfolio_volatility > 0:
-                sharpe_ratio = final_portfolio_return / portfolio_volatility
+                sharpe_ratio = portfolio_daily.mean() * 252 * 100 / portfolio_volatility
                 print(f"Sharpe Ratio: {sharpe_ratio:.2f}")
         
         print("="*60)
     
     def analyze_performance(self, cerebro, results, strategy_name, stock_code, 
-                          start_date, end_date):
+                          start_date, end_date, save_path=None, show=True, benchmark=True):
         """
         Complete performance analysis with CSI300 comparison
         
@@ -243,6 +344,10 @@ class PerformanceAnalyzer:
             stock_code (str): Stock code
             start_date (str): Start date
             end_date (str): End date
+            save_path (str): Write the chart to this file (.png/.svg)
+            show (bool): Display the chart with plt.show()
+            benchmark (bool): Download CSI300 for comparison; False plots
+                the strategy alone without contacting Baostock
         """
         # Get portfolio values from strategy
         strat = results[0]
@@ -259,6 +364,7 @@ class PerformanceAnalyzer:
             initial_cash = cerebro.broker.startingcash
             
             # Reconstruct portfolio values by running the strategy again
+            import backtrader as bt
             cerebro_temp = bt.Cerebro()
             cerebro_temp.broker.setcash(initial_cash)
             
@@ -275,14 +381,7 @@ class PerformanceAnalyzer:
             dates = strat_temp.dates
         
         # Convert dates to datetime objects if they're not already
-        datetime_dates = []
-        for date in dates:
-            if isinstance(date, str):
-                datetime_dates.append(pd.to_datetime(date))
-            elif hasattr(date, 'isoformat'):
-                datetime_dates.append(pd.to_datetime(date.isoformat()))
-            else:
-                datetime_dates.append(pd.to_datetime(date))
+        datetime_dates = pd.DatetimeIndex(pd.to_datetime(list(dates)))
         
         print(f"[INFO] Portfolio values tracked: {len(portfolio_values)} points")
         print(f"[INFO] Date range: {datetime_dates[0]} to {datetime_dates[-1]}")
@@ -295,12 +394,12 @@ class PerformanceAnalyzer:
             print(f"[DEBUG] Portfolio value changes: {changes}")
         
         # Fetch CSI300 data
-        csi300_data = self.fetch_csi300_data(start_date, end_date)
+        csi300_data = self.fetch_csi300_data(start_date, end_date) if benchmark else None
         
         # Plot cumulative returns
         self.plot_cumulative_returns(
             portfolio_values, datetime_dates, csi300_data, 
-            strategy_name, stock_code
+            strategy_name, stock_code, save_path=save_path, show=show
         )
 
 
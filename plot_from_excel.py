@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 import pandas as pd
 import matplotlib.pyplot as plt
+from artifacts import load_strategy_frame
 
-def plot_from_excel(excel_filename):
+def plot_from_excel(path, save_path=None, show=True):
     """
-    Plot cumulative returns from Excel data using pandas
+    Plot cumulative returns from saved strategy data using pandas
+    
+    Args:
+        path (str): Run artifact directory, or a legacy .xlsx workbook
+        save_path (str): Write the chart to this file (.png/.svg)
+        show (bool): Display the chart with plt.show()
     """
-    # Read data from Excel
-    df = pd.read_excel(excel_filename)
-    df['Date'] = pd.to_datetime(df['Date'])
+    # Read the saved run
+    df = load_strategy_frame(path)
     
-    print(f"[INFO] Loaded data from Excel: {len(df)} rows")
+    print(f"[INFO] Loaded strategy data: {len(df)} rows")
     print(f"[INFO] Date range: {df['Date'].min()} to {df['Date'].max()}")
     print(f"[INFO] Portfolio value range: {df['Portfolio_Value'].min():.2f} to {df['Portfolio_Value'].max():.2f}")
     
@@ -69,11 +74,17 @@ def plot_from_excel(excel_filename):
                     bbox=dict(boxstyle="round,pad=0.3", facecolor=color, alpha=0.8))
     
     plt.tight_layout()
-    plt.show()
+    if save_path:
+        plt.savefig(save_path)
+        print(f"[INFO] Chart saved to {save_path}")
+    if show:
+        plt.show()
+    else:
+        plt.close()
     
     # Print summary statistics
     print("\n" + "="*60)
-    print("CUMULATIVE RETURNS ANALYSIS (FROM EXCEL)")
+    print("CUMULATIVE RETURNS ANALYSIS (FROM SAVED RUN)")
     print("="*60)
     print(f"Strategy: RSIStrategy")
     print(f"Stock: sh.600600")
@@ -89,11 +100,11 @@ def plot_from_excel(excel_filename):
     print("="*60)
     
     # Show sample data
-    print("\nSample data from Excel:")
+    print("\nSample data:")
     print(df.head(10))
     print("\nLast 5 rows:")
     print(df.tail())
 
 if __name__ == "__main__":
-    excel_filename = "strategy_data_RSIStrategy_600600_2020-04-01_2025-04-01.xlsx"
-    plot_from_excel(excel_filename) 
\ No newline at end of file
+    run_dir = "results/RSIStrategy_600600_2020-04-01_2025-04-01"
+    plot_from_excel(run_dir) 
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""
+Profiling capture for backtest runs and sweeps
+
+RunProfiler wraps a run (or one sweep job) and collects:
+
+- a cProfile profile of the calling thread (mode 'cprofile'; skipped in
+  mode 'sample', which has much less overhead)
+- call stacks sampled from the running thread by a background thread, for
+  flamegraphs
+- the wall time of every strategy next() call, for a per-bar histogram of
+  each strategy class
+
+result() returns a picklable dict, so sweep workers can send their data to
+the parent; merge_profiles() adds results up and write_profile() writes:
+
+- profile.prof: pstats file (snakeviz, python -m pstats)
+- stacks.collapsed: 'frame;frame;frame count' lines for flamegraph.pl or
+  speedscope
+- top.txt: top-N functions by cProfile time and by samples
+- next_histogram.txt/.json: next() time histogram and percentiles per strategy
+"""
+import collections
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+# Histogram bin edges for next() times: 1 us to 10 s, four bins per decade
+NEXT_BIN_EDGES = np.logspace(-6, 1, 29)
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval
+
+    Attributes:
+        stacks (collections.Counter): Collapsed stack -> number of samples
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, root=None):
+        """
+        Args:
+            interval (float): Seconds between samples (the GIL switch
+                interval, 5 ms by default, bounds the effective rate)
+            thread_id (int): Thread to sample (default: the one calling start)
+            root: Frame where stacks start; its callers are left out
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.root = root
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame, self.root)] += 1
+
+
+def collapse_stack(frame, root=None):
+    """
+    Stack of a frame in collapsed form, outermost frame first
+
+    Args:
+        frame: Innermost frame
+        root: Outermost frame to include (default: the whole stack)
+
+    Returns:
+        str: 'file.py:function;file.py:function;...'
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        if frame is root:
+            break
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class RunProfiler:
+    """
+    Profiles the code run inside a with block
+
+    Usage:
+        profiler = RunProfiler('cprofile')
+        strategy_cls = profiler.wrap_strategy(strategy_cls)
+        with profiler:
+            engine.run_backtest(strategy_cls, df)
+        data = profiler.result()
+    """
+
+    def __init__(self, mode='cprofile', interval=0.005):
+        """
+        Args:
+            mode (str): 'cprofile' (deterministic profile plus stack samples)
+                or 'sample' (stack samples only)
+            interval (float): Seconds between stack samples
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.sampler = StackSampler(interval)
+        self.profile = cProfile.Profile() if mode == 'cprofile' else None
+        self.next_times = collections.defaultdict(list)
+        self.wall_seconds = 0.0
+        self._start = None
+
+    def __enter__(self):
+        # Stacks start at the function running the with block
+        self.sampler.root = sys._getframe(1)
+        self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_seconds += time.perf_counter() - self._start
+        if self.profile is not None:
+            self.profile.disable()
+        self.sampler.stop()
+
+    def wrap_strategy(self, strategy_cls):
+        """
+        Subclass of a strategy whose next() calls are timed
+
+        Args:
+            strategy_cls: Backtrader strategy class
+
+        Returns:
+            type: Subclass with the same name and parameters
+        """
+        times = self.next_times[strategy_cls.__name__]
+        next_ = strategy_cls.next
+
+        def next(self):
+            start = time.perf_counter()
+            next_(self)
+            times.append(time.perf_counter() - start)
+
+        return types.new_class(strategy_cls.__name__, (strategy_cls,),
+                               exec_body=lambda ns: ns.update(next=next, __module__=strategy_cls.__module__))
+
+    def result(self):
+        """
+        Returns:
+            dict: 'stats' (pstats dict or None), 'stacks' (Counter),
+            'next' (strategy name -> histogram counts, calls, total and max
+            seconds) and 'wall_seconds'
+        """
+        stats = None
+        if self.profile is not None:
+            self.profile.create_stats()
+            stats = self.profile.stats
+        return {
+            'stats': stats,
+            'stacks': collections.Counter(self.sampler.stacks),
+            'next': {name: _next_summary(times) for name, times in self.next_times.items() if times},
+            'wall_seconds': self.wall_seconds,
+        }
+
+
+def _next_summary(times):
+    times = np.asarray(times, dtype=np.float64)
+    counts = np.histogram(np.clip(times, NEXT_BIN_EDGES[0], NEXT_BIN_EDGES[-1]), bins=NEXT_BIN_EDGES)[0]
+    return {'counts': counts.tolist(), 'calls': int(len(times)),
+            'total_seconds': float(times.sum()), 'max_seconds': float(times.max())}
+
+
+class _StatsHolder:
+    """Gives pstats.Stats a raw stats dict (it accepts objects with create_stats)"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def merge_profiles(results):
+    """
+    Add up profile results (e.g. from the jobs of a sweep)
+
+    Args:
+        results (list): Dicts returned by RunProfiler.result()
+
+    Returns:
+        dict: Combined result in the same layout
+    """
+    merged = {'stats': None, 'stacks': collections.Counter(), 'next': {}, 'wall_seconds': 0.0}
+    profile = None
+    for result in results:
+        if result.get('stats'):
+            if profile is None:
+                profile = pstats.Stats(_StatsHolder(dict(result['stats'])))
+            else:
+                profile.add(_StatsHolder(result['stats']))
+        merged['stacks'].update(result.get('stacks', {}))
+        merged['wall_seconds'] += result.get('wall_seconds', 0.0)
+        for name, summary in result.get('next', {}).items():
+            total = merged['next'].get(name)
+            if total is None:
+                merged['next'][name] = dict(summary, counts=list(summary['counts']))
+            else:
+                total['counts'] = [a + b for a, b in zip(total['counts'], summary['counts'])]
+                total['calls'] += summary['calls']
+                total['total_seconds'] += summary['total_seconds']
+                total['max_seconds'] = max(total['max_seconds'], summary['max_seconds'])
+    if profile is not None:
+        merged['stats'] = profile.stats
+    return merged
+
+
+def histogram_percentile(counts, q):
+    """
+    Percentile of next() times estimated from histogram counts
+
+    Args:
+        counts (list): Counts per NEXT_BIN_EDGES bin
+        q (float): Percentile in [0, 100]
+
+    Returns:
+        float: Upper edge of the bin containing the percentile, in seconds
+    """
+    counts = np.asarray(counts)
+    if counts.sum() == 0:
+        return None
+    index = np.searchsorted(np.cumsum(counts), q / 100.0 * counts.sum())
+    return float(NEXT_BIN_EDGES[min(index + 1, len(NEXT_BIN_EDGES) - 1)])
+
+
+def format_next_histogram(next_summaries):
+    """
+    Text report of the next() time distribution of each strategy
+
+    Args:
+        next_summaries (dict): Strategy name -> summary from result()['next']
+
+    Returns:
+        str: Calls, mean/p50/p90/p99/max and a bar per non-empty bin
+    """
+    lines = []
+    for name, summary in sorted(next_summaries.items(), key=lambda item: -item[1]['total_seconds']):
+        calls = summary['calls']
+        p50, p90, p99 = (histogram_percentile(summary['counts'], q) for q in (50, 90, 99))
+        lines.append(f"{name}: {calls} calls, {summary['total_seconds']:.3f}s total, "
+                     f"mean {summary['total_seconds'] / calls * 1e6:.1f}us, "
+                     f"p50 <{p50 * 1e6:.0f}us, p90 <{p90 * 1e6:.0f}us, p99 <{p99 * 1e6:.0f}us, "
+                     f"max {summary['max_seconds'] * 1e6:.0f}us")
+        peak = max(summary['counts'])
+        for low, high, count in zip(NEXT_BIN_EDGES[:-1], NEXT_BIN_EDGES[1:], summary['counts']):
+            if count:
+                bar = '#' * max(1, round(40 * count / peak))
+                lines.append(f"  {low * 1e6:>10.1f} - {high * 1e6:>10.1f} us {count:>8} {bar}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def top_sampled(stacks, n=30):
+    """
+    Functions with the most samples
+
+    Args:
+        stacks (collections.Counter): Collapsed stack -> samples
+        n (int): Number of functions
+
+    Returns:
+        list: (function, self samples, total samples) sorted by total samples
+    """
+    self_samples = collections.Counter()
+    total_samples = collections.Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    ranked = sorted(total_samples, key=lambda frame: (-total_samples[frame], -self_samples[frame]))
+    return [(frame, self_samples[frame], total_samples[frame]) for frame in ranked[:n]]
+
+
+def write_profile(result, output_dir, top_n=30):
+    """
+    Write a profile result to a directory
+
+    Args:
+        result (dict): From RunProfiler.result() or merge_profiles()
+        output_dir (str): Directory (created if missing)
+        top_n (int): Functions listed in top.txt
+
+    Returns:
+        dict: Output name -> written path
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+
+    report = io.StringIO()
+    report.write(f"Profiled wall time: {result.get('wall_seconds', 0.0):.3f}s\n\n")
+    if result.get('stats'):
+        paths['prof'] = os.path.join(output_dir, 'profile.prof')
+        stats = pstats.Stats(_StatsHolder(result['stats']), stream=report)
+        stats.dump_stats(paths['prof'])
+        for key in ('tottime', 'cumulative'):
+            report.write(f"=== cProfile: top {top_n} by {key} ===\n")
+            stats.sort_stats(key).print_stats(top_n)
+
+    stacks = result.get('stacks') or {}
+    if stacks:
+        paths['collapsed'] = os.path.join(output_dir, 'stacks.collapsed')
+        with open(paths['collapsed'], 'w') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        total = sum(stacks.values())
+        report.write(f"=== Samples: top {top_n} of {total} ===\n")
+        report.write(f"{'total%':>8} {'self%':>8}  function\n")
+        for frame, self_count, total_count in top_sampled(stacks, top_n):
+            report.write(f"{100 * total_count / total:>7.1f}% {100 * self_count / total:>7.1f}%  {frame}\n")
+
+    paths['top'] = os.path.join(output_dir, 'top.txt')
+    with open(paths['top'], 'w') as f:
+        f.write(report.getvalue())
+
+    if result.get('next'):
+        paths['next_histogram'] = os.path.join(output_dir, 'next_histogram.txt')
+        with open(paths['next_histogram'], 'w') as f:
+            f.write(format_next_histogram(result['next']))
+        paths['next_json'] = os.path.join(output_dir, 'next_histogram.json')
+        with open(paths['next_json'], 'w') as f:
+            json.dump({'bin_edges_seconds': NEXT_BIN_EDGES.tolist(), 'strategies': result['next']}, f, indent=2)
+    return paths
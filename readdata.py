@@ -9,8 +9,9 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
-import mplfinance as mpf
 import datetime
+from candlestick import plot_kline
+from ingest import read_result
 
 def login_baostock():
     # 登录系统
@@ -47,13 +48,9 @@ def profitinfo(code, year, quarter):
     return result_profit
 
 def get_result(rs):
-    # 打印数据结果
+    # 打印数据结果（按页转换为数值/日期列，见 ingest.py）
 
-    data_list = []
-    while (rs.error_code == '0') & rs.next():
-        data_list.append(rs.get_row_data())
-    result = pd.DataFrame(data_list, columns=rs.fields)
-    return result
+    return read_result(rs)
 
 def get_fig(result, im_type='candle'):
     # 绘制可视化图表
@@ -63,9 +60,11 @@ def get_fig(result, im_type='candle'):
     data_kline.index = pd.DatetimeIndex(data_kline['Date'])
     data_kline[['Open','High','Low','Close','Volume']] = data_kline[['Open','High','Low','Close','Volume']].apply(pd.to_numeric)
     if im_type == 'candle':
-        mpf.plot(data_kline, type='candle', volume=True, style='yahoo', mav= (5, 10, 20,30))
+        plot_kline(data_kline, volume=True, mav=(5, 10, 20, 30))
+        plt.show()
     elif im_type == 'line':
-        mpf.plot(data_kline, type='line')
+        plot_kline(data_kline, kind='line', volume=False)
+        plt.show()
 
 def save_to_csv(result, code, frequency, path="C:\\Users\\Rui Ma\\Desktop\\quant\\data\\"):
     # 将获取的个股K线数据保存到本地
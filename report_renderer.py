@@ -0,0 +1,182 @@
+"""
+Headless batch rendering of backtest charts
+
+Charts are drawn with the Agg backend on figure templates that are built
+once per worker process and only have their data swapped for each run, then
+written to PNG/SVG files. Nothing here needs a display or blocks on
+plt.show(), so it can run inside batch jobs and sweeps.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from downsample import downsample_indices, DEFAULT_MAX_POINTS
+
+
+def use_headless_backend():
+    """Switch matplotlib to the non-interactive Agg backend"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    # Loading pyplot now pins the backend: Backtrader's plot module asks for
+    # TkAgg on import and only gives way once pyplot is initialized
+    import matplotlib.pyplot
+
+
+class CumulativeReturnsTemplate:
+    """
+    Reusable cumulative returns chart (strategy vs CSI300)
+
+    The figure, axes, lines and text boxes are created once; render() only
+    replaces the data, labels and texts before saving.
+    """
+
+    def __init__(self, figsize=(14, 8), dpi=100, max_points=DEFAULT_MAX_POINTS):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        import matplotlib.dates as mdates
+
+        self.max_points = max_points
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.portfolio_line, = self.ax.plot([], [], linewidth=2, color='blue')
+        self.benchmark_line, = self.ax.plot([], [], linewidth=2, color='red', linestyle='--',
+                                            label='CSI300 Index')
+        self.ax.set_ylabel('Cumulative Return (Base = 100%)', fontsize=12)
+        self.ax.grid(True, alpha=0.3)
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+        self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        for label in self.ax.get_xticklabels():
+            label.set_rotation(45)
+        box = dict(boxstyle="round,pad=0.3", alpha=0.8)
+        self.portfolio_text = self.ax.text(0.02, 0.98, '', transform=self.ax.transAxes, fontsize=10,
+                                           va='top', bbox=dict(box, facecolor="lightblue"))
+        self.benchmark_text = self.ax.text(0.02, 0.92, '', transform=self.ax.transAxes, fontsize=10,
+                                           va='top', bbox=dict(box, facecolor="lightcoral"))
+        self.outperformance_text = self.ax.text(0.02, 0.86, '', transform=self.ax.transAxes, fontsize=10,
+                                                va='top', bbox=dict(box, facecolor="lightgray"))
+        self.figure.tight_layout()
+
+    def render(self, run, path):
+        """
+        Draw one run and save it
+
+        Args:
+            run (dict): 'dates' and either 'cumulative' or 'portfolio_values',
+                optional 'benchmark' (cumulative, same length), 'strategy_name'
+                and 'stock_code'
+            path (str): Output file, format taken from the extension (.png/.svg)
+
+        Returns:
+            str: The written path
+        """
+        import matplotlib.dates as mdates
+
+        cumulative = run.get('cumulative')
+        if cumulative is None:
+            values = np.asarray(run['portfolio_values'], dtype=np.float64)
+            cumulative = values / values[0]
+        cumulative = np.asarray(cumulative, dtype=np.float64)
+        x = mdates.date2num(np.asarray(run['dates'], dtype='datetime64[ns]'))
+        strategy_name = run.get('strategy_name', 'Strategy')
+        stock_code = run.get('stock_code', 'Unknown')
+
+        benchmark = run.get('benchmark')
+        has_benchmark = benchmark is not None and len(benchmark) == len(cumulative)
+        series = [cumulative, np.asarray(benchmark, dtype=np.float64)] if has_benchmark else [cumulative]
+        keep = downsample_indices(np.vstack(series), max_points=self.max_points)
+
+        self.portfolio_line.set_data(x[keep], cumulative[keep])
+        self.portfolio_line.set_label(f'{strategy_name} ({stock_code})')
+        final_portfolio_return = (cumulative[-1] - 1) * 100
+        self.portfolio_text.set_text(f'Final Portfolio Return: {final_portfolio_return:.2f}%')
+
+        self.benchmark_line.set_visible(has_benchmark)
+        self.benchmark_text.set_visible(has_benchmark)
+        self.outperformance_text.set_visible(has_benchmark)
+        if has_benchmark:
+            benchmark = series[1]
+            self.benchmark_line.set_data(x[keep], benchmark[keep])
+            final_benchmark_return = (benchmark[-1] - 1) * 100
+            outperformance = final_portfolio_return - final_benchmark_return
+            self.benchmark_text.set_text(f'Final CSI300 Return: {final_benchmark_return:.2f}%')
+            self.outperformance_text.set_text(f'Outperformance: {outperformance:+.2f}%')
+            self.outperformance_text.get_bbox_patch().set_facecolor('green' if outperformance > 0 else 'red')
+        else:
+            self.benchmark_line.set_data([], [])
+
+        self.ax.set_title(f'Cumulative Returns Comparison: {strategy_name} vs CSI300',
+                          fontsize=14, fontweight='bold')
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        self.ax.legend(handles=[line for line in (self.portfolio_line, self.benchmark_line)
+                                if line.get_visible()], fontsize=11, loc='lower right')
+        self.figure.savefig(path)
+        return path
+
+
+# Template reused by every render call in a worker process
+_template = None
+
+
+def _init_worker(figsize, dpi):
+    global _template
+    use_headless_backend()
+    _template = CumulativeReturnsTemplate(figsize=figsize, dpi=dpi)
+
+
+def _render_one(job):
+    run, path = job
+    return _template.render(run, path)
+
+
+def run_filename(run, index, fmt):
+    """
+    Output file name for a run
+
+    Args:
+        run (dict): Run description
+        index (int): Position of the run in the batch
+        fmt (str): 'png' or 'svg'
+
+    Returns:
+        str: File name such as 'RSIStrategy_sh.603259_0007.png'
+    """
+    name = run.get('name') or f"{run.get('strategy_name', 'run')}_{run.get('stock_code', 'unknown')}_{index:04d}"
+    return f"{name}.{fmt}"
+
+
+def render_runs(runs, output_dir="reports", fmt='png', workers=None, figsize=(14, 8), dpi=100):
+    """
+    Render cumulative returns charts for many runs in parallel worker processes
+
+    Args:
+        runs (list): Run dicts as accepted by CumulativeReturnsTemplate.render
+        output_dir (str): Directory for the image files
+        fmt (str): 'png' or 'svg'
+        workers (int): Worker processes (default: CPU count, 0 renders in-process)
+        figsize (tuple): Figure size in inches
+        dpi (int): Resolution for raster output
+
+    Returns:
+        list: Paths of the written files, in the order of runs
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(run, os.path.join(output_dir, run_filename(run, i, fmt))) for i, run in enumerate(runs)]
+    if not jobs:
+        return []
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers == 0 or len(jobs) == 1:
+        # The template draws on its own Agg canvas, so the caller's
+        # matplotlib backend is left alone
+        template = CumulativeReturnsTemplate(figsize=figsize, dpi=dpi)
+        paths = [template.render(run, path) for run, path in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(figsize, dpi)) as pool:
+            paths = list(pool.map(_render_one, jobs, chunksize=chunksize))
+    print(f"[INFO] Rendered {len(paths)} charts to {output_dir}")
+    return paths
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Local resampling of stored bars to coarser frequencies
+
+Weekly and monthly bars are built from the stored daily series and custom
+N-minute bars from a stored Baostock minute series (5, 15, 30 or 60), so
+switching a config's data_frequency does not download anything. The base
+series already follows the A-share trading calendar, so:
+
+- weekly/monthly bars group trading days by calendar week (Monday to
+  Sunday) or month and are labeled with the last trading day in the group,
+  as Baostock labels its own weekly and monthly bars
+- N-minute bars count trading minutes from each session open (09:30 and
+  13:00) and never span the lunch break or two days; bars are labeled with
+  the timestamp of their last base bar
+
+Aggregation: first open, highest high, lowest low, last close, summed
+volume and amount, first preclose, last value of every other column.
+Grouping and aggregation are vectorized (np.*.reduceat).
+
+Frequencies use Baostock's names: 'd', 'w', 'm' and minutes as a number
+('30', 45 or '45min').
+"""
+import collections
+import contextlib
+import io
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Minute series Baostock can download, coarsest first
+MINUTE_BASES = ('60', '30', '15', '5')
+
+# Trading minutes of the morning session (09:30-11:30) and the opens in
+# minutes after midnight
+MORNING_MINUTES = 120
+MORNING_OPEN = 9 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+
+# Loaded and resampled frames: (path, mtime, frequency) -> DataFrame
+_cache = collections.OrderedDict()
+# Frames resampled in memory: (id(df), frequency, keep_time) -> (weakref, DataFrame)
+_derived = collections.OrderedDict()
+CACHE_SIZE = 64
+
+
+def parse_frequency(frequency):
+    """
+    Normalize a frequency name
+
+    Args:
+        frequency (str or int): 'd', 'w', 'm' or a number of minutes
+
+    Returns:
+        tuple: ('d' | 'w' | 'm', None) or ('min', minutes)
+    """
+    name = str(frequency).strip().lower()
+    if name in ('d', 'w', 'm'):
+        return name, None
+    if name.endswith('min'):
+        name = name[:-3]
+    if name.isdigit() and int(name) > 0:
+        return 'min', int(name)
+    raise ValueError(f"Unknown frequency '{frequency}' (use 'd', 'w', 'm' or minutes)")
+
+
+def base_frequency(frequency):
+    """
+    Stored frequency a frequency is built from
+
+    Args:
+        frequency (str or int): Target frequency
+
+    Returns:
+        str: 'd' for daily, weekly and monthly bars, otherwise the coarsest
+        Baostock minute series that divides the target
+    """
+    kind, minutes = parse_frequency(frequency)
+    if kind != 'min':
+        return 'd'
+    for base in MINUTE_BASES:
+        if minutes % int(base) == 0:
+            return base
+    raise ValueError(f"{minutes}-minute bars cannot be built from {'/'.join(MINUTE_BASES)}-minute data")
+
+
+def periods_per_year(frequency):
+    """Bars per year of a frequency, for annualizing metrics (4 trading hours a day)"""
+    kind, minutes = parse_frequency(frequency)
+    if kind == 'min':
+        return 252 * 240 / minutes
+    return {'d': 252, 'w': 52, 'm': 12}[kind]
+
+
+def base_path(config, data_dir="data"):
+    """
+    CSV file holding the base series of a config
+
+    Daily data keeps the DataFetcher.save_data name; minute series get a
+    '_<n>min' suffix so they do not overwrite it.
+    """
+    code_short = config['stock_code'].split('.')[-1]
+    base = base_frequency(config.get('data_frequency', 'd'))
+    suffix = '' if base == 'd' else f"_{base}min"
+    return os.path.join(data_dir, f"{code_short}_{config['start_date']}_{config['end_date']}{suffix}.csv")
+
+
+def _group_starts(keys):
+    return np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1)) if len(keys) else keys[:0]
+
+
+def session_buckets(index, minutes):
+    """
+    N-minute bucket of every intraday bar
+
+    Args:
+        index (pandas.DatetimeIndex): Bar end times
+        minutes (int): Bucket length in trading minutes
+
+    Returns:
+        numpy.ndarray: int64 keys, equal for bars of the same bucket
+    """
+    days = index.normalize()
+    clock = ((index - days) // pd.Timedelta(minutes=1)).to_numpy(np.int64)
+    afternoon = clock > MORNING_OPEN + MORNING_MINUTES
+    offset = np.where(afternoon, clock - AFTERNOON_OPEN, clock - MORNING_OPEN)
+    # Bars are labeled by their end, so 09:35 is the first bucket and 11:30 the last of the morning
+    bucket = np.maximum(offset - 1, 0) // minutes + np.where(afternoon, 10_000, 0)
+    day_number = days.values.astype('M8[D]').astype(np.int64)
+    return day_number * 100_000 + bucket
+
+
+def calendar_keys(index, period):
+    """Day ('d'), week ('w') or month ('m') of every bar as int64 keys"""
+    days = index.values.astype('M8[D]').astype(np.int64)
+    if period == 'd':
+        return days
+    if period == 'w':
+        # Day 0 (1970-01-01) is a Thursday; shift so weeks start on Monday
+        return (days + 3) // 7
+    return index.values.astype('M8[M]').astype(np.int64)
+
+
+def aggregate(df, keys):
+    """
+    Merge consecutive bars with equal keys
+
+    Args:
+        df (pandas.DataFrame): Bars in time order
+        keys (numpy.ndarray): Group key of every bar
+
+    Returns:
+        pandas.DataFrame: One bar per group, labeled with its last timestamp
+    """
+    starts = _group_starts(keys)
+    ends = np.append(starts[1:], len(df)) - 1
+    merged = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        name = str(col).lower()
+        if name in ('open', 'preclose'):
+            merged[col] = values[starts]
+        elif name == 'high':
+            merged[col] = np.fmax.reduceat(values.astype(np.float64), starts) if len(df) else values
+        elif name == 'low':
+            merged[col] = np.fmin.reduceat(values.astype(np.float64), starts) if len(df) else values
+        elif name in ('volume', 'amount'):
+            merged[col] = (np.add.reduceat(np.nan_to_num(values.astype(np.float64)), starts)
+                           if len(df) else values)
+        else:
+            merged[col] = values[ends]
+    return pd.DataFrame(merged, index=df.index[ends], columns=df.columns)
+
+
+def resample(df, frequency, keep_time=False):
+    """
+    Build coarser bars from a daily or intraday series
+
+    Args:
+        df (pandas.DataFrame): Base bars indexed by date (or bar end time)
+        frequency (str or int): Target frequency ('d', 'w', 'm' or minutes)
+        keep_time (bool): Label daily/weekly/monthly bars of an intraday
+            series with their last bar's timestamp instead of the date, so
+            they arrive with that bar in a multi-timeframe run
+
+    Returns:
+        pandas.DataFrame: Resampled bars (df itself when nothing changes)
+    """
+    kind, minutes = parse_frequency(frequency)
+    index = pd.DatetimeIndex(df.index)
+    intraday = len(index) > 0 and bool((index != index.normalize()).any())
+    if kind == 'min':
+        if not intraday:
+            raise ValueError(f"{minutes}-minute bars need an intraday base series")
+        return aggregate(df, session_buckets(index, minutes))
+    if kind == 'd' and not intraday:
+        return df
+    bars = aggregate(df, calendar_keys(index, kind))
+    if intraday and not keep_time:
+        bars.index = bars.index.normalize()
+    return bars
+
+
+def resample_cached(df, frequency, keep_time=False):
+    """
+    resample() memoized per DataFrame object
+
+    Repeated runs on the same frame get the same resampled frame back, so
+    its preloaded feed can be reused as well (see feed_cache.py). Entries of
+    collected DataFrames are dropped.
+    """
+    key = (id(df), str(frequency), keep_time)
+    entry = _derived.get(key)
+    if entry is None or entry[0]() is not df:
+        entry = (weakref.ref(df), resample(df, frequency, keep_time))
+        _derived[key] = entry
+        while len(_derived) > CACHE_SIZE:
+            _derived.popitem(last=False)
+    _derived.move_to_end(key)
+    return entry[1]
+
+
+def load_bars(path, frequency="d"):
+    """
+    Bars of a stored base series at a frequency, cached per process
+
+    The cache is keyed by path, modification time and frequency, so a
+    rewritten file is loaded again. Callers must not modify the returned
+    frame.
+
+    Args:
+        path (str): Base series CSV
+        frequency (str): Target frequency
+
+    Returns:
+        pandas.DataFrame: Bars, or None when the file cannot be loaded
+    """
+    from data_fetcher import DataFetcher
+
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    key = (os.path.abspath(path), mtime, str(frequency))
+    df = _cache.get(key)
+    if df is None:
+        base_key = (key[0], mtime, 'base')
+        base = _cache.get(base_key)
+        if base is None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                base = DataFetcher().load_data_from_csv(path)
+            if base is None:
+                return None
+            _cache[base_key] = base
+        df = resample(base, frequency)
+        _cache[key] = df
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    _cache.move_to_end(key)
+    return df
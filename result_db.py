@@ -0,0 +1,214 @@
+"""
+Embedded SQLite store for backtest results
+
+Every run becomes one row with its metadata (strategy, stock, period,
+parameters, full config, code version, data hash), its scalar metrics and
+the directory of its columnar artifacts. Metrics are plain columns; runs are
+indexed by (strategy, stock_code, start_date) and the main metrics by
+(strategy, metric), so ranking queries such as "top 20 RSIStrategy runs by
+Sharpe on sh.603259 since 2022" are index lookups, not file globs. The
+database runs in WAL mode and inserts are batched with executemany in one
+transaction, which is how sweep results are written.
+"""
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+
+import pandas as pd
+
+from metrics import METRIC_KEYS
+
+
+RUN_COLUMNS = (
+    'strategy', 'stock_code', 'start_date', 'end_date', 'params', 'config',
+    'code_version', 'data_hash', 'artifact_dir', 'created_at',
+)
+
+# Metrics that get a (strategy, metric) index for ranking
+INDEXED_METRICS = ('sharpe_ratio', 'total_return', 'annual_return', 'max_drawdown', 'calmar_ratio')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    stock_code TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    params TEXT,
+    config TEXT,
+    code_version TEXT,
+    data_hash TEXT,
+    artifact_dir TEXT,
+    created_at TEXT,
+    {', '.join(f'{name} REAL' for name in METRIC_KEYS)}
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (strategy, stock_code, start_date);
+CREATE INDEX IF NOT EXISTS idx_runs_data ON runs (data_hash);
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS idx_runs_{name} ON runs (strategy, {name});\n"
+    for name in INDEXED_METRICS
+)
+
+INSERT_SQL = (f"INSERT INTO runs ({', '.join(RUN_COLUMNS + METRIC_KEYS)}) "
+              f"VALUES ({', '.join('?' * len(RUN_COLUMNS + METRIC_KEYS))})")
+
+
+def code_version(repo_dir=None):
+    """
+    Git commit of the code that produced a run
+
+    Returns:
+        str: Commit hash (with '-dirty' for uncommitted changes), or None
+        outside a git checkout
+    """
+    repo_dir = repo_dir or os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_dir, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir,
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if not commit:
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def data_hash(df):
+    """
+    Content hash of the price data a run used
+
+    Args:
+        df (pandas.DataFrame): Backtest data
+
+    Returns:
+        str: SHA-1 hex digest of the index and values
+    """
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()
+
+
+class ResultStore:
+    """
+    SQLite database of backtest runs
+    """
+
+    def __init__(self, path="results/results.db", timeout=60):
+        """
+        Args:
+            path (str): Database file (parent directories are created)
+            timeout (float): Seconds to wait for a lock held by another writer
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add_runs(self, records):
+        """
+        Insert many runs in one transaction
+
+        Args:
+            records (list): Dicts with any of RUN_COLUMNS ('params' and
+                'config' may be dicts) and 'metrics' (metric name -> value)
+
+        Returns:
+            int: Number of inserted rows
+        """
+        created_at = datetime.datetime.now().isoformat(timespec='seconds')
+        rows = [_row(record, created_at) for record in records]
+        with self.conn:
+            self.conn.executemany(INSERT_SQL, rows)
+        return len(rows)
+
+    def add_run(self, **record):
+        """Insert one run (see add_runs); returns its id"""
+        created_at = datetime.datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            cursor = self.conn.execute(INSERT_SQL, _row(record, created_at))
+        return cursor.lastrowid
+
+    def top_runs(self, metric='sharpe_ratio', n=20, strategy=None, stock_code=None,
+                 since=None, until=None, ascending=False):
+        """
+        Best runs by a metric
+
+        Args:
+            metric (str): Metric column from METRIC_KEYS
+            n (int): Number of runs
+            strategy (str): Only this strategy
+            stock_code (str): Only this stock
+            since (str): Only runs whose period starts on or after this date
+            until (str): Only runs whose period ends on or before this date
+            ascending (bool): Lowest values first (e.g. for max_drawdown)
+
+        Returns:
+            pandas.DataFrame: Matching runs, params decoded to dicts
+        """
+        if metric not in METRIC_KEYS:
+            raise ValueError(f"Unknown metric: {metric}")
+        where, args = [f"{metric} IS NOT NULL"], []
+        for clause, value in (("strategy = ?", strategy), ("stock_code = ?", stock_code),
+                              ("start_date >= ?", since), ("end_date <= ?", until)):
+            if value is not None:
+                where.append(clause)
+                args.append(value)
+        sql = (f"SELECT * FROM runs WHERE {' AND '.join(where)} "
+               f"ORDER BY {metric} {'ASC' if ascending else 'DESC'} LIMIT ?")
+        return self._frame(sql, args + [n])
+
+    def get_run(self, run_id):
+        """
+        Returns:
+            dict: The run's row, or None
+        """
+        df = self._frame("SELECT * FROM runs WHERE id = ?", [run_id])
+        return df.iloc[0].to_dict() if len(df) else None
+
+    def count(self):
+        return self.conn.execute("SELECT count(*) FROM runs").fetchone()[0]
+
+    def _frame(self, sql, args):
+        df = pd.read_sql_query(sql, self.conn, params=args)
+        df['params'] = df['params'].map(lambda text: json.loads(text) if text else {})
+        return df
+
+
+def _row(record, created_at):
+    metrics = record.get('metrics') or {}
+    row = [
+        record.get('strategy'), record.get('stock_code'),
+        record.get('start_date'), record.get('end_date'),
+        _json(record.get('params')), _json(record.get('config')),
+        record.get('code_version'), record.get('data_hash'),
+        record.get('artifact_dir'), record.get('created_at', created_at),
+    ]
+    row.extend(_number(metrics.get(name)) for name in METRIC_KEYS)
+    return row
+
+
+def _json(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _number(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,285 @@
+"""
+Rolling-window analytics over one or many equity curves
+
+All functions take arrays with time on the last axis, so a single curve and
+a (strategies x days) matrix are handled by the same code. Windowed sums use
+cumulative sums and windowed extremes use the van Herk/Gil-Werman block
+scheme (the array form of a monotonic deque), so every statistic costs O(n)
+per curve regardless of the window length. Values are NaN until a full
+window is available and for windows that contain a NaN (e.g. before a curve
+starts).
+"""
+import numpy as np
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.atleast_2d(x), x.ndim == 1
+
+
+def _restore(out, squeeze):
+    return out[0] if squeeze else out
+
+
+def _window_sum(x, window):
+    """Sum over the trailing window, NaN before the window is full or when it holds a NaN"""
+    rows, n = x.shape
+    out = np.full((rows, n), np.nan)
+    if window > n:
+        return out
+    # NaNs are summed as zero and counted separately, so one NaN only
+    # affects the windows that contain it
+    missing = np.isnan(x)
+    csum = np.zeros((rows, n + 1))
+    np.cumsum(np.where(missing, 0.0, x), axis=1, out=csum[:, 1:])
+    cmissing = np.zeros((rows, n + 1), dtype=np.int64)
+    np.cumsum(missing, axis=1, out=cmissing[:, 1:])
+    sums = csum[:, window:] - csum[:, :n - window + 1]
+    gaps = cmissing[:, window:] - cmissing[:, :n - window + 1]
+    out[:, window - 1:] = np.where(gaps > 0, np.nan, sums)
+    return out
+
+
+def _blocks(x, window, fill):
+    """Pad the last axis to a multiple of window and split into blocks"""
+    rows, n = x.shape
+    padded_len = -(-n // window) * window
+    padded = np.full((rows, padded_len), fill)
+    padded[:, :n] = x
+    return padded.reshape(rows, -1, window)
+
+
+def rolling_mean(x, window):
+    """
+    Mean over a trailing window
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        window (int): Window length in bars
+
+    Returns:
+        numpy.ndarray: Rolling mean
+    """
+    x, squeeze = _as_2d(x)
+    return _restore(_window_sum(x, window) / window, squeeze)
+
+
+def rolling_std(x, window):
+    """
+    Population standard deviation over a trailing window
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        window (int): Window length in bars
+
+    Returns:
+        numpy.ndarray: Rolling standard deviation
+    """
+    x, squeeze = _as_2d(x)
+    # Center each row first to keep the sum-of-squares formula accurate
+    x = x - np.nanmean(x, axis=1, keepdims=True)
+    mean = _window_sum(x, window) / window
+    meansq = _window_sum(x * x, window) / window
+    return _restore(np.sqrt(np.maximum(meansq - mean * mean, 0.0)), squeeze)
+
+
+def rolling_max(x, window):
+    """
+    Maximum over a trailing window
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        window (int): Window length in bars
+
+    Returns:
+        numpy.ndarray: Rolling maximum
+    """
+    x, squeeze = _as_2d(x)
+    return _restore(_rolling_extreme(x, window, np.maximum, -np.inf), squeeze)
+
+
+def rolling_min(x, window):
+    """
+    Minimum over a trailing window
+
+    Args:
+        x (array-like): Input series, time on the last axis
+        window (int): Window length in bars
+
+    Returns:
+        numpy.ndarray: Rolling minimum
+    """
+    x, squeeze = _as_2d(x)
+    return _restore(_rolling_extreme(x, window, np.minimum, np.inf), squeeze)
+
+
+def _rolling_extreme(x, window, ufunc, fill):
+    rows, n = x.shape
+    out = np.full((rows, n), np.nan)
+    if window > n:
+        return out
+    blocks = _blocks(x, window, fill)
+    prefix = ufunc.accumulate(blocks, axis=2).reshape(rows, -1)
+    suffix = ufunc.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(rows, -1)
+    end = np.arange(window - 1, n)
+    out[:, window - 1:] = ufunc(suffix[:, end - window + 1], prefix[:, end])
+    return out
+
+
+def underwater(equity):
+    """
+    Underwater curve: drawdown from the running peak at every bar
+
+    Args:
+        equity (array-like): Equity curves, time on the last axis
+
+    Returns:
+        numpy.ndarray: Values <= 0, e.g. -0.25 for 25% below the peak
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity / np.maximum.accumulate(equity, axis=-1) - 1.0
+
+
+def rolling_max_drawdown(equity, window):
+    """
+    Maximum drawdown inside each trailing window (peak and trough both in the window)
+
+    Args:
+        equity (array-like): Equity curves, time on the last axis
+        window (int): Window length in bars
+
+    Returns:
+        numpy.ndarray: Drawdown as a positive fraction, e.g. 0.25 for -25%
+    """
+    x, squeeze = _as_2d(equity)
+    rows, n = x.shape
+    out = np.full((rows, n), np.nan)
+    if window > n:
+        return _restore(out, squeeze)
+
+    # Each window is the suffix of one block followed by the prefix of the next
+    blocks = _blocks(x, window, np.nan)
+    blocks = np.where(np.isnan(blocks), x[:, -1:, None], blocks)
+    premax = np.maximum.accumulate(blocks, axis=2)
+    premin = np.minimum.accumulate(blocks, axis=2)
+    premdd = np.maximum.accumulate(1.0 - blocks / premax, axis=2)
+    reverse = blocks[:, :, ::-1]
+    sufmax = np.maximum.accumulate(reverse, axis=2)[:, :, ::-1]
+    sufmin = np.minimum.accumulate(reverse, axis=2)[:, :, ::-1]
+    sufmdd = np.maximum.accumulate((1.0 - sufmin / blocks)[:, :, ::-1], axis=2)[:, :, ::-1]
+
+    premin, premdd = premin.reshape(rows, -1), premdd.reshape(rows, -1)
+    sufmax, sufmdd = sufmax.reshape(rows, -1), sufmdd.reshape(rows, -1)
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    cross = 1.0 - premin[:, end] / sufmax[:, start]
+    # A window that is exactly one block has no suffix/prefix split
+    cross = np.where((end % window) == window - 1, 0.0, cross)
+    out[:, window - 1:] = np.maximum(np.maximum(sufmdd[:, start], premdd[:, end]), cross)
+    return _restore(out, squeeze)
+
+
+def rolling_volatility(returns, window, periods_per_year=252):
+    """
+    Annualized volatility of returns over a trailing window
+
+    Args:
+        returns (array-like): Period returns, time on the last axis
+        window (int): Window length in bars
+        periods_per_year (int): Bars per year
+
+    Returns:
+        numpy.ndarray: Rolling annualized volatility
+    """
+    return rolling_std(returns, window) * np.sqrt(periods_per_year)
+
+
+def rolling_sharpe(returns, window, periods_per_year=252, riskfree_rate=0.0):
+    """
+    Annualized Sharpe ratio over a trailing window
+
+    Args:
+        returns (array-like): Period returns, time on the last axis
+        window (int): Window length in bars
+        periods_per_year (int): Bars per year
+        riskfree_rate (float): Annual risk-free rate
+
+    Returns:
+        numpy.ndarray: Rolling Sharpe ratio, NaN where volatility is zero
+    """
+    excess = np.asarray(returns, dtype=np.float64) - riskfree_rate / periods_per_year
+    mean = rolling_mean(excess, window)
+    std = rolling_std(excess, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = mean / std * np.sqrt(periods_per_year)
+    return np.where(std > 0, sharpe, np.nan)
+
+
+def rolling_beta_alpha(returns, benchmark_returns, window, periods_per_year=252):
+    """
+    Rolling beta and annualized alpha against a benchmark
+
+    Args:
+        returns (array-like): Strategy returns, time on the last axis
+        benchmark_returns (array-like): Benchmark returns for the same bars
+            (one series shared by every strategy row)
+        window (int): Window length in bars
+        periods_per_year (int): Bars per year
+
+    Returns:
+        tuple: (beta, alpha) arrays shaped like returns
+    """
+    r, squeeze = _as_2d(returns)
+    b = np.broadcast_to(np.asarray(benchmark_returns, dtype=np.float64), r.shape)
+    mean_r = _window_sum(r, window) / window
+    mean_b = _window_sum(b, window) / window
+    cov = _window_sum(r * b, window) / window - mean_r * mean_b
+    var_b = _window_sum(b * b, window) / window - mean_b * mean_b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where(var_b > 0, cov / var_b, np.nan)
+    alpha = (mean_r - beta * mean_b) * periods_per_year
+    return _restore(beta, squeeze), _restore(alpha, squeeze)
+
+
+def rolling_report(equity, window=63, benchmark=None, periods_per_year=252):
+    """
+    Compute every rolling statistic for a set of equity curves
+
+    Args:
+        equity (array-like): (strategies x days) equity curves
+        window (int): Window length in bars
+        benchmark (array-like): Benchmark levels for the same days
+        periods_per_year (int): Bars per year
+
+    Returns:
+        dict: Arrays of shape (strategies x days): 'volatility', 'sharpe',
+        'max_drawdown', 'underwater' and, with a benchmark, 'beta' and 'alpha'.
+        Return-based series are NaN on the first day.
+    """
+    equity, _ = _as_2d(equity)
+    rows, n = equity.shape
+    returns = np.zeros((rows, n))
+    returns[:, 1:] = equity[:, 1:] / equity[:, :-1] - 1.0
+
+    tail = returns[:, 1:]
+    report = {
+        'volatility': _pad_front(rolling_volatility(tail, window, periods_per_year)),
+        'sharpe': _pad_front(rolling_sharpe(tail, window, periods_per_year)),
+        'max_drawdown': rolling_max_drawdown(equity, window + 1),
+        'underwater': underwater(equity),
+    }
+    if benchmark is not None:
+        benchmark = np.asarray(benchmark, dtype=np.float64)
+        bench_returns = benchmark[1:] / benchmark[:-1] - 1.0
+        beta, alpha = rolling_beta_alpha(tail, bench_returns, window, periods_per_year)
+        report['beta'] = _pad_front(beta)
+        report['alpha'] = _pad_front(alpha)
+    return report
+
+
+def _pad_front(values):
+    """Prepend a NaN day so return-based series line up with equity days"""
+    values = np.atleast_2d(values)
+    out = np.full((values.shape[0], values.shape[1] + 1), np.nan)
+    out[:, 1:] = values
+    return out
@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
 import backtrader as bt
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime
 import json
+import os
 from data_fetcher import DataFetcher
 from strategies import STRATEGIES
+from artifacts import ArtifactWriter, load_strategy_frame, export_excel
+from plot_from_excel import plot_from_excel
 
-def save_strategy_data_to_excel(config_file="config_rsi.json"):
+def save_strategy_data(config_file="config_rsi.json", output_dir="results", fmt='parquet', excel=False):
     """
-    Run backtest and save strategy data to Excel file
+    Run backtest and save strategy data as columnar run artifacts
+    
+    Equity and fills are streamed to the run directory while the backtest
+    runs; the CSI300 closes are added afterwards as the benchmark table.
+    
+    Args:
+        config_file (str): Configuration file
+        output_dir (str): Parent directory of the run directories
+        fmt (str): 'parquet' or 'feather'
+        excel (bool): Also export the merged data to an .xlsx workbook
+        
+    Returns:
+        tuple: (run directory, merged DataFrame) or None on failure
     """
     # Load configuration
     with open(config_file, 'r', encoding='utf-8') as f:
@@ -51,167 +63,71 @@ def save_strategy_data_to_excel(config_file="config_rsi.json"):
     
     print(f"[INFO] Data loaded successfully. Shape: {df.shape}")
     
-    # Run backtest
-    cerebro = bt.Cerebro()
-    cerebro.broker.setcash(initial_cash)
-    datafeed = bt.feeds.PandasData(dataname=df)
-    cerebro.adddata(datafeed)
-    cerebro.addstrategy(strategy_cls, **strategy_params)
-    
-    print(f"[INFO] Starting Portfolio Value: {cerebro.broker.getvalue():.2f}")
-    results = cerebro.run()
-    strat = results[0]
-    print(f"[INFO] Final Portfolio Value: {cerebro.broker.getvalue():.2f}")
-    
-    # Get portfolio values and dates
-    portfolio_values = getattr(strat, 'portfolio_values', [])
-    dates = getattr(strat, 'dates', [])
-    
-    if not portfolio_values:
-        print("[ERROR] No portfolio values tracked by strategy.")
-        return None
-    
-    # Convert dates to datetime objects
-    datetime_dates = []
-    for date in dates:
-        if isinstance(date, str):
-            datetime_dates.append(pd.to_datetime(date))
-        elif hasattr(date, 'isoformat'):
-            datetime_dates.append(pd.to_datetime(date.isoformat()))
-        else:
-            datetime_dates.append(pd.to_datetime(date))
-    
-    # Create DataFrame with strategy data
-    strategy_df = pd.DataFrame({
-        'Date': datetime_dates,
-        'Portfolio_Value': portfolio_values
-    })
-    
-    # Calculate daily returns
-    strategy_df['Daily_Return'] = strategy_df['Portfolio_Value'].pct_change()
-    
-    # Calculate cumulative returns (starting from 1.0)
-    strategy_df['Cumulative_Return'] = (1 + strategy_df['Daily_Return']).cumprod()
-    
-    # Fetch CSI300 data for comparison
-    print("[INFO] Fetching CSI300 data for comparison...")
-    fetcher.login()
-    csi300_data = fetcher.fetch_data("sh.000300", start_date, end_date)
-    fetcher.logout()
-    
-    if csi300_data is not None:
-        # Process CSI300 data
-        csi300_data['date'] = pd.to_datetime(csi300_data['date'])
-        csi300_data['close'] = pd.to_numeric(csi300_data['close'], errors='coerce')
-        csi300_data.set_index('date', inplace=True)
+    # Run backtest, streaming equity and fills to the run directory
+    run_dir = os.path.join(output_dir, f"{strategy_name}_{code_short}_{start_date}_{end_date}")
+    writer = ArtifactWriter(run_dir, fmt=fmt)
+    try:
+        cerebro = bt.Cerebro()
+        cerebro.broker.setcash(initial_cash)
+        datafeed = bt.feeds.PandasData(dataname=df)
+        cerebro.adddata(datafeed)
+        cerebro.addstrategy(strategy_cls, **strategy_params)
+        cerebro.artifact_writer = writer
         
-        # Calculate CSI300 daily returns
-        csi300_data['Daily_Return'] = csi300_data['close'].pct_change()
-        csi300_data['Cumulative_Return'] = (1 + csi300_data['Daily_Return']).cumprod()
+        print(f"[INFO] Starting Portfolio Value: {cerebro.broker.getvalue():.2f}")
+        results = cerebro.run()
+        strat = results[0]
+        print(f"[INFO] Final Portfolio Value: {cerebro.broker.getvalue():.2f}")
         
-        # Merge strategy and CSI300 data
-        merged_df = pd.merge(strategy_df, csi300_data[['close', 'Daily_Return', 'Cumulative_Return']], 
-                           left_on='Date', right_index=True, how='left')
-        merged_df.rename(columns={'close': 'CSI300_Close', 'Daily_Return': 'CSI300_Daily_Return', 
-                                'Cumulative_Return': 'CSI300_Cumulative_Return'}, inplace=True)
-    else:
-        merged_df = strategy_df
-    
-    # Save to Excel
-    excel_filename = f"strategy_data_{strategy_name}_{code_short}_{start_date}_{end_date}.xlsx"
-    merged_df.to_excel(excel_filename, index=False)
-    print(f"[INFO] Strategy data saved to: {excel_filename}")
-    
-    return excel_filename, merged_df
+        if not getattr(strat, 'portfolio_values', []):
+            print("[ERROR] No portfolio values tracked by strategy.")
+            return None
+        
+        # Fetch CSI300 data for comparison
+        print("[INFO] Fetching CSI300 data for comparison...")
+        fetcher.login()
+        csi300_data = fetcher.fetch_data("sh.000300", start_date, end_date)
+        fetcher.logout()
+        
+        if csi300_data is not None:
+            writer.append_frame('benchmark', pd.DataFrame({
+                'date': pd.to_datetime(csi300_data['date']),
+                'close': pd.to_numeric(csi300_data['close'], errors='coerce'),
+            }))
+    finally:
+        # Flush what was streamed so far even when the run raises
+        writer.close()
+    print(f"[INFO] Strategy data saved to: {run_dir}")
+    
+    merged_df = load_strategy_frame(run_dir)
+    if excel:
+        excel_filename = f"strategy_data_{strategy_name}_{code_short}_{start_date}_{end_date}.xlsx"
+        export_excel(merged_df, excel_filename)
+        print(f"[INFO] Excel export saved to: {excel_filename}")
+    
+    return run_dir, merged_df
 
-def plot_from_excel(excel_filename):
-    """
-    Plot cumulative returns from Excel data using pandas
+def save_strategy_data_to_excel(config_file="config_rsi.json"):
     """
-    # Read data from Excel
-    df = pd.read_excel(excel_filename)
-    df['Date'] = pd.to_datetime(df['Date'])
-    
-    print(f"[INFO] Loaded data from Excel: {len(df)} rows")
-    print(f"[INFO] Date range: {df['Date'].min()} to {df['Date'].max()}")
-    print(f"[INFO] Portfolio value range: {df['Portfolio_Value'].min():.2f} to {df['Portfolio_Value'].max():.2f}")
-    print(f"[INFO] Cumulative return range: {df['Cumulative_Return'].min():.4f} to {df['Cumulative_Return'].max():.4f}")
-    
-    # Create the plot
-    plt.figure(figsize=(14, 8))
-    
-    # Plot strategy cumulative returns
-    plt.plot(df['Date'], df['Cumulative_Return'], 
-             label='Strategy (RSI)', linewidth=2, color='blue')
-    
-    # Plot CSI300 cumulative returns if available
-    if 'CSI300_Cumulative_Return' in df.columns:
-        plt.plot(df['Date'], df['CSI300_Cumulative_Return'], 
-                label='CSI300 Index', linewidth=2, color='red', linestyle='--')
-    
-    # Customize the plot
-    plt.title('Cumulative Returns Comparison: Strategy vs CSI300', 
-              fontsize=14, fontweight='bold')
-    plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Cumulative Return (Base = 100%)', fontsize=12)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    
-    # Format x-axis
-    plt.gca().xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%Y-%m-%d'))
-    plt.gca().xaxis.set_major_locator(plt.matplotlib.dates.MonthLocator(interval=6))
-    plt.xticks(rotation=45)
-    
-    # Add performance metrics
-    final_strategy_return = (df['Cumulative_Return'].iloc[-1] - 1) * 100
-    plt.text(0.02, 0.98, f'Final Strategy Return: {final_strategy_return:.2f}%', 
-             transform=plt.gca().transAxes, fontsize=10, 
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8))
+    Run backtest and save strategy data, with an Excel export
     
-    if 'CSI300_Cumulative_Return' in df.columns:
-        final_benchmark_return = (df['CSI300_Cumulative_Return'].iloc[-1] - 1) * 100
-        plt.text(0.02, 0.92, f'Final CSI300 Return: {final_benchmark_return:.2f}%', 
-                transform=plt.gca().transAxes, fontsize=10,
-                bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcoral", alpha=0.8))
-        
-        # Calculate outperformance
-        outperformance = final_strategy_return - final_benchmark_return
-        color = 'green' if outperformance > 0 else 'red'
-        plt.text(0.02, 0.86, f'Outperformance: {outperformance:+.2f}%', 
-                transform=plt.gca().transAxes, fontsize=10,
-                bbox=dict(boxstyle="round,pad=0.3", facecolor=color, alpha=0.8))
-    
-    plt.tight_layout()
-    plt.show()
-    
-    # Print summary statistics
-    print("\n" + "="*60)
-    print("CUMULATIVE RETURNS ANALYSIS (FROM EXCEL)")
-    print("="*60)
-    print(f"Strategy: RSIStrategy")
-    print(f"Stock: sh.600600")
-    print(f"Final Strategy Return: {final_strategy_return:.2f}%")
-    
-    if 'CSI300_Cumulative_Return' in df.columns:
-        print(f"Final CSI300 Return: {final_benchmark_return:.2f}%")
-        print(f"Outperformance: {outperformance:+.2f}%")
-    
-    print("="*60)
+    Returns:
+        tuple: (Excel filename, merged DataFrame) or None on failure
+    """
+    saved = save_strategy_data(config_file, excel=True)
+    if saved is None:
+        return None
+    run_dir, merged_df = saved
+    config_name = os.path.basename(run_dir)
+    return f"strategy_data_{config_name}.xlsx", merged_df
 
 if __name__ == "__main__":
-    import os
+    # Save strategy data as run artifacts
+    saved = save_strategy_data()
     
-    # Save strategy data to Excel
-    excel_file, data_df = save_strategy_data_to_excel()
-    
-    if excel_file:
-        # Plot from Excel data
-        plot_from_excel(excel_file)
-        
-        # Show some sample data
-        print("\nSample data from Excel:")
-        print(data_df.head(10))
-        print("\nLast 5 rows:")
-        print(data_df.tail())
+    if saved:
+        run_dir, data_df = saved
+        # Plot from the saved run
+        plot_from_excel(run_dir)
     else:
-        print("Failed to save strategy data to Excel.") 
\ No newline at end of file
+        print("Failed to save strategy data.")
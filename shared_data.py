@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Zero-copy shared-memory data plane for worker processes
+
+The parent publishes price data once into multiprocessing.shared_memory
+segments and hands workers a small picklable handle instead of a DataFrame.
+Workers attach by segment name and get DataFrames (usable as
+bt.feeds.PandasData datanames) whose columns are read-only views of the
+shared pages, so attaching takes milliseconds and memory does not grow with
+the worker count.
+
+Segment layout:
+- frame: int64 dates (in the source index's unit), then one float64 row
+  per column
+- panel: int64 dates, then a float64 (fields x symbols x dates) block with
+  the symbols aligned on the union of their dates (NaN where a symbol has
+  no bar)
+
+Ownership: SharedDataPlane (in the parent) creates the segments, counts
+references per key and unlinks a segment when its count drops to zero, on
+close() or at interpreter exit. Workers never unlink; their attachments are
+kept out of the resource tracker, which would otherwise unlink a segment
+still in use when a worker exits (or complain about a segment it never
+created).
+
+Usage:
+    with SharedDataPlane() as plane:
+        handle = plane.publish('600600', df)
+        pool = ProcessPoolExecutor(initializer=init, initargs=(handle,))
+    # in the worker
+    df = attach(handle)
+"""
+import atexit
+import os
+import sys
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# Segments attached in this process: name -> [SharedMemory, attach count]
+_attached = {}
+
+
+def _open_segment(name):
+    """Attach an existing segment without registering it with the resource tracker"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _numeric_columns(df, columns):
+    if columns is None:
+        columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    return [str(c) for c in columns]
+
+
+class SharedDataPlane:
+    """
+    Publishes DataFrames and universe panels into shared memory
+
+    Publishing a key twice returns the existing handle and adds a
+    reference; release() drops one.
+    """
+
+    def __init__(self):
+        self._segments = {}
+        atexit.register(self.close)
+
+    def publish(self, key, df, columns=None):
+        """
+        Copy a price DataFrame into a shared segment
+
+        Args:
+            key (str): Name of the data, e.g. '600600_2020-04-01_2021-04-01'
+            df (pandas.DataFrame): Data indexed by date
+            columns (list): Columns to share (default: every numeric column)
+
+        Returns:
+            dict: Picklable handle for attach()
+        """
+        if key in self._segments:
+            return self._acquire(key)
+        columns = _numeric_columns(df, columns)
+        rows = len(df)
+        shm = shared_memory.SharedMemory(create=True, size=max(8 * rows * (1 + len(columns)), 1),
+                                         name=f"bt_{os.getpid()}_{uuid.uuid4().hex[:12]}")
+        index = pd.DatetimeIndex(df.index)
+        dates = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf)
+        dates[:] = index.asi8
+        values = np.ndarray((len(columns), rows), dtype=np.float64, buffer=shm.buf, offset=8 * rows)
+        for i, column in enumerate(columns):
+            values[i] = df[column].to_numpy(np.float64)
+        handle = {'kind': 'frame', 'key': key, 'name': shm.name, 'rows': rows, 'columns': columns,
+                  'unit': index.unit, 'index_name': index.name}
+        self._segments[key] = [shm, handle, 1]
+        return handle
+
+    def publish_panel(self, key, frames, fields=FIELDS):
+        """
+        Copy per-symbol DataFrames into one date-aligned panel
+
+        Args:
+            key (str): Name of the panel
+            frames (dict): Stock code -> DataFrame indexed by date
+            fields (tuple): Columns to share
+
+        Returns:
+            dict: Picklable handle for attach(), which returns a SharedPanel
+        """
+        if key in self._segments:
+            return self._acquire(key)
+        codes = sorted(frames)
+        dates = pd.DatetimeIndex([])
+        for code in codes:
+            dates = dates.union(pd.DatetimeIndex(frames[code].index))
+        n_dates = len(dates)
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(8 * n_dates * (1 + len(fields) * len(codes)), 1),
+            name=f"bt_{os.getpid()}_{uuid.uuid4().hex[:12]}")
+        shared_dates = np.ndarray((n_dates,), dtype=np.int64, buffer=shm.buf)
+        shared_dates[:] = dates.asi8
+        values = np.ndarray((len(fields), len(codes), n_dates), dtype=np.float64,
+                            buffer=shm.buf, offset=8 * n_dates)
+        values[:] = np.nan
+        for j, code in enumerate(codes):
+            positions = dates.get_indexer(pd.DatetimeIndex(frames[code].index))
+            for i, field in enumerate(fields):
+                if field in frames[code]:
+                    values[i, j, positions] = frames[code][field].to_numpy(np.float64)
+        handle = {'kind': 'panel', 'key': key, 'name': shm.name, 'dates': n_dates,
+                  'codes': codes, 'fields': list(fields), 'unit': dates.unit}
+        self._segments[key] = [shm, handle, 1]
+        return handle
+
+    def _acquire(self, key):
+        self._segments[key][2] += 1
+        return self._segments[key][1]
+
+    def refcount(self, key):
+        """References to a key (0 when it is not published)"""
+        return self._segments[key][2] if key in self._segments else 0
+
+    def release(self, key):
+        """Drop one reference; the segment is unlinked when none are left"""
+        entry = self._segments.get(key)
+        if entry is None:
+            return
+        entry[2] -= 1
+        if entry[2] <= 0:
+            del self._segments[key]
+            entry[0].close()
+            entry[0].unlink()
+
+    @property
+    def nbytes(self):
+        """Total size of the published segments"""
+        return sum(entry[0].size for entry in self._segments.values())
+
+    def close(self):
+        """Unlink every segment regardless of its references"""
+        for key in list(self._segments):
+            shm = self._segments.pop(key)[0]
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SharedPanel:
+    """
+    Read-only views of a published panel
+
+    Attributes:
+        codes (list): Stock codes
+        dates (pandas.DatetimeIndex): Union of the symbols' dates
+        fields (list): Field names
+        values (numpy.ndarray): (fields x symbols x dates) view
+    """
+
+    def __init__(self, handle, buf):
+        self.codes = list(handle['codes'])
+        self.fields = list(handle['fields'])
+        n_dates = handle['dates']
+        self.dates = pd.DatetimeIndex(np.ndarray((n_dates,), dtype=f"M8[{handle['unit']}]", buffer=buf),
+                                      copy=False)
+        self.values = np.ndarray((len(self.fields), len(self.codes), n_dates), dtype=np.float64,
+                                 buffer=buf, offset=8 * n_dates)
+        self.values.flags.writeable = False
+        self._rows = {code: j for j, code in enumerate(self.codes)}
+
+    def field(self, name):
+        """DataFrame view (dates x codes) of one field"""
+        return pd.DataFrame(self.values[self.fields.index(name)].T, index=self.dates,
+                            columns=self.codes, copy=False)
+
+    def frame(self, code):
+        """
+        DataFrame view of one symbol, trimmed to its first and last bar
+
+        Dates inside that range on which the symbol had no bar (suspensions)
+        are NaN rows.
+        """
+        block = self.values[:, self._rows[code], :]
+        valid = np.flatnonzero(~np.isnan(block[self.fields.index('close')]
+                                         if 'close' in self.fields else block[0]))
+        start, end = (valid[0], valid[-1] + 1) if len(valid) else (0, 0)
+        return pd.DataFrame(block[:, start:end].T, index=self.dates[start:end],
+                            columns=self.fields, copy=False)
+
+
+def attach(handle):
+    """
+    Map a published segment into this process
+
+    Args:
+        handle (dict): Handle from SharedDataPlane.publish or publish_panel
+
+    Returns:
+        pandas.DataFrame or SharedPanel: Read-only views of the shared data
+    """
+    entry = _attached.get(handle['name'])
+    if entry is None:
+        entry = _attached[handle['name']] = [_open_segment(handle['name']), 0]
+    entry[1] += 1
+    buf = entry[0].buf
+    if handle['kind'] == 'panel':
+        return SharedPanel(handle, buf)
+    rows = handle['rows']
+    dates = np.ndarray((rows,), dtype=f"M8[{handle['unit']}]", buffer=buf)
+    values = np.ndarray((len(handle['columns']), rows), dtype=np.float64, buffer=buf, offset=8 * rows)
+    values.flags.writeable = False
+    return pd.DataFrame(values.T, index=pd.DatetimeIndex(dates, copy=False, name=handle['index_name']),
+                        columns=handle['columns'], copy=False)
+
+
+def detach(handle):
+    """
+    Drop one attachment; the mapping is closed after the last one
+
+    Views returned by attach() must be released first.
+    """
+    entry = _attached.get(handle['name'])
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        try:
+            entry[0].close()
+        except BufferError:
+            entry[1] = 0
+            print(f"[WARNING] Views of shared segment {handle['name']} are still alive; keeping it mapped")
+            return
+        del _attached[handle['name']]
@@ -0,0 +1,395 @@
+"""
+Vectorized signal kernels mirroring the Backtrader strategies in strategies.py
+
+Each kernel reproduces the entry/exit rule of one entry in STRATEGIES on
+NumPy arrays. Kernels can compute signals over a full history and can also
+carry a small state (price window, smoothed averages) forward one bar at a
+time, which is what the end-of-day pipeline uses.
+"""
+import numpy as np
+
+import indicators
+from strategies import STRATEGIES
+
+
+class MASignals:
+    """
+    Signal kernel for MAStrategy (moving average crossover)
+    """
+
+    strategy_name = 'MAStrategy'
+
+    def __init__(self, short_window=10, long_window=30):
+        self.short_window = int(short_window)
+        self.long_window = int(long_window)
+
+    @property
+    def window(self):
+        """Number of trailing closes kept in the state"""
+        return max(self.short_window, self.long_window)
+
+    @property
+    def minperiod(self):
+        """Index of the first bar on which the strategy's next() runs"""
+        return self.window
+
+    def signals(self, close, ind=indicators):
+        """
+        Compute entry and exit signals over a full history
+
+        Args:
+            close (numpy.ndarray): Close prices, time on the last axis
+            ind: Provider of the indicator functions, the indicators module
+                or a memoizing ensemble.SharedIndicators
+
+        Returns:
+            tuple: (entry, exit) boolean arrays
+        """
+        cross = ind.crossover(
+            ind.sma(close, self.short_window),
+            ind.sma(close, self.long_window))
+        return cross > 0, cross < 0
+
+    def init_state(self, close, lengths=None):
+        """
+        Build the incremental state from a price history
+
+        Args:
+            close (numpy.ndarray): (symbols x bars) close prices, left aligned
+            lengths (numpy.ndarray): Number of bars per symbol (default: all)
+
+        Returns:
+            dict: State arrays
+        """
+        close, lengths = _left_aligned(close, lengths)
+        nzd = indicators.nonzero_difference(
+            indicators.sma(close, self.short_window),
+            indicators.sma(close, self.long_window))
+        return {
+            'window': _tail(close, self.window, lengths),
+            'nzd': _last(nzd, lengths),
+        }
+
+    def update(self, state, close, mask):
+        """
+        Advance the state by one bar and return the bar's signals
+
+        Args:
+            state (dict): State from init_state or a previous update
+            close (numpy.ndarray): Close price per symbol for the new bar
+            mask (numpy.ndarray): Symbols that have a bar today
+
+        Returns:
+            tuple: (entry, exit) boolean arrays
+        """
+        window = _push(state['window'], close, mask)
+        ma_short = window[:, -self.short_window:].mean(axis=1)
+        ma_long = window[:, -self.long_window:].mean(axis=1)
+        diff = ma_short - ma_long
+        prev = state['nzd']
+        entry = mask & (prev < 0.0) & (diff > 0.0)
+        exit_ = mask & (prev > 0.0) & (diff < 0.0)
+        # A fresh NZD is seeded with the first valid difference even if zero
+        seed = np.isnan(prev) & ~np.isnan(diff)
+        keep = (diff == 0.0) & ~seed
+        state['nzd'] = np.where(mask & ~np.isnan(diff) & ~keep, diff, prev)
+        state['window'] = window
+        return entry, exit_
+
+
+class RSISignals:
+    """
+    Signal kernel for RSIStrategy (oversold/overbought RSI)
+    """
+
+    strategy_name = 'RSIStrategy'
+
+    def __init__(self, rsi_period=14, oversold=30, overbought=70):
+        self.rsi_period = int(rsi_period)
+        self.oversold = float(oversold)
+        self.overbought = float(overbought)
+
+    @property
+    def window(self):
+        """Number of trailing closes kept in the state"""
+        return self.rsi_period + 1
+
+    @property
+    def minperiod(self):
+        """Index of the first bar on which the strategy's next() runs"""
+        return self.rsi_period
+
+    def signals(self, close, ind=indicators):
+        """
+        Compute entry and exit signals over a full history
+
+        Args:
+            close (numpy.ndarray): Close prices, time on the last axis
+            ind: Provider of the indicator functions, the indicators module
+                or a memoizing ensemble.SharedIndicators
+
+        Returns:
+            tuple: (entry, exit) boolean arrays
+        """
+        value = ind.rsi(close, self.rsi_period)[0]
+        return value < self.oversold, value > self.overbought
+
+    def init_state(self, close, lengths=None):
+        """
+        Build the incremental state from a price history
+
+        Args:
+            close (numpy.ndarray): (symbols x bars) close prices, left aligned
+            lengths (numpy.ndarray): Number of bars per symbol (default: all)
+
+        Returns:
+            dict: State arrays
+        """
+        close, lengths = _left_aligned(close, lengths)
+        _, avg_up, avg_down = indicators.rsi(close, self.rsi_period)
+        return {
+            'window': _tail(close, self.window, lengths),
+            'avg_up': _last(avg_up, lengths),
+            'avg_down': _last(avg_down, lengths),
+        }
+
+    def update(self, state, close, mask):
+        """
+        Advance the state by one bar and return the bar's signals
+
+        Args:
+            state (dict): State from init_state or a previous update
+            close (numpy.ndarray): Close price per symbol for the new bar
+            mask (numpy.ndarray): Symbols that have a bar today
+
+        Returns:
+            tuple: (entry, exit) boolean arrays
+        """
+        window = _push(state['window'], close, mask)
+        change = close - state['window'][:, -1]
+        alpha = 1.0 / self.rsi_period
+        avg_up = state['avg_up'] * (1.0 - alpha) + np.maximum(change, 0.0) * alpha
+        avg_down = state['avg_down'] * (1.0 - alpha) + np.maximum(-change, 0.0) * alpha
+        # Symbols bootstrapped with a short history seed once the window fills
+        moves = np.diff(window, axis=1)
+        seed = np.isnan(state['avg_up']) & ~np.isnan(moves).any(axis=1)
+        avg_up = np.where(seed, np.maximum(moves, 0.0).mean(axis=1), avg_up)
+        avg_down = np.where(seed, np.maximum(-moves, 0.0).mean(axis=1), avg_down)
+        value = indicators.rsi_from_averages(avg_up, avg_down)
+        state['avg_up'] = np.where(mask, avg_up, state['avg_up'])
+        state['avg_down'] = np.where(mask, avg_down, state['avg_down'])
+        state['window'] = window
+        return mask & (value < self.oversold), mask & (value > self.overbought)
+
+
+class BollingerSignals:
+    """
+    Signal kernel for BollingerBandsStrategy (band touch entries and exits)
+    """
+
+    strategy_name = 'BollingerBandsStrategy'
+
+    def __init__(self, bb_period=20, bb_dev=2):
+        self.bb_period = int(bb_period)
+        self.bb_dev = float(bb_dev)
+
+    @property
+    def window(self):
+        """Number of trailing closes kept in the state"""
+        return self.bb_period
+
+    @property
+    def minperiod(self):
+        """Index of the first bar on which the strategy's next() runs"""
+        return self.bb_period - 1
+
+    def signals(self, close, ind=indicators):
+        """
+        Compute entry and exit signals over a full history
+
+        Args:
+            close (numpy.ndarray): Close prices, time on the last axis
+            ind: Provider of the indicator functions, the indicators module
+                or a memoizing ensemble.SharedIndicators
+
+        Returns:
+            tuple: (entry, exit) boolean arrays
+        """
+        close = np.asarray(close, dtype=np.float64)
+        _, top, bot = ind.bollinger(close, self.bb_period, self.bb_dev)
+        return close <= bot, close >= top
+
+    def init_state(self, close, lengths=None):
+        """
+        Build the incremental state from a price history
+
+        Args:
+            close (numpy.ndarray): (symbols x bars) close prices, left aligned
+            lengths (numpy.ndarray): Number of bars per symbol (default: all)
+
+        Returns:
+            dict: State arrays
+        """
+        close, lengths = _left_aligned(close, lengths)
+        return {'window': _tail(close, self.window, lengths)}
+
+    def update(self, state, close, mask):
+        """
+        Advance the state by one bar and return the bar's signals
+
+        Args:
+            state (dict): State from init_state or a previous update
+            close (numpy.ndarray): Close price per symbol for the new bar
+            mask (numpy.ndarray): Symbols that have a bar today
+
+        Returns:
+            tuple: (entry, exit) boolean arrays
+        """
+        window = _push(state['window'], close, mask)
+        mid = window.mean(axis=1)
+        dev = np.sqrt(np.maximum((window * window).mean(axis=1) - mid * mid, 0.0))
+        state['window'] = window
+        return (mask & (close <= mid - self.bb_dev * dev),
+                mask & (close >= mid + self.bb_dev * dev))
+
+
+# Kernel mapping dictionary, keyed like STRATEGIES
+SIGNALS = {
+    'MAStrategy': MASignals,
+    'RSIStrategy': RSISignals,
+    'BollingerBandsStrategy': BollingerSignals,
+}
+
+
+def get_signal_kernel(strategy_name, **params):
+    """
+    Create the signal kernel for a strategy, using the strategy's defaults
+
+    Args:
+        strategy_name (str): Name of the strategy in STRATEGIES
+        **params: Strategy parameters overriding the defaults
+
+    Returns:
+        object: Signal kernel or None if the strategy has no kernel
+    """
+    if strategy_name not in SIGNALS or strategy_name not in STRATEGIES:
+        print(f"[ERROR] No signal kernel for strategy '{strategy_name}'. Available: {list(SIGNALS.keys())}")
+        return None
+    defaults = dict(STRATEGIES[strategy_name].params._getitems())
+    defaults.update(params)
+    return SIGNALS[strategy_name](**defaults)
+
+
+def replay_positions(entry, exit, open_, close, cash, start=0):
+    """
+    Replay the all-in/all-out order logic of the strategies over a history
+
+    Orders are created at the close of a signal bar and filled at the next
+    bar's open. A buy that no longer fits the cash at the open is rejected,
+    as Backtrader's broker does. Rows are independent accounts.
+
+    Args:
+        entry (numpy.ndarray): (rows x bars) entry signals
+        exit (numpy.ndarray): (rows x bars) exit signals
+        open_ (numpy.ndarray): (rows x bars) open prices
+        close (numpy.ndarray): (rows x bars) close prices
+        cash (float or numpy.ndarray): Starting cash per row
+        start (int): First bar on which orders may be created
+
+    Returns:
+        dict: Final 'cash', 'position' and 'pending' order size per row, and
+        the 'equity' matrix valued at each close (NaN before start)
+    """
+    entry = np.atleast_2d(entry)
+    exit = np.atleast_2d(exit)
+    open_ = np.atleast_2d(np.asarray(open_, dtype=np.float64))
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    rows, bars = close.shape
+    cash = np.broadcast_to(np.asarray(cash, dtype=np.float64), (rows,)).copy()
+    position = np.zeros(rows)
+    pending = np.zeros(rows)
+    equity = np.full((rows, bars), np.nan)
+
+    for t in range(bars):
+        fill_pending(pending, position, cash, open_[:, t])
+        if t < start:
+            continue
+        bar_close = close[:, t]
+        valid = ~np.isnan(bar_close)
+        create_orders(entry[:, t] & valid, exit[:, t] & valid, bar_close,
+                      pending, position, cash)
+        equity[:, t] = cash + position * bar_close
+    return {'cash': cash, 'position': position, 'pending': pending, 'equity': equity}
+
+
+def fill_pending(pending, position, cash, open_price):
+    """
+    Fill pending market orders at the open, in place
+
+    Args:
+        pending (numpy.ndarray): Signed order size per row, reset to 0
+        position (numpy.ndarray): Position size per row
+        cash (numpy.ndarray): Cash per row
+        open_price (numpy.ndarray): Open price per row
+    """
+    has_bar = ~np.isnan(open_price)
+    price = np.where(has_bar, open_price, 0.0)
+    cost = pending * price
+    buys = has_bar & (pending > 0) & (cost <= cash)
+    sells = has_bar & (pending < 0)
+    done = buys | sells
+    cash -= np.where(done, cost, 0.0)
+    position += np.where(done, pending, 0.0)
+    # Rejected buys are dropped, orders on symbols without a bar stay pending
+    pending[has_bar] = 0.0
+
+
+def create_orders(entry, exit, close_price, pending, position, cash):
+    """
+    Create the strategies' market orders for one bar, in place
+
+    Args:
+        entry (numpy.ndarray): Entry signal per row
+        exit (numpy.ndarray): Exit signal per row
+        close_price (numpy.ndarray): Close price per row
+        pending (numpy.ndarray): Signed pending order size per row
+        position (numpy.ndarray): Position size per row
+        cash (numpy.ndarray): Cash per row
+    """
+    flat = position == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        size = np.floor(np.where(cash > 0, cash, 0.0) / close_price)
+    buy = flat & entry & (size > 0)
+    sell = ~flat & exit
+    pending[buy] = size[buy]
+    pending[sell] = -position[sell]
+
+
+def _left_aligned(close, lengths):
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    if lengths is None:
+        lengths = np.full(close.shape[0], close.shape[-1])
+    return close, np.asarray(lengths, dtype=np.int64)
+
+
+def _last(values, lengths):
+    """Value at the last bar of each row, NaN for empty rows"""
+    rows = np.arange(values.shape[0])
+    out = values[rows, np.maximum(lengths - 1, 0)]
+    return np.where(lengths > 0, out, np.nan)
+
+
+def _tail(close, length, lengths):
+    """Last `length` closes of each row, left padded with NaN"""
+    offsets = np.arange(length) - length
+    cols = lengths[:, None] + offsets[None, :]
+    out = np.take_along_axis(close, np.maximum(cols, 0), axis=1)
+    return np.where(cols >= 0, out, np.nan)
+
+
+def _push(window, close, mask):
+    """Shift the window left by one bar for the rows in mask"""
+    shifted = np.empty_like(window)
+    shifted[:, :-1] = window[:, 1:]
+    shifted[:, -1] = close
+    return np.where(mask[:, None], shifted, window)
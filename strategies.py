@@ -1,25 +1,24 @@
 import backtrader as bt
+from trade_ledger import TradeLedger
 
-class MAStrategy(bt.Strategy):
+
+class BaseStrategy(bt.Strategy):
     """
-    Moving Average Crossover Strategy
-    Buys when short MA crosses above long MA
-    Sells when short MA crosses below long MA
+    Common order handling and bookkeeping shared by the strategies
+    Tracks portfolio values and dates per bar, fills and closed trades (in a
+    TradeLedger) and traded value
     """
-    params = (
-        ('short_window', 10),
-        ('long_window', 30),
-    )
     
     def __init__(self):
-        self.ma_short = bt.indicators.SimpleMovingAverage(
-            self.datas[0].close, period=self.params.short_window)
-        self.ma_long = bt.indicators.SimpleMovingAverage(
-            self.datas[0].close, period=self.params.long_window)
-        self.crossover = bt.indicators.CrossOver(self.ma_short, self.ma_long)
         self.order = None
         self.portfolio_values = []
         self.dates = []
+        self.ledger = TradeLedger()
+        self.opened_trades = 0
+        self.open_trade_bar = None
+        self.traded_value = 0.0
+        # Optional ArtifactWriter set on cerebro to stream equity and fills
+        self.artifact_writer = getattr(self.env, 'artifact_writer', None)
         
     def log(self, txt, dt=None):
         dt = dt or self.datas[0].datetime.date(0)
@@ -29,6 +28,16 @@ class MAStrategy(bt.Strategy):
         if order.status in [order.Submitted, order.Accepted]:
             return
         if order.status in [order.Completed]:
+            executed = order.executed
+            self.traded_value += abs(executed.size) * executed.price
+            self.ledger.add_fill(bt.num2date(executed.dt), len(self) - 1, executed.size,
+                                 executed.price, executed.value, executed.comm, executed.pnl)
+            if self.artifact_writer is not None:
+                self.artifact_writer.append(
+                    'trades', date=bt.num2date(executed.dt),
+                    side='BUY' if order.isbuy() else 'SELL',
+                    size=executed.size, price=executed.price, value=executed.value,
+                    commission=executed.comm, pnl=executed.pnl)
             if order.isbuy():
                 self.log(f'BUY EXECUTED, {order.executed.price:.2f}')
             elif order.issell():
@@ -37,6 +46,29 @@ class MAStrategy(bt.Strategy):
             self.log('Order Canceled/Margin/Rejected')
         self.order = None
     
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self.opened_trades += 1
+            self.open_trade_bar = len(self)
+            self.ledger.open_trade(trade.ref, trade.size)
+        elif trade.isclosed:
+            self.ledger.close_trade(
+                trade.ref, bt.num2date(trade.dtopen), bt.num2date(trade.dtclose),
+                trade.baropen - 1, trade.barclose - 1, trade.price,
+                trade.pnl, trade.pnlcomm, trade.commission)
+            self.open_trade_bar = None
+    
+    def record_value(self, date, value):
+        """Record the portfolio value at the end of a bar"""
+        self.portfolio_values.append(value)
+        self.dates.append(date)
+        if self.artifact_writer is not None:
+            self.artifact_writer.append('equity', date=date, portfolio_value=value)
+    
+    def stop(self):
+        if self.artifact_writer is not None:
+            self.artifact_writer.flush()
+    
     def get_portfolio_value(self):
         """Calculate current portfolio value including unrealized gains/losses"""
         cash = self.broker.getcash()
@@ -49,6 +81,26 @@ class MAStrategy(bt.Strategy):
             position_value = position_size * current_price
         
         return cash + position_value
+
+
+class MAStrategy(BaseStrategy):
+    """
+    Moving Average Crossover Strategy
+    Buys when short MA crosses above long MA
+    Sells when short MA crosses below long MA
+    """
+    params = (
+        ('short_window', 10),
+        ('long_window', 30),
+    )
+    
+    def __init__(self):
+        self.ma_short = bt.indicators.SimpleMovingAverage(
+            self.datas[0].close, period=self.params.short_window)
+        self.ma_long = bt.indicators.SimpleMovingAverage(
+            self.datas[0].close, period=self.params.long_window)
+        self.crossover = bt.indicators.CrossOver(self.ma_short, self.ma_long)
+        super().__init__()
         
     def next(self):
         if self.order:
@@ -73,8 +125,7 @@ class MAStrategy(bt.Strategy):
         current_date = self.datas[0].datetime.date(0)
         
         # Always track portfolio value for proper daily returns calculation
-        self.portfolio_values.append(current_value)
-        self.dates.append(current_date)
+        self.record_value(current_date, current_value)
         
         # Debug: Print portfolio value changes every 10 days
         if len(self.portfolio_values) % 10 == 0:
@@ -83,7 +134,7 @@ class MAStrategy(bt.Strategy):
                 self.log(f'Portfolio value: {current_value:.2f} (change: {change:+.2f})')
 
 
-class RSIStrategy(bt.Strategy):
+class RSIStrategy(BaseStrategy):
     """
     RSI Strategy
     Buys when RSI is oversold (< 30)
@@ -97,38 +148,7 @@ class RSIStrategy(bt.Strategy):
     
     def __init__(self):
         self.rsi = bt.indicators.RSI(self.datas[0].close, period=self.params.rsi_period)
-        self.order = None
-        self.portfolio_values = []
-        self.dates = []
-        
-    def log(self, txt, dt=None):
-        dt = dt or self.datas[0].datetime.date(0)
-        print(f'date:{dt.isoformat()}, {txt}')
-        
-    def notify_order(self, order):
-        if order.status in [order.Submitted, order.Accepted]:
-            return
-        if order.status in [order.Completed]:
-            if order.isbuy():
-                self.log(f'BUY EXECUTED, {order.executed.price:.2f}')
-            elif order.issell():
-                self.log(f'SELL EXECUTED, {order.executed.price:.2f}')
-        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.log('Order Canceled/Margin/Rejected')
-        self.order = None
-    
-    def get_portfolio_value(self):
-        """Calculate current portfolio value including unrealized gains/losses"""
-        cash = self.broker.getcash()
-        position_value = 0
-        
-        if self.position:
-            # Calculate current market value of position
-            current_price = self.data.close[0]
-            position_size = self.position.size
-            position_value = position_size * current_price
-        
-        return cash + position_value
+        super().__init__()
         
     def next(self):
         if self.order:
@@ -152,11 +172,10 @@ class RSIStrategy(bt.Strategy):
         current_value = self.get_portfolio_value()
         current_date = self.datas[0].datetime.date(0)
         
-        self.portfolio_values.append(current_value)
-        self.dates.append(current_date)
+        self.record_value(current_date, current_value)
 
 
-class BollingerBandsStrategy(bt.Strategy):
+class BollingerBandsStrategy(BaseStrategy):
     """
     Bollinger Bands Strategy
     Buys when price touches lower band
@@ -173,38 +192,7 @@ class BollingerBandsStrategy(bt.Strategy):
             period=self.params.bb_period, 
             devfactor=self.params.bb_dev
         )
-        self.order = None
-        self.portfolio_values = []
-        self.dates = []
-        
-    def log(self, txt, dt=None):
-        dt = dt or self.datas[0].datetime.date(0)
-        print(f'date:{dt.isoformat()}, {txt}')
-        
-    def notify_order(self, order):
-        if order.status in [order.Submitted, order.Accepted]:
-            return
-        if order.status in [order.Completed]:
-            if order.isbuy():
-                self.log(f'BUY EXECUTED, {order.executed.price:.2f}')
-            elif order.issell():
-                self.log(f'SELL EXECUTED, {order.executed.price:.2f}')
-        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.log('Order Canceled/Margin/Rejected')
-        self.order = None
-    
-    def get_portfolio_value(self):
-        """Calculate current portfolio value including unrealized gains/losses"""
-        cash = self.broker.getcash()
-        position_value = 0
-        
-        if self.position:
-            # Calculate current market value of position
-            current_price = self.data.close[0]
-            position_size = self.position.size
-            position_value = position_size * current_price
-        
-        return cash + position_value
+        super().__init__()
         
     def next(self):
         if self.order:
@@ -228,8 +216,68 @@ class BollingerBandsStrategy(bt.Strategy):
         current_value = self.get_portfolio_value()
         current_date = self.datas[0].datetime.date(0)
         
-        self.portfolio_values.append(current_value)
-        self.dates.append(current_date)
+        self.record_value(current_date, current_value)
+
+
+class MultiTimeframeMAStrategy(BaseStrategy):
+    """
+    Moving Average Crossover Strategy with a higher-timeframe trend filter
+    Buys when short MA crosses above long MA while the higher-timeframe close
+    (datas[1], weekly bars by default) is above its moving average
+    Sells when short MA crosses below long MA or the higher-timeframe trend turns
+    
+    BacktestEngine adds one feed per entry of the timeframes parameter,
+    resampled from the base data; each timeframe's indicators run on its own
+    bars, and a higher-timeframe bar is only seen once it has closed.
+    """
+    params = (
+        ('short_window', 10),
+        ('long_window', 30),
+        ('trend_window', 10),
+        ('timeframes', ('w',)),
+    )
+    
+    @classmethod
+    def timeframe_warmup(cls, **kwargs):
+        """Bars every higher-timeframe feed needs before the trend MA has a value"""
+        return kwargs.get('trend_window', cls.params.trend_window)
+    
+    def __init__(self):
+        if len(self.datas) < 2:
+            raise ValueError("MultiTimeframeMAStrategy needs a higher-timeframe feed (see 'timeframes')")
+        self.ma_short = bt.indicators.SimpleMovingAverage(
+            self.datas[0].close, period=self.params.short_window)
+        self.ma_long = bt.indicators.SimpleMovingAverage(
+            self.datas[0].close, period=self.params.long_window)
+        self.crossover = bt.indicators.CrossOver(self.ma_short, self.ma_long)
+        self.trend_ma = bt.indicators.SimpleMovingAverage(
+            self.datas[1].close, period=self.params.trend_window)
+        super().__init__()
+        
+    def next(self):
+        if self.order:
+            return
+        
+        trend_up = self.datas[1].close[0] > self.trend_ma[0]
+        if not self.position:
+            if self.crossover > 0 and trend_up:
+                # Buy with all available cash
+                cash = self.broker.getcash()
+                if cash > 0:
+                    size = int(cash / self.data.close[0])
+                    if size > 0:
+                        self.log(f'BUY CREATE {self.data.close[0]:.2f} (trend MA: {self.trend_ma[0]:.2f}) - {size} shares')
+                        self.order = self.buy(size=size)
+        elif self.crossover < 0 or not trend_up:
+            # Sell entire position
+            self.log(f'SELL CREATE {self.data.close[0]:.2f} - {self.position.size} shares')
+            self.order = self.sell(size=self.position.size)
+        
+        # Track portfolio value and date at the end of each bar (after potential trades)
+        current_value = self.get_portfolio_value()
+        current_date = self.datas[0].datetime.date(0)
+        
+        self.record_value(current_date, current_value)
 
 
 # Strategy mapping dictionary
@@ -237,4 +285,5 @@ STRATEGIES = {
     'MAStrategy': MAStrategy,
     'RSIStrategy': RSIStrategy,
     'BollingerBandsStrategy': BollingerBandsStrategy,
+    'MultiTimeframeMAStrategy': MultiTimeframeMAStrategy,
 } 
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweeps with results in the SQLite result store
+
+Every combination of a parameter grid is backtested in a pool of worker
+processes. The parent loads the price data once and publishes it in shared
+memory (see shared_data.py); workers attach to it, preload the Backtrader
+feed once (see feed_cache.py) and return their run records to the parent,
+which writes them to the ResultStore in batches (one executemany
+transaction per batch). With profile set, every job is profiled in its
+worker and the parent folds the profiles of each batch into one running
+total (see profiling.py).
+
+Sweep config (JSON), like the backtest configs but with a grid:
+{
+    "stock_code": "sh.603259",
+    "start_date": "2022-02-01",
+    "end_date": "2025-08-01",
+    "strategy": "RSIStrategy",
+    "initial_cash": 100000,
+    "param_grid": {"rsi_period": [10, 14, 20], "oversold": [25, 30]}
+}
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backtest import BacktestEngine, load_config
+from data_fetcher import DataFetcher
+from feed_cache import FeedCache
+from resampler import base_path, periods_per_year, resample
+from result_db import ResultStore, code_version, data_hash
+from shared_data import SharedDataPlane, attach
+from strategies import STRATEGIES
+
+
+def param_grid(grid):
+    """
+    Expand a grid into parameter dicts
+
+    Args:
+        grid (dict): Parameter name -> list of values
+
+    Returns:
+        list: One dict per combination
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+# Per-worker state set by _init_worker
+_worker = {}
+
+
+def _init_worker(handle, digest, initial_cash, artifact_root, profile=None):
+    _worker.update(df=attach(handle), data_hash=digest, initial_cash=initial_cash,
+                   artifact_root=artifact_root, profile=profile, feed_cache=FeedCache())
+
+
+def _run_one(job):
+    """Backtest one parameter set and return its run record"""
+    config, params, index = job
+    df = _worker['df']
+    artifact_dir = None
+    if _worker['artifact_root']:
+        artifact_dir = os.path.join(_worker['artifact_root'], f"{config['strategy']}_{index:06d}")
+    engine = BacktestEngine(start_cash=_worker['initial_cash'], use_analyzers=False,
+                            artifact_dir=artifact_dir, feed_cache=_worker['feed_cache'],
+                            periods_per_year=periods_per_year(config.get('data_frequency', 'd')))
+    strategy_cls = STRATEGIES[config['strategy']]
+    profiler = None
+    if _worker['profile']:
+        from profiling import RunProfiler
+        profiler = RunProfiler(_worker['profile'])
+        strategy_cls = profiler.wrap_strategy(strategy_cls)
+    with contextlib.redirect_stdout(io.StringIO()), profiler or contextlib.nullcontext():
+        _, _, results = engine.run_backtest(strategy_cls, df, **params)
+    record = {
+        'strategy': config['strategy'],
+        'stock_code': config.get('stock_code'),
+        'start_date': config.get('start_date'),
+        'end_date': config.get('end_date'),
+        'params': params,
+        'config': dict(config, strategy_params=params),
+        'data_hash': _worker['data_hash'],
+        'artifact_dir': artifact_dir,
+        'metrics': engine.compute_run_metrics(results[0], len(df)),
+    }
+    if profiler is not None:
+        record['profile'] = profiler.result()
+    return record
+
+
+def run_sweep(config, data_path, db_path="results/results.db", workers=None, batch_size=200,
+              artifact_root=None, profile=None, profile_dir="profiles"):
+    """
+    Backtest every parameter combination and store the results
+
+    Args:
+        config (dict): Sweep config with 'strategy', 'param_grid' and the
+            usual stock/period/cash keys
+        data_path (str): CSV with the base series, resampled to the config's
+            data_frequency
+        db_path (str): ResultStore database
+        workers (int): Worker processes (default: CPU count)
+        batch_size (int): Runs written per database transaction
+        artifact_root (str): Also stream each run's artifacts below this directory
+        profile (str): 'cprofile' or 'sample' to profile every job; the merged
+            profile is written to profile_dir/<strategy>_sweep
+        profile_dir (str): Directory for profile output
+
+    Returns:
+        int: Number of runs stored
+    """
+    combos = param_grid(config.get('param_grid', {}))
+    jobs = [(config, params, i) for i, params in enumerate(combos)]
+    version = code_version()
+    workers = workers or os.cpu_count()
+    print(f"[INFO] Sweeping {len(jobs)} parameter sets of {config['strategy']} with {workers} workers")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataFetcher().load_data_from_csv(data_path)
+    df = resample(df, config.get('data_frequency', 'd'))
+    stored = 0
+    batch = []
+    # Profiles of the current batch and the running total of earlier ones
+    profiles = []
+    profiled = 0
+    merged = None
+    with SharedDataPlane() as plane, ResultStore(db_path) as store, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(plane.publish(data_path, df), data_hash(df), config.get('initial_cash', 100000),
+                      artifact_root, profile)) as pool:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        for record in pool.map(_run_one, jobs, chunksize=chunksize):
+            record['code_version'] = version
+            if 'profile' in record:
+                profiles.append(record.pop('profile'))
+            batch.append(record)
+            if len(batch) >= batch_size:
+                stored += store.add_runs(batch)
+                batch = []
+                merged, profiled, profiles = _fold_profiles(merged, profiled, profiles)
+        if batch:
+            stored += store.add_runs(batch)
+        merged, profiled, profiles = _fold_profiles(merged, profiled, profiles)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] Stored {stored} runs in {db_path} ({elapsed:.1f}s, {stored / max(elapsed, 1e-9):.1f} runs/s)")
+    if merged is not None:
+        from profiling import write_profile
+        paths = write_profile(merged, os.path.join(profile_dir, f"{config['strategy']}_sweep"))
+        print(f"[INFO] Profile of {profiled} runs saved to {os.path.dirname(paths['top'])}")
+    return stored
+
+
+def _fold_profiles(merged, profiled, profiles):
+    """Add a batch of job profiles to the running total; returns (merged, profiled, [])"""
+    if not profiles:
+        return merged, profiled, profiles
+    from profiling import merge_profiles
+    return merge_profiles(([merged] if merged is not None else []) + profiles), profiled + len(profiles), []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parameter sweep into the result store")
+    parser.add_argument("config", help="Sweep configuration file with a param_grid")
+    parser.add_argument("--db", default="results/results.db", help="Result database")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--artifacts", default=None, help="Directory for per-run artifacts")
+    parser.add_argument("--top", type=int, default=10, help="Print the best N runs by Sharpe")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "sample"],
+                        help="Profile every run and merge the profiles across workers")
+    parser.add_argument("--profile-dir", default="profiles", help="Directory for profile output")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if config is None:
+        return
+    data_path = base_path(config)
+    if not os.path.exists(data_path):
+        print(f"[ERROR] Data file not found: {data_path}")
+        return
+
+    run_sweep(config, data_path, db_path=args.db, workers=args.workers, artifact_root=args.artifacts,
+              profile=args.profile, profile_dir=args.profile_dir)
+    with ResultStore(args.db) as store:
+        top = store.top_runs('sharpe_ratio', n=args.top, strategy=config['strategy'],
+                             stock_code=config['stock_code'])
+    print(top[['id', 'params', 'sharpe_ratio', 'total_return', 'max_drawdown']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for columnar run artifacts
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from artifacts import ArtifactWriter, export_excel, load_strategy_frame, read_table
+from backtest import BacktestEngine
+from data_fetcher import DataFetcher
+from strategies import RSIStrategy
+
+
+def test_backtest_streams_artifacts():
+    """Equity and fills written during the run match the strategy's records"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataFetcher().load_data_from_csv('data/600600_2020-04-01_2025-04-01.csv')
+
+    for fmt in ('parquet', 'feather'):
+        with tempfile.TemporaryDirectory() as run_dir:
+            engine = BacktestEngine(use_analyzers=False, artifact_dir=run_dir, artifact_format=fmt)
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, _, results = engine.run_backtest(RSIStrategy, df)
+            strat = results[0]
+
+            equity = read_table(run_dir, 'equity')
+            assert np.allclose(equity['portfolio_value'], strat.portfolio_values)
+            assert list(equity['date'].dt.date) == list(strat.dates)
+
+            trades = read_table(run_dir, 'trades')
+            assert len(trades) == len(strat.ledger.fills)
+            assert set(trades['side']) <= {'BUY', 'SELL'}
+            assert read_table(run_dir, 'benchmark') is None
+
+            frame = load_strategy_frame(run_dir)
+            assert np.isclose(frame['Cumulative_Return'].iloc[-1],
+                              strat.portfolio_values[-1] / strat.portfolio_values[0])
+    print("✓ Backtest artifacts match the recorded equity and trades")
+
+
+def test_writer_blocks_benchmark_and_excel():
+    """Rows are written in blocks; benchmark merges by date; Excel export round-trips"""
+    dates = pd.bdate_range('2022-01-03', periods=25)
+    with tempfile.TemporaryDirectory() as run_dir:
+        with ArtifactWriter(run_dir, block_size=10) as writer:
+            for i, date in enumerate(dates):
+                writer.append('equity', date=date.date(), portfolio_value=100.0 + i)
+            writer.append_frame('benchmark', pd.DataFrame({'date': dates[::2], 'close': 10.0}))
+
+        equity = read_table(run_dir, 'equity')
+        assert len(equity) == len(dates)
+        frame = load_strategy_frame(run_dir)
+        assert frame['CSI300_Close'].notna().sum() == len(dates[::2])
+
+        path = export_excel(frame, os.path.join(run_dir, 'export.xlsx'))
+        exported = load_strategy_frame(path)
+        assert list(exported.columns) == list(frame.columns)
+        assert np.allclose(exported['Portfolio_Value'], frame['Portfolio_Value'])
+    print("✓ Block writes, benchmark merge and Excel export")
+
+
+if __name__ == "__main__":
+    test_backtest_streams_artifacts()
+    test_writer_blocks_benchmark_and_excel()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the long-running backtest service
+"""
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+from backtest_service import BacktestService, create_server
+
+CONFIG = {
+    "stock_code": "sh.600600",
+    "start_date": "2020-04-01",
+    "end_date": "2021-04-01",
+    "strategy": "MAStrategy",
+    "initial_cash": 100000,
+    "strategy_params": {"short_window": 10, "long_window": 30},
+}
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_http_backtest_and_sweep():
+    """Backtests and sweeps run on the warm pool and match the engine's results"""
+    service = BacktestService(workers=1, preload=[CONFIG])
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        status, first = _post(url + "/backtest", dict(CONFIG, include_equity=True))
+        assert status == 200, first
+        status, second = _post(url + "/backtest", CONFIG)
+        assert status == 200
+        assert first['metrics'] == second['metrics']
+        assert first['final_value'] == second['final_value']
+        assert len(first['equity']['values']) == len(first['equity']['dates']) > 0
+        # Data was parsed when the worker started
+        assert second['timings']['load_seconds'] < 0.01
+
+        status, sweep = _post(url + "/sweep", dict(CONFIG, param_grid={"short_window": [5, 10],
+                                                                       "long_window": [20, 30]}))
+        assert status == 200
+        assert sweep['count'] == 4
+        sharpes = [run['metrics']['sharpe_ratio'] for run in sweep['runs']]
+        assert sharpes == sorted(sharpes, reverse=True)
+        match = next(run for run in sweep['runs'] if run['params'] == CONFIG['strategy_params'])
+        assert match['metrics'] == first['raw_metrics']
+
+        status, error = _post(url + "/backtest", dict(CONFIG, strategy="Nope"))
+        assert status == 400 and "not found" in error['error']
+        with urllib.request.urlopen(url + "/health") as response:
+            health = json.load(response)
+        assert health['requests'] == {'backtest': 3, 'sweep': 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+    print("✓ HTTP backtest and sweep")
+
+
+def test_unix_socket():
+    """The service also answers on a Unix domain socket"""
+    service = BacktestService(workers=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'backtest.sock')
+        server = create_server(service, unix_socket=path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(path)
+                client.sendall(b"GET /health HTTP/1.0\r\n\r\n")
+                response = b""
+                while chunk := client.recv(65536):
+                    response += chunk
+            head, body = response.split(b"\r\n\r\n", 1)
+            assert head.startswith(b"HTTP/1.0 200")
+            assert json.loads(body)['status'] == 'ok'
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+    print("✓ Unix socket")
+
+
+if __name__ == "__main__":
+    test_http_backtest_and_sweep()
+    test_unix_socket()
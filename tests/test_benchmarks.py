@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the performance benchmark suite
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.suite import (run_suite, save_results, synthetic_ohlcv, bundled_datasets,
+                              DEFAULT_MAX_BACKTEST_BARS, DEFAULT_SIZES)
+from strategies import STRATEGIES
+
+
+def test_synthetic_series_is_reproducible():
+    """The same seed gives the same bars, with consistent highs and lows"""
+    a = synthetic_ohlcv(5000, seed=7)
+    b = synthetic_ohlcv(5000, seed=7)
+    assert a.equals(b)
+    assert not a.equals(synthetic_ohlcv(5000, seed=8))
+    assert (a['high'] >= a[['open', 'close']].max(axis=1)).all()
+    assert (a['low'] <= a[['open', 'close']].min(axis=1)).all()
+    assert a.index.is_monotonic_increasing
+    print("✓ Seeded synthetic series")
+
+
+def test_suite_results():
+    """Every benchmark reports its times and throughput and the report is JSON"""
+    report = run_suite(sizes=[600], repeat=2, bundled=False, strategies=['MAStrategy'],
+                       log=lambda message: None)
+    names = [entry['name'] for entry in report['results']]
+    assert names == ['csv_read', 'load_data_from_csv', 'backtest/MAStrategy', 'analyzers/MAStrategy',
+                     'metrics', 'performance_analyzer', 'plot']
+    for entry in report['results']:
+        assert entry['dataset'] == 'synthetic-600'
+        assert len(entry['times']) == 2
+        assert entry['median_seconds'] == np.median(entry['times'])
+        assert entry['bars_per_second'] > 0
+    assert report['results'][0]['bars'] == 600
+    assert report['environment']['pandas']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_results(report, output_dir=tmp)
+        assert os.path.dirname(path) == tmp
+        with open(path) as f:
+            assert json.load(f)['config']['sizes'] == [600]
+    print("✓ Suite results")
+
+
+def test_every_strategy_at_default_sizes():
+    """All strategies run (or are skipped with a warning) at every default size that is backtested"""
+    sizes = [n for n in DEFAULT_SIZES if n <= DEFAULT_MAX_BACKTEST_BARS]
+    messages = []
+    report = run_suite(sizes=sizes, repeat=1, bundled=False, benchmarks=('backtest',), log=messages.append)
+    names = {(entry['name'], entry['dataset']) for entry in report['results']}
+    for n_bars in sizes:
+        for name in STRATEGIES:
+            skipped = any(f"Skipping backtest/{name} on synthetic-{n_bars}" in m for m in messages)
+            assert skipped != ((f"backtest/{name}", f"synthetic-{n_bars}") in names), (name, n_bars)
+    # A few weeks of minute bars are too short for the weekly trend MA
+    assert any("Skipping backtest/MultiTimeframeMAStrategy" in m for m in messages)
+    print("✓ Every strategy at the default sizes")
+
+
+def test_bundled_datasets():
+    """Only price files in the DataFetcher layout are benchmarked"""
+    names = [name for name, _ in bundled_datasets()]
+    assert 'data/600600_2020-04-01_2021-04-01.csv' in names
+    assert not any('kline_info' in name or '_SH_' in name for name in names)
+    print("✓ Bundled datasets")
+
+
+if __name__ == "__main__":
+    test_synthetic_series_is_reproducible()
+    test_suite_results()
+    test_every_strategy_at_default_sizes()
+    test_bundled_datasets()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized candlestick renderer
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from candlestick import plot_kline
+from indicators import sma
+
+
+def make_bars(n_days, seed=11):
+    """Random daily OHLCV bars with a 'date' column"""
+    rng = np.random.default_rng(seed)
+    close = 50 + np.cumsum(rng.normal(0, 0.5, n_days))
+    open_ = close + rng.normal(0, 0.3, n_days)
+    return pd.DataFrame({
+        'date': pd.bdate_range('2020-01-01', periods=n_days),
+        'open': open_,
+        'high': np.maximum(open_, close) + 0.5,
+        'low': np.minimum(open_, close) - 0.5,
+        'close': close,
+        'volume': rng.integers(1000, 5000, n_days).astype(float),
+    })
+
+
+def test_kline_uses_collections():
+    """Five years of candles are a few collections, not artists per bar"""
+    df = make_bars(1250)
+    fig, ax, vol_ax = plot_kline(df, volume=True, mav=(5, 20), max_bars=2000)
+    bodies, wicks = ax.collections[1], ax.collections[0]
+    assert len(ax.collections) == 2 and len(ax.patches) == 0
+    assert len(bodies.get_paths()) == len(df)
+    assert len(wicks.get_segments()) == len(df)
+    assert len(vol_ax.collections) == 1
+    assert len(ax.lines) == 2
+
+    # Wick spans low..high, body spans open..close
+    segment = wicks.get_segments()[10]
+    assert np.isclose(segment[0, 1], df['low'].iloc[10]) and np.isclose(segment[1, 1], df['high'].iloc[10])
+    body = bodies.get_paths()[10].vertices[:4, 1]
+    assert np.isclose(body.min(), min(df['open'].iloc[10], df['close'].iloc[10]))
+    assert np.isclose(body.max(), max(df['open'].iloc[10], df['close'].iloc[10]))
+    ylim = ax.get_ylim()
+    assert ylim[0] <= df['low'].min() and ylim[1] >= df['high'].max()
+    fig.canvas.draw()
+    plt.close(fig)
+    print("✓ Candlestick chart drawn from collections")
+
+
+def test_kline_capitalized_columns_and_line():
+    """readdata-style frames (capitalized columns, date index) are accepted"""
+    df = make_bars(100).rename(columns=str.capitalize)
+    df.index = pd.DatetimeIndex(df['Date'])
+    fig, ax, vol_ax = plot_kline(df, kind='line', volume=False)
+    assert vol_ax is None and len(ax.lines) == 1
+    plt.close(fig)
+    print("✓ Line chart from capitalized columns")
+
+
+def test_moving_averages_use_trading_days():
+    """Moving averages of merged candles are taken from the daily closes"""
+    df = make_bars(1250)
+    fig, ax, _ = plot_kline(df, volume=False, mav=(20,), max_bars=300)
+    line = ax.lines[0].get_ydata()
+    assert len(line) == len(ax.collections[1].get_paths()) == 250
+    # Every merged candle ends on its fifth bar
+    np.testing.assert_allclose(line, sma(df['close'], 20)[4::5])
+    plt.close(fig)
+    print("✓ Moving averages over trading days")
+
+
+if __name__ == "__main__":
+    test_kline_uses_collections()
+    test_kline_capitalized_columns_and_line()
+    test_moving_averages_use_trading_days()
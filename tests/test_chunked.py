@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for out-of-core chunked processing
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from chunked import csv_partitions, iter_chunks, iter_periods, rolling_apply, scan, screen, SeriesStats
+from data_fetcher import DataFetcher
+from metrics import compute_metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAILY = os.path.join(ROOT, 'data', '600600_2020-04-01_2025-04-01.csv')
+
+
+def _load(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataFetcher().load_data_from_csv(path)
+
+
+def _five_minute_csv(path, days=30):
+    """Baostock-style 5-minute CSV as DataFetcher.save_data writes it"""
+    times = []
+    for day in pd.bdate_range('2024-01-02', periods=days):
+        times += list(pd.date_range(day + pd.Timedelta('9h35min'), day + pd.Timedelta('11h30min'), freq='5min'))
+        times += list(pd.date_range(day + pd.Timedelta('13h05min'), day + pd.Timedelta('15h'), freq='5min'))
+    close = 10 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.002, len(times))))
+    index = pd.DatetimeIndex(times)
+    pd.DataFrame({'date': index.strftime('%Y-%m-%d'), 'time': index.strftime('%Y%m%d%H%M%S000'),
+                  'code': 'sh.600600', 'open': close, 'high': close, 'low': close, 'close': close,
+                  'volume': 100}).to_csv(path, index=False)
+    return len(times)
+
+
+def test_chunks_match_full_load():
+    """Chunked reads and rolling indicators equal the in-memory results"""
+    df = _load(DAILY)
+    chunks = list(iter_chunks(DAILY, chunksize=100))
+    assert len(chunks) == -(-len(df) // 100)
+    pd.testing.assert_frame_equal(pd.concat([chunk for chunk, _ in chunks]), df)
+
+    sma = pd.concat(rolling_apply(DAILY, lambda bars: indicators.sma(bars['close'], 20), lookback=19, chunksize=100))
+    np.testing.assert_allclose(sma.to_numpy(), indicators.sma(df['close'], 20), equal_nan=True)
+    assert sma.index.equals(df.index)
+    print("✓ Chunks match the full load")
+
+
+def test_periods_and_stats():
+    """Days stay whole across chunk boundaries and streaming stats equal compute_metrics"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, '600600_2024-01-01_2024-03-01_5min.csv')
+        rows = _five_minute_csv(path)
+        days = list(iter_periods(path, 'd', chunksize=37))
+        assert len(days) == 30 and all(len(day) == 48 for day in days)
+        assert sum(len(day) for day in days) == rows
+        # 2024-01-02 is a Tuesday: 4 + 5 * 5 + 1 trading days
+        assert [len(week) // 48 for week in iter_periods(path, 'w', chunksize=37)] == [4, 5, 5, 5, 5, 5, 1]
+
+    stats = SeriesStats()
+    for chunk, _ in iter_chunks(DAILY, chunksize=77):
+        stats.update(chunk['close'].to_numpy())
+    expected = compute_metrics(_load(DAILY)['close'].to_numpy())
+    for key, value in stats.result().items():
+        if key != 'bars':
+            assert np.isclose(value, expected[key]), key
+    print("✓ Date partitions and streaming stats")
+
+
+def test_scan_and_screen():
+    """Partitions are scanned in worker processes and screened by query"""
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(DAILY, tmp)
+        shutil.copy(os.path.join(ROOT, 'data', '603259_2022-02-01_2025-08-01.csv'), tmp)
+        _five_minute_csv(os.path.join(tmp, '600600_2024-01-01_2024-03-01_5min.csv'))
+        pd.DataFrame({'x': [1]}).to_csv(os.path.join(tmp, 'notes.csv'))
+
+        partitions = csv_partitions(tmp)
+        assert [p.frequency for p in partitions] == ['d', '5', 'd']
+        assert [p.symbol for p in csv_partitions(tmp, 'd')] == ['600600', '603259']
+
+        table = scan(partitions, chunksize=250, workers=2)
+        assert list(table.index) == [p.key for p in partitions]
+        assert table.loc['600600_2020-04-01_2025-04-01', 'bars'] == len(_load(DAILY))
+        best = table['total_return'].idxmax()
+        picked = screen(partitions, f"total_return >= {table['total_return'].max()}", chunksize=250, workers=2)
+        assert list(picked.index) == [best]
+    print("✓ Scan and screen")
+
+
+if __name__ == "__main__":
+    test_chunks_match_full_load()
+    test_periods_and_stats()
+    test_scan_and_screen()
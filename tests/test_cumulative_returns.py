@@ -47,5 +47,35 @@ def test_cumulative_returns():
     except Exception as e:
         print(f"✗ Plot function failed: {e}")
 
+def test_benchmark_alignment_and_batch():
+    """Benchmark is aligned by date and the batch API matches the single-run API"""
+    analyzer = PerformanceAnalyzer()
+    dates = pd.to_datetime(['2020-01-02', '2020-01-03', '2020-01-07', '2020-01-08'])
+    portfolio_values = np.array([100.0, 102.0, 101.0, 105.0])
+    
+    # Benchmark misses 2020-01-07 and has an extra day before the start
+    benchmark_data = pd.DataFrame({
+        'close': [10.0, 11.0, 12.0, 13.0]
+    }, index=pd.to_datetime(['2019-12-31', '2020-01-02', '2020-01-03', '2020-01-08']))
+    
+    cumulative_portfolio, cumulative_benchmark = analyzer.calculate_cumulative_returns(
+        portfolio_values, benchmark_data, dates
+    )
+    assert np.allclose(cumulative_portfolio, portfolio_values / portfolio_values[0])
+    assert np.allclose(cumulative_benchmark, np.array([11.0, 12.0, 12.0, 13.0]) / 11.0)
+    
+    # Trading days before the benchmark's first close stay empty
+    late = benchmark_data.loc['2020-01-03':]
+    aligned = analyzer.align_benchmark(late, len(dates), dates)
+    assert np.isnan(aligned[0])
+    assert np.allclose(aligned[1:], np.array([12.0, 12.0, 13.0]) / 12.0)
+    
+    curves = np.vstack([portfolio_values, portfolio_values[::-1]])
+    cumulative, daily = analyzer.calculate_cumulative_returns_batch(curves)
+    assert cumulative.shape == (2, 4) and daily.shape == (2, 3)
+    assert np.allclose(cumulative[0], cumulative_portfolio)
+    print("✓ Benchmark alignment and batch returns work correctly")
+
 if __name__ == "__main__":
-    test_cumulative_returns() 
\ No newline at end of file
+    test_cumulative_returns()
+    test_benchmark_alignment_and_batch() 
\ No newline at end of file
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for plot downsampling
+"""
+
+import numpy as np
+import pandas as pd
+
+from downsample import downsample_indices, downsample_ohlc, lttb_indices, minmax_indices
+
+
+def test_downsample_keeps_extremes():
+    """Downsampled curves keep the endpoints, extremes and drawdown trough"""
+    rng = np.random.default_rng(5)
+    equity = 100 * np.cumprod(1 + rng.normal(0, 0.002, 200000))
+    benchmark = 100 * np.cumprod(1 + rng.normal(0, 0.002, 200000))
+    trough = np.argmax(np.maximum.accumulate(equity) - equity)
+
+    for method in ('lttb', 'minmax'):
+        keep = downsample_indices(np.vstack([equity, benchmark]), max_points=2000, method=method)
+        assert len(keep) <= 2000 + 8
+        assert keep[0] == 0 and keep[-1] == len(equity) - 1
+        assert np.all(np.diff(keep) > 0)
+        assert trough in keep
+        assert equity[keep].min() == equity.min() and equity[keep].max() == equity.max()
+        assert benchmark[keep].min() == benchmark.min() and benchmark[keep].max() == benchmark.max()
+
+    assert len(downsample_indices(equity[:500], max_points=2000)) == 500
+    assert list(lttb_indices(np.arange(10.0), 5)) == [0, 1, 3, 6, 9]
+    assert list(minmax_indices(np.array([1, 5, 2, 0, 3, 4, 9, 1.0]), 2)) == [0, 1, 3, 6, 7]
+    print("✓ Downsampling keeps extremes")
+
+
+def test_downsample_ohlc():
+    """Merged candles keep the price range and total volume"""
+    n = 10000
+    rng = np.random.default_rng(1)
+    close = 50 + np.cumsum(rng.normal(0, 0.1, n))
+    df = pd.DataFrame({
+        'open': close + rng.normal(0, 0.05, n),
+        'high': close + 0.2,
+        'low': close - 0.2,
+        'close': close,
+        'volume': rng.integers(100, 1000, n).astype(float),
+    }, index=pd.date_range('2020-01-01 09:30', periods=n, freq='min'))
+
+    merged = downsample_ohlc(df, max_bars=600)
+    assert len(merged) <= 600
+    assert merged['high'].max() == df['high'].max()
+    assert merged['low'].min() == df['low'].min()
+    assert merged['volume'].sum() == df['volume'].sum()
+    assert merged['open'].iloc[0] == df['open'].iloc[0]
+    assert merged['close'].iloc[-1] == df['close'].iloc[-1]
+    assert len(downsample_ohlc(df.iloc[:100], max_bars=600)) == 100
+    print("✓ OHLC bars merged")
+
+
+if __name__ == "__main__":
+    test_downsample_keeps_extremes()
+    test_downsample_ohlc()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for ensemble runs
+"""
+
+import contextlib
+import io
+import os
+import time
+
+import numpy as np
+
+from backtest import BacktestEngine
+from data_fetcher import DataFetcher
+from ensemble import EnsembleEngine, print_ensemble
+from strategies import STRATEGIES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEMBERS = (
+    [{'strategy': 'MAStrategy', 'strategy_params': {'short_window': s, 'long_window': l}}
+     for s, l in ((5, 20), (10, 30), (5, 30), (10, 20))]
+    + [{'strategy': 'RSIStrategy', 'strategy_params': {'oversold': o}} for o in (20, 30, 35)]
+    + [{'strategy': 'BollingerBandsStrategy', 'strategy_params': {'bb_dev': d}} for d in (1.5, 2, 2.5)]
+)
+
+
+def _daily():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataFetcher().load_data_from_csv(os.path.join(ROOT, 'data', '600600_2020-04-01_2025-04-01.csv'))
+
+
+def _backtrader(df, member):
+    engine = BacktestEngine(use_analyzers=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, _, results = engine.run_backtest(STRATEGIES[member['strategy']], df,
+                                            **member.get('strategy_params', {}))
+    return engine.compute_run_metrics(results[0], len(df)), results[0]
+
+
+def _assert_same(expected, actual):
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert np.isclose(actual[key], value, rtol=1e-9, equal_nan=True), (key, value, actual[key])
+        else:
+            assert actual[key] == value, (key, value, actual[key])
+
+
+def test_members_match_backtrader():
+    """Every member's metrics and equity equal a separate Backtrader run"""
+    df = _daily()
+    members = list(MEMBERS) + [{'strategy': 'MultiTimeframeMAStrategy', 'name': 'mtf'}]
+    engine = EnsembleEngine()
+    results = engine.run(df, members)
+    assert [row['engine'] for row in results] == ['vectorized'] * len(MEMBERS) + ['backtrader']
+    assert results[-1]['name'] == 'mtf'
+    for member, row in zip(members, results):
+        raw, strat = _backtrader(df, member)
+        _assert_same(raw, row['metrics'])
+        np.testing.assert_allclose(row['equity'][-len(strat.portfolio_values):], strat.portfolio_values)
+    # SMA(20) is shared by two MA members and the Bollinger members, RSI(14) by all RSI members
+    assert engine.shared.hits >= 8
+    print("✓ Ensemble members match Backtrader")
+
+
+def test_members_match_backtrader_with_gap():
+    """A missing close propagates through the kernels exactly as in Backtrader"""
+    df = _daily().copy()
+    df.iloc[300, df.columns.get_loc('close')] = np.nan
+    results = EnsembleEngine().run(df, list(MEMBERS))
+    for member, row in zip(MEMBERS, results):
+        raw, _ = _backtrader(df, member)
+        _assert_same(raw, row['metrics'])
+    print("✓ Ensemble members match Backtrader across a gap")
+
+
+def test_ensemble_costs_about_one_run():
+    """A dozen members take less time than a single Cerebro run"""
+    df = _daily()
+    members = list(MEMBERS) + [{'strategy': 'RSIStrategy', 'strategy_params': {'overbought': o}}
+                               for o in (65, 75)]
+    start = time.perf_counter()
+    EnsembleEngine().run(df, members)
+    ensemble_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _backtrader(df, members[0])
+    single_seconds = time.perf_counter() - start
+    print(f"{len(members)} members: {ensemble_seconds:.3f}s, one Backtrader run: {single_seconds:.3f}s")
+    assert ensemble_seconds < single_seconds
+    print("✓ Ensemble cost")
+
+
+def test_ranking_keeps_zero_returns():
+    """A member that never trades (0.0 return) ranks above losing members"""
+    rows = [{'name': name, 'engine': 'vectorized', 'metrics': {'total_return': value}}
+            for name, value in (('loser', -0.2), ('idle', 0.0), ('missing', None), ('winner', 0.1))]
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        print_ensemble(rows)
+    names = [line.split()[0] for line in out.getvalue().splitlines()[3:-1]]
+    assert names == ['winner', 'idle', 'loser', 'missing'], names
+    print("✓ Ensemble ranking")
+
+
+if __name__ == "__main__":
+    test_members_match_backtrader()
+    test_members_match_backtrader_with_gap()
+    test_ensemble_costs_about_one_run()
+    test_ranking_keeps_zero_returns()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the end-of-day signal pipeline
+"""
+
+import contextlib
+import io
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from eod_pipeline import EODPipeline
+from signals import get_signal_kernel, replay_positions
+
+CONFIGS = [
+    {'strategy': 'MAStrategy', 'strategy_params': {'short_window': 5, 'long_window': 20}, 'initial_cash': 100000},
+    {'strategy': 'RSIStrategy', 'strategy_params': {}, 'initial_cash': 100000},
+    {'strategy': 'BollingerBandsStrategy', 'strategy_params': {}, 'initial_cash': 100000},
+]
+
+
+def make_history(n_symbols, n_days, seed=42):
+    """Random-walk OHLC history with a different length per symbol"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=n_days)
+    history = {}
+    for i in range(n_symbols):
+        start = int(rng.integers(0, n_days // 4))
+        close = 50 + np.cumsum(rng.normal(0, 1, n_days - start))
+        close = np.maximum(close, 1.0)
+        history[f"sh.{600000 + i}"] = pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.005, len(close))),
+            'close': close,
+        }, index=dates[start:])
+    return history
+
+
+def test_eod_step_matches_full_replay():
+    """Bootstrapping up to day T-k and stepping k days equals replaying to day T"""
+    history = make_history(20, 300)
+    steps = 5
+    with tempfile.TemporaryDirectory() as state_dir:
+        pipeline = EODPipeline(CONFIGS, state_dir=state_dir)
+        pipeline.bootstrap({code: df.iloc[:-steps] for code, df in history.items()})
+
+        for k in range(steps, 0, -1):
+            rows = [(code, df.index[-k], df['open'].iloc[-k], df['close'].iloc[-k])
+                    for code, df in history.items()]
+            bars = pd.DataFrame(rows, columns=['code', 'date', 'open', 'close'])
+            pipeline.run(bars)
+
+        for config in CONFIGS:
+            kernel = get_signal_kernel(config['strategy'], **config['strategy_params'])
+            saved = pipeline._load_state(config)
+            for row, code in enumerate(saved['codes']):
+                df = history[code]
+                entry, exit_ = kernel.signals(df['close'].to_numpy())
+                full = replay_positions(entry, exit_, df['open'].to_numpy(), df['close'].to_numpy(),
+                                        100000.0, start=kernel.minperiod)
+                assert np.isclose(saved['cash'][row], full['cash'][0])
+                assert saved['position'][row] == full['position'][0]
+                assert saved['pending'][row] == full['pending'][0]
+    print("✓ EOD state matches a full replay")
+
+
+def test_eod_warns_about_codes_without_state():
+    """Codes that were not bootstrapped are reported instead of dropped silently"""
+    history = make_history(3, 100)
+    with tempfile.TemporaryDirectory() as state_dir:
+        pipeline = EODPipeline(CONFIGS[:1], state_dir=state_dir)
+        pipeline.bootstrap(history)
+        bars = pd.DataFrame({'code': list(history) + ['sz.000001'], 'date': pd.Timestamp('2030-01-02'),
+                             'open': 50.0, 'close': 51.0})
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            pipeline.run(bars)
+        assert "[WARNING] 1 codes have no saved state" in out.getvalue() and 'sz.000001' in out.getvalue()
+        assert 'sz.000001' not in pipeline._load_state(CONFIGS[0])['codes']
+    print("✓ Codes without state are reported")
+
+
+def test_eod_universe_latency():
+    """A 5000-symbol EOD step stays well inside the one minute budget"""
+    history = make_history(5000, 120, seed=7)
+    with tempfile.TemporaryDirectory() as state_dir:
+        pipeline = EODPipeline(CONFIGS, state_dir=state_dir)
+        pipeline.bootstrap(history)
+        bars = pd.DataFrame({
+            'code': list(history),
+            'date': pd.Timestamp('2030-01-02'),
+            'open': 50.0,
+            'close': 51.0,
+        })
+        start = time.perf_counter()
+        pipeline.run(bars)
+        elapsed = time.perf_counter() - start
+        pipeline.report_timings()
+    print(f"5000-symbol EOD step: {elapsed:.3f}s")
+    assert elapsed < 60
+
+
+if __name__ == "__main__":
+    test_eod_step_matches_full_replay()
+    test_eod_warns_about_codes_without_state()
+    test_eod_universe_latency()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the feature store
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DataFetcher
+from feature_store import build_universe, feature_feed, FeatureStore, FEATURES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAILY = os.path.join(ROOT, 'data', '600600_2020-04-01_2025-04-01.csv')
+
+
+def _daily():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataFetcher().load_data_from_csv(DAILY)
+
+
+class _Reader(bt.Strategy):
+    """Records the features a strategy sees through feature_feed"""
+
+    def __init__(self):
+        self.bb_mid = bt.indicators.BollingerBands(self.data.close, period=20, devfactor=2.0).mid
+        self.ema = bt.indicators.EMA(self.data.close, period=26)
+        self.rsi = bt.indicators.RSI(self.data.close, period=14)
+        self.seen = []
+
+    def next(self):
+        self.seen.append((self.data.bb_mid_20[0], self.bb_mid[0], self.data.ema_26[0], self.ema[0],
+                          self.data.rsi_14[0], self.rsi[0]))
+
+
+def test_incremental_update_matches_build():
+    """Appending bars day by day gives the same file as a full build"""
+    df = _daily()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(tmp)
+        store.build('full', df)
+        # Starts shorter than every window, then grows in steps
+        store.build('incremental', df.iloc[:10])
+        for end in (25, 40, 70, 300, 301, 302, len(df)):
+            store.update('incremental', df.iloc[:end])
+        assert store.update('incremental', df) == 0
+        full = store.read('full', align=False)
+        incremental = store.read('incremental', align=False)
+        pd.testing.assert_frame_equal(full, incremental, check_exact=False, rtol=1e-9)
+        assert list(full.columns) == FEATURES and full.index.equals(df.index)
+        assert np.isnan(full['sma_60'].iloc[58]) and not np.isnan(full['sma_60'].iloc[59])
+    print("✓ Incremental updates match a full build")
+
+
+def test_gap_in_closes():
+    """A missing close only affects the bars around it, in builds and updates alike"""
+    df = _daily()
+    df.iloc[5, df.columns.get_loc('close')] = np.nan
+    df.iloc[400, df.columns.get_loc('close')] = np.nan
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(tmp)
+        store.build('full', df)
+        store.build('incremental', df.iloc[:10])
+        for end in (30, 399, 400, 401, 402, 600, len(df)):
+            store.update('incremental', df.iloc[:end])
+        full = store.read('full', align=False)
+        incremental = store.read('incremental', align=False)
+        pd.testing.assert_frame_equal(full, incremental, check_exact=False, rtol=1e-9)
+        for name in ('ema_12', 'ema_26', 'rsi_14'):
+            assert full[name].iloc[-100:].notna().all(), name
+        # The EMA holds its value over the gap
+        assert full['ema_12'].iloc[400] == full['ema_12'].iloc[399]
+    print("✓ Gaps in the closes")
+
+
+def test_features_match_backtrader():
+    """Stored features equal Backtrader's indicators when read in a strategy"""
+    df = _daily()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(tmp)
+        store.build('600600', df)
+        cerebro = bt.Cerebro()
+        cerebro.adddata(feature_feed(store.with_features('600600', df, ['bb_mid_20', 'ema_26', 'rsi_14']),
+                                     ['bb_mid_20', 'ema_26', 'rsi_14']))
+        cerebro.addstrategy(_Reader)
+        seen = np.array(cerebro.run()[0].seen)
+        np.testing.assert_allclose(seen[:, 0], seen[:, 1])
+        np.testing.assert_allclose(seen[:, 2], seen[:, 3])
+        np.testing.assert_allclose(seen[:, 4], seen[:, 5])
+        try:
+            store.read('600600', ['sma_7'])
+            raise AssertionError("unknown feature accepted")
+        except KeyError:
+            pass
+    print("✓ Features match Backtrader")
+
+
+def test_universe_build_and_panel():
+    """The batch job builds every symbol and panels align on the calendar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        for name in ('600600_2020-04-01_2021-04-01.csv', '600600_2020-04-01_2025-04-01.csv',
+                     '603259_2022-02-01_2025-08-01.csv'):
+            shutil.copy(os.path.join(ROOT, 'data', name), data_dir)
+        root = os.path.join(tmp, 'features')
+        rows = build_universe(root, data_dir, workers=2)
+        df = _daily()
+        assert rows['600600'] == len(df)
+        store = FeatureStore(root)
+        assert store.symbols() == ['600600', '603259']
+
+        panel = store.panel('rsi_14', start='2022-01-01')
+        assert list(panel.columns) == ['600600', '603259']
+        assert panel.index.equals(store.calendar[store.calendar >= '2022-01-01'])
+        # 603259 starts in February 2022; 600600 ends in April 2025
+        assert panel['603259'].loc[:'2022-01-31'].isna().all()
+        assert panel['600600'].loc['2025-04-02':].isna().all() and panel['603259'].loc['2025-04-02':].notna().any()
+
+        # New bars arrive as the EOD pipeline downloads them
+        last = store.calendar[-1] + pd.Timedelta(days=3)
+        added = store.update_bars(pd.DataFrame({'date': [last.strftime('%Y-%m-%d')], 'code': ['sh.603259'],
+                                                'close': ['80.5'], 'volume': ['1000']}))
+        assert added == {'603259': 1} and store.calendar[-1] == last
+        assert store.read('603259', ['close']).iloc[-1, 0] == 80.5
+    print("✓ Universe build and panels")
+
+
+if __name__ == "__main__":
+    test_incremental_update_matches_build()
+    test_gap_in_closes()
+    test_features_match_backtrader()
+    test_universe_build_and_panel()
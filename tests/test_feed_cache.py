@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the preloaded feed cache
+"""
+
+import contextlib
+import io
+import os
+
+import backtrader as bt
+
+from backtest import BacktestEngine
+from data_fetcher import DataFetcher
+from feed_cache import FeedCache
+from strategies import STRATEGIES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataFetcher().load_data_from_csv(os.path.join(ROOT, 'data', '600600_2020-04-01_2021-04-01.csv'))
+
+
+def _run(engine, df, strategy='MAStrategy', **params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics, cerebro, results = engine.run_backtest(STRATEGIES[strategy], df, **params)
+    return metrics, list(results[0].portfolio_values)
+
+
+def test_cached_runs_match_plain_runs():
+    """Runs on cached feeds give the same results as fresh PandasData feeds"""
+    df = _load()
+    cache = FeedCache()
+    plain = BacktestEngine()
+    cached = BacktestEngine(feed_cache=cache)
+    for strategy, params in [('MAStrategy', {'short_window': 10, 'long_window': 30}),
+                             ('MAStrategy', {'short_window': 5, 'long_window': 20}),
+                             ('RSIStrategy', {})]:
+        assert _run(cached, df, strategy, **params) == _run(plain, df, strategy, **params)
+    assert (cache.misses, cache.hits, len(cache)) == (1, 2, 1)
+    print("✓ Cached runs match plain runs")
+
+
+def test_cache_keys():
+    """Entries follow the DataFrame object, or an explicit key"""
+    df = _load()
+    cache = FeedCache(max_entries=2)
+    engine = BacktestEngine(feed_cache=cache)
+    baseline = _run(engine, df, short_window=10, long_window=30)
+
+    changed = df.copy()
+    changed['close'] = changed['close'] * 1.1
+    assert _run(engine, changed, short_window=10, long_window=30) != baseline
+    assert cache.hits == 0 and cache.misses == 2
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(cache.feed(df, key=('sh.600600', '2020-04-01', '2021-04-01')))
+    cerebro.adddata(cache.feed(df.copy(), key=('sh.600600', '2020-04-01', '2021-04-01')))
+    cerebro.run()
+    assert cache.hits == 1 and len(cache) == 2
+    assert list(cerebro.datas[0].close.array) == list(cerebro.datas[1].close.array)
+    print("✓ Cache keys")
+
+
+def test_filtered_feeds_load_normally():
+    """Resampled feeds bypass the cache and still load every bar"""
+    df = _load()
+    cache = FeedCache()
+    weeks = []
+    for feed in (bt.feeds.PandasData(dataname=df), cache.feed(df), cache.feed(df)):
+        cerebro = bt.Cerebro()
+        cerebro.resampledata(feed, timeframe=bt.TimeFrame.Weeks)
+        cerebro.run()
+        weeks.append(list(cerebro.datas[0].close.array))
+    assert weeks[0] == weeks[1] == weeks[2] and 40 < len(weeks[0]) < 60
+    print("✓ Filtered feeds load normally")
+
+
+if __name__ == "__main__":
+    test_cached_runs_match_plain_runs()
+    test_cache_keys()
+    test_filtered_feeds_load_normally()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for run instrumentation
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestEngine
+from instrumentation import Instrumentation, prometheus_text
+from strategies import STRATEGIES
+
+
+def _prices(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.005, n)),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1000, 5000, n).astype(float),
+    }, index=pd.bdate_range('2021-01-04', periods=n))
+
+
+def test_nested_phases_and_memory():
+    """Nested phases get path names, accumulate calls and report traced peaks"""
+    inst = Instrumentation(trace_memory=True, labels={'strategy': 'Test'})
+    try:
+        with inst.phase('outer'):
+            for _ in range(2):
+                with inst.phase('inner') as timer:
+                    block = np.ones(2_000_000)
+                    del block
+            assert timer.seconds is not None
+        record = inst.record()
+    finally:
+        inst.stop()
+
+    assert set(record['phases']) == {'outer', 'outer/inner'}
+    assert record['phases']['outer/inner']['calls'] == 2
+    assert record['phases']['outer']['seconds'] >= record['phases']['outer/inner']['seconds']
+    # 16 MB array allocated inside the inner phase, credited to the outer one too
+    assert record['phases']['outer/inner']['tracemalloc_peak_bytes'] >= 16_000_000
+    assert record['phases']['outer']['tracemalloc_peak_bytes'] >= 16_000_000
+    assert record['tracemalloc']['top']
+    print("✓ Nested phases and tracemalloc peaks")
+
+
+def test_prometheus_format():
+    """Samples carry the run labels and escape label values"""
+    record = {
+        'labels': {'strategy': 'RSI "fast"'},
+        'phases': {'run': {'seconds': 1.5, 'cpu_seconds': 1.25, 'calls': 1}},
+        'counters': {'bars': 244},
+        'gauges': {'bars_per_second': 162.5},
+        'peak_rss_bytes': 1024,
+        'total_seconds': 2.0,
+    }
+    text = prometheus_text(record)
+    assert 'backtest_phase_seconds{phase="run",strategy="RSI \\"fast\\""} 1.5' in text
+    assert '# TYPE backtest_bars_total counter' in text
+    assert 'backtest_bars_per_second{strategy="RSI \\"fast\\""} 162.5' in text
+    assert 'tracemalloc' not in text
+    print("✓ Prometheus textfile format")
+
+
+def test_engine_counts_bars_and_orders():
+    """The engine records its phases, bars and orders and writes both outputs"""
+    df = _prices()
+    inst = Instrumentation(labels={'strategy': 'MAStrategy'})
+    engine = BacktestEngine(use_analyzers=False, instrumentation=inst)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, cerebro, results = engine.run_backtest(STRATEGIES['MAStrategy'], df,
+                                                  short_window=5, long_window=20)
+
+    assert {'setup', 'run', 'metrics'} <= set(inst.phases)
+    assert inst.counters['bars'] == len(df)
+    assert inst.counters['orders'] == len(cerebro.broker.orders) > 0
+    assert inst.counters['fills'] == len(results[0].ledger.fills)
+    assert inst.gauges['bars_per_second'] > 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = inst.write_json(os.path.join(tmp, 'metrics', 'run.json'))
+        prom_path = inst.write_prometheus(os.path.join(tmp, 'metrics', 'run.prom'))
+        with open(json_path) as f:
+            assert json.load(f)['counters']['bars'] == len(df)
+        with open(prom_path) as f:
+            assert f'backtest_bars_total{{strategy="MAStrategy"}} {len(df)}' in f.read()
+        assert sorted(os.listdir(os.path.join(tmp, 'metrics'))) == ['run.json', 'run.prom']
+    print("✓ Engine bar and order counts")
+
+
+if __name__ == "__main__":
+    test_nested_phases_and_memory()
+    test_prometheus_format()
+    test_engine_counts_bars_and_orders()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script for the lazy imports of the backtest CLI
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(args):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, text=True,
+                          timeout=300)
+
+
+def test_import_skips_heavy_modules():
+    """Importing the engine does not load matplotlib, baostock or the result database"""
+    code = ("import sys, backtest, data_fetcher, performance_analyzer; "
+            "print(','.join(m for m in ('matplotlib', 'baostock', 'artifacts', 'result_db') "
+            "if m in sys.modules))")
+    result = _run(["-c", code])
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+    print("✓ No plotting or download modules loaded on import")
+
+
+def test_cli_without_plots_or_benchmark():
+    """A cached run with --no-plot --no-benchmark completes without matplotlib"""
+    code = ("import sys, backtest; "
+            "sys.argv = ['backtest.py', 'configs/config.json', '--headless', '--no-plot', '--no-benchmark']; "
+            "backtest.main(); "
+            "print('loaded:', [m for m in ('matplotlib', 'baostock') if m in sys.modules])")
+    result = _run(["-c", code])
+    assert result.returncode == 0, result.stderr
+    assert "BACKTEST RESULTS" in result.stdout
+    assert "Plots skipped" in result.stdout
+    assert "loaded: []" in result.stdout
+    print("✓ Headless run without plots or benchmark")
+
+
+if __name__ == "__main__":
+    test_import_skips_heavy_modules()
+    test_cli_without_plots_or_benchmark()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the lightweight metrics mode
+"""
+
+import contextlib
+import io
+
+import numpy as np
+
+from backtest import BacktestEngine
+from data_fetcher import DataFetcher
+from metrics import compute_metrics, longest_run
+from strategies import STRATEGIES
+
+
+def test_metrics_match_analyzers():
+    """Metrics from recorded arrays equal the Backtrader analyzer values"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataFetcher().load_data_from_csv('data/600600_2020-04-01_2025-04-01.csv')
+
+    for name, strategy_cls in STRATEGIES.items():
+        engine = BacktestEngine(use_analyzers=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            metrics, cerebro, results = engine.run_backtest(strategy_cls, df)
+        strat = results[0]
+        raw = engine.compute_run_metrics(strat, len(df))
+
+        sharpe = strat.analyzers.sharpe.get_analysis()['sharperatio']
+        drawdown = strat.analyzers.drawdown.get_analysis()['max']['drawdown'] / 100
+        annual = strat.analyzers.returns.get_analysis()['rnorm']
+        trades = strat.analyzers.trades.get_analysis()
+        assert np.isclose(raw['sharpe_ratio'], sharpe)
+        assert np.isclose(raw['max_drawdown'], drawdown)
+        assert np.isclose(raw['annual_return'], annual)
+        assert raw['total_trades'] == trades['total']['total']
+        assert raw['winning_trades'] == trades['won']['total']
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            light, _, light_results = BacktestEngine(use_analyzers=False).run_backtest(strategy_cls, df)
+        assert not light_results[0].analyzers
+        assert light == metrics
+        print(f"✓ {name}: lightweight metrics match analyzers")
+
+
+def test_compute_metrics_basic():
+    """Known equity curve gives the expected drawdown, return and streaks"""
+    equity = [100.0, 110.0, 99.0, 121.0]
+    trades = [(10.0, 10.0, 3), (-5.0, -5.0, 2), (-1.0, -1.0, 1), (4.0, 4.0, 4)]
+    metrics = compute_metrics(equity, start_value=100.0, trades=trades)
+    assert np.isclose(metrics['max_drawdown'], 0.1)
+    assert np.isclose(metrics['total_return'], 0.21)
+    assert metrics['longest_lose_streak'] == 2
+    assert metrics['exposure'] == 1.0
+    assert longest_run(np.array([True, True, False, True])) == 2
+    print("✓ compute_metrics basic values")
+
+
+if __name__ == "__main__":
+    test_metrics_match_analyzers()
+    test_compute_metrics_basic()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-timeframe backtests
+"""
+
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestEngine
+from data_fetcher import DataFetcher
+from feed_cache import FeedCache
+from resampler import resample
+from strategies import STRATEGIES, MultiTimeframeMAStrategy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Probe(MultiTimeframeMAStrategy):
+    """Records what each bar of the base timeframe sees of the higher one"""
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def next(self):
+        self.seen.append((self.datas[0].datetime.datetime(0), self.datas[1].datetime.datetime(0),
+                          self.datas[1].close[0], self.trend_ma[0]))
+        super().next()
+
+
+def _run(engine, df, strategy=_Probe, **params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics, cerebro, results = engine.run_backtest(strategy, df, **params)
+    return metrics, cerebro, results[0]
+
+
+def _check_no_lookahead(seen, higher, trend_window):
+    for base_time, higher_time, close, trend in seen:
+        closed = higher[higher.index <= pd.Timestamp(base_time)]
+        assert higher_time <= base_time
+        assert close == closed['close'].iloc[-1]
+        assert np.isclose(trend, closed['close'].iloc[-trend_window:].mean())
+
+
+def test_daily_with_weekly_trend():
+    """Weekly bars come from the daily series and only appear once their week has closed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataFetcher().load_data_from_csv(os.path.join(ROOT, 'data', '600600_2020-04-01_2025-04-01.csv'))
+    _, cerebro, strat = _run(BacktestEngine(), df)
+    assert len(cerebro.datas) == 2 and len(cerebro.datas[1]) == len(resample(df, 'w'))
+    _check_no_lookahead(strat.seen, resample(df, 'w'), 10)
+    # Mid-week days still see the previous week
+    assert any(higher < base for base, higher, _, _ in strat.seen)
+
+    # The timeframes parameter is overridable like any other
+    _, cerebro, strat = _run(BacktestEngine(), df, timeframes=('m',), trend_window=3)
+    _check_no_lookahead(strat.seen, resample(df, 'm'), 3)
+    assert 'MultiTimeframeMAStrategy' in STRATEGIES
+    print("✓ Daily bars with a weekly trend")
+
+
+def test_intraday_with_daily_trend():
+    """30-minute bars with daily bars resampled from the same 5-minute base"""
+    times = []
+    for day in pd.bdate_range('2024-01-02', periods=40):
+        times += list(pd.date_range(day + pd.Timedelta('9h35min'), day + pd.Timedelta('11h30min'), freq='5min'))
+        times += list(pd.date_range(day + pd.Timedelta('13h05min'), day + pd.Timedelta('15h'), freq='5min'))
+    rng = np.random.default_rng(3)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.003, len(times))))
+    base = pd.DataFrame({'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+                         'volume': 1000.0}, index=pd.DatetimeIndex(times, name='date'))
+    bars = resample(base, 30)
+
+    cache = FeedCache()
+    engine = BacktestEngine(use_analyzers=False, feed_cache=cache)
+    params = dict(short_window=4, long_window=8, trend_window=3, timeframes=('d',))
+    metrics, cerebro, strat = _run(engine, bars, **params)
+    daily = resample(bars, 'd', keep_time=True)
+    assert all(t.strftime('%H:%M') == '15:00' for t in daily.index)
+    _check_no_lookahead(strat.seen, daily, 3)
+
+    # A second run reuses both preloaded feeds
+    assert _run(engine, bars, **params)[0] == metrics
+    assert cache.hits == 2 and cache.misses == 2
+    print("✓ Intraday bars with a daily trend")
+
+
+if __name__ == "__main__":
+    test_daily_with_weekly_trend()
+    test_intraday_with_daily_trend()
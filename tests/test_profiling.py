@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the profiling capture mode
+"""
+
+import contextlib
+import io
+import pstats
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestEngine
+from profiling import RunProfiler, merge_profiles, write_profile, histogram_percentile
+from strategies import STRATEGIES
+
+
+def _prices(n=400, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': np.full(n, 1000.0),
+    }, index=pd.bdate_range('2021-01-04', periods=n))
+
+
+def _profiled_run(mode, df):
+    profiler = RunProfiler(mode, interval=0.001)
+    strategy_cls = profiler.wrap_strategy(STRATEGIES['RSIStrategy'])
+    engine = BacktestEngine(use_analyzers=False)
+    with contextlib.redirect_stdout(io.StringIO()), profiler:
+        _, _, results = engine.run_backtest(strategy_cls, df, rsi_period=14)
+    return profiler.result(), results[0]
+
+
+def test_profile_run_outputs():
+    """A cProfile run writes pstats, collapsed stacks, a top-N report and the next() histogram"""
+    df = _prices()
+    result, strat = _profiled_run('cprofile', df)
+    assert type(strat).__name__ == 'RSIStrategy'
+    assert isinstance(strat, STRATEGIES['RSIStrategy'])
+    # next() runs once per bar after the RSI warmup
+    assert result['next']['RSIStrategy']['calls'] == len(strat.portfolio_values)
+    assert sum(result['next']['RSIStrategy']['counts']) == len(strat.portfolio_values)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_profile(result, tmp, top_n=10)
+        assert set(paths) == {'prof', 'collapsed', 'top', 'next_histogram', 'next_json'}
+        stats = pstats.Stats(paths['prof'])
+        assert any(func[2] == 'next' and 'strategies.py' in func[0] for func in stats.stats)
+        with open(paths['collapsed']) as f:
+            lines = f.read().splitlines()
+        assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        # Stacks start at the function running the profiled block
+        assert all(line.startswith('test_profiling.py:_profiled_run;') for line in lines)
+        with open(paths['top']) as f:
+            report = f.read()
+        assert 'top 10 by tottime' in report and 'Samples' in report
+    print("✓ Profile outputs written")
+
+
+def test_merge_profiles():
+    """Merged profiles add up calls, samples and histogram counts"""
+    df = _prices()
+    first, _ = _profiled_run('sample', df)
+    second, _ = _profiled_run('cprofile', df)
+    merged = merge_profiles([first, second])
+    assert first['stats'] is None
+    assert merged['stats'] is not None
+    assert sum(merged['stacks'].values()) == sum(first['stacks'].values()) + sum(second['stacks'].values())
+    summary = merged['next']['RSIStrategy']
+    assert summary['calls'] == first['next']['RSIStrategy']['calls'] * 2
+    assert summary['counts'] == [a + b for a, b in zip(first['next']['RSIStrategy']['counts'],
+                                                       second['next']['RSIStrategy']['counts'])]
+    assert histogram_percentile(summary['counts'], 50) <= histogram_percentile(summary['counts'], 99)
+    print("✓ Profiles merged across runs")
+
+
+if __name__ == "__main__":
+    test_profile_run_outputs()
+    test_merge_profiles()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the performance regression tracker
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.regression import compare_reports, format_report, main
+from benchmarks.suite import save_results
+
+
+def _report(medians, noise=0.02, repeat=9, seed=0, version='abc'):
+    rng = np.random.default_rng(seed)
+    results = []
+    for (name, dataset), median in medians.items():
+        times = median * (1 + rng.normal(0, noise, repeat))
+        results.append({'name': name, 'dataset': dataset, 'bars': 1000, 'repeat': repeat,
+                        'times': times.tolist(), 'median_seconds': float(np.median(times)),
+                        'min_seconds': float(times.min()), 'bars_per_second': 1000 / float(np.median(times))})
+    environment = {'code_version': version, 'timestamp': '2025-01-01T00:00:00', 'machine': 'ci',
+                   'cpu_count': 4, 'python': '3.11', 'numpy': '2', 'pandas': '2', 'backtrader': '1.9'}
+    return {'environment': environment, 'config': {}, 'results': results}
+
+
+BASE = {
+    ('load_data_from_csv', 'synthetic-1000'): 0.05,
+    ('backtest/RSIStrategy', 'synthetic-1000'): 0.30,
+    ('backtest/MAStrategy', 'synthetic-1000'): 0.30,
+    ('performance_analyzer', 'synthetic-1000'): 0.20,
+    ('metrics', 'synthetic-1000'): 0.0004,
+}
+
+
+def _statuses(rows):
+    return {(row['name'], row['dataset']): row['status'] for row in rows}
+
+
+def test_flags_slowdowns_beyond_noise():
+    """A halved throughput is a regression, run-to-run noise is not"""
+    current = dict(BASE)
+    current[('backtest/RSIStrategy', 'synthetic-1000')] = 0.60
+    current[('performance_analyzer', 'synthetic-1000')] = 0.10
+    # Tiny benchmarks doubling by a fraction of a millisecond stay ok
+    current[('metrics', 'synthetic-1000')] = 0.0008
+    rows = compare_reports(_report(BASE, seed=1), _report(current, seed=2))
+    statuses = _statuses(rows)
+    assert statuses[('backtest/RSIStrategy', 'synthetic-1000')] == 'regression'
+    assert statuses[('backtest/MAStrategy', 'synthetic-1000')] == 'ok'
+    assert statuses[('load_data_from_csv', 'synthetic-1000')] == 'ok'
+    assert statuses[('performance_analyzer', 'synthetic-1000')] == 'improvement'
+    assert statuses[('metrics', 'synthetic-1000')] == 'ok'
+    row = next(r for r in rows if r['name'] == 'backtest/RSIStrategy')
+    assert row['ci_low'] <= row['change'] <= row['ci_high']
+    assert abs(row['change'] - 1.0) < 0.1
+    print("✓ Slowdowns flagged beyond noise")
+
+
+def test_noisy_change_is_unclear():
+    """A median shift inside a wide confidence interval is not reported as a regression"""
+    base = {('backtest/MAStrategy', 'synthetic-1000'): 0.30}
+    slower = {('backtest/MAStrategy', 'synthetic-1000'): 0.36}
+    rows = compare_reports(_report(base, noise=0.3, repeat=5, seed=3),
+                           _report(slower, noise=0.3, repeat=5, seed=4))
+    assert rows[0]['status'] in ('unclear', 'ok')
+    assert rows[0]['ci_high'] - rows[0]['ci_low'] > 0.2
+    print("✓ Noisy changes are not regressions")
+
+
+def test_report_and_cli():
+    """The CLI stores a baseline, writes the diff report and fails on regressions"""
+    current = dict(BASE)
+    current[('backtest/RSIStrategy', 'synthetic-1000')] = 0.60
+    current[('plot', 'synthetic-1000')] = 0.25
+    baseline, report = _report(BASE, seed=1), _report(current, seed=2, version='def')
+    report['environment']['cpu_count'] = 8
+
+    text = format_report(compare_reports(baseline, report), baseline, report)
+    assert "REGRESSION: backtest/RSIStrategy [synthetic-1000]" in text
+    assert "cpu_count differs" in text
+    assert "1 new" in text and "== backtest ==" in text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = save_results(baseline, os.path.join(tmp, 'base_report.json'))
+        new_path = save_results(report, os.path.join(tmp, 'new_report.json'))
+        baseline_path = os.path.join(tmp, 'baseline.json')
+        assert main(['record', '--baseline', baseline_path, '--results', base_path]) == 0
+        assert main(['compare', '--baseline', baseline_path, '--results', base_path]) == 0
+        report_path = os.path.join(tmp, 'diff.md')
+        assert main(['compare', '--baseline', baseline_path, '--results', new_path,
+                     '--report', report_path, '--markdown']) == 1
+        with open(report_path) as f:
+            assert '| backtest/RSIStrategy | synthetic-1000 |' in f.read()
+        # A looser threshold accepts the slowdown
+        assert main(['compare', '--baseline', baseline_path, '--results', new_path,
+                     '--threshold', '150']) == 0
+    print("✓ Diff report and CLI")
+
+
+if __name__ == "__main__":
+    test_flags_slowdowns_beyond_noise()
+    test_noisy_change_is_unclear()
+    test_report_and_cli()
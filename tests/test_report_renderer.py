@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for headless batch chart rendering
+"""
+
+import os
+import tempfile
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from report_renderer import render_runs
+
+
+def make_runs(n_runs, n_days=250, seed=3):
+    """Random equity curves with a shared benchmark"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2021-01-01', periods=n_days)
+    benchmark = np.cumprod(1 + rng.normal(0, 0.01, n_days))
+    return [{
+        'dates': dates,
+        'portfolio_values': 100000 * np.cumprod(1 + rng.normal(0.0005, 0.01, n_days)),
+        'benchmark': benchmark if i % 2 == 0 else None,
+        'strategy_name': 'RSIStrategy',
+        'stock_code': f"sh.{600000 + i}",
+    } for i in range(n_runs)]
+
+
+def test_render_runs_parallel():
+    """Runs are rendered by worker processes into one file each"""
+    runs = make_runs(6)
+    with tempfile.TemporaryDirectory() as output_dir:
+        paths = render_runs(runs, output_dir=output_dir, fmt='png', workers=2)
+        assert len(paths) == len(runs)
+        assert len(set(paths)) == len(runs)
+        for path in paths:
+            assert os.path.getsize(path) > 0
+    print(f"✓ Rendered {len(runs)} charts in parallel")
+
+
+def test_render_runs_svg_in_process():
+    """SVG output works without worker processes and keeps the caller's backend"""
+    runs = make_runs(2)
+    backend = matplotlib.get_backend()
+    matplotlib.use('svg', force=True)
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            paths = render_runs(runs, output_dir=output_dir, fmt='svg', workers=0)
+            for path in paths:
+                with open(path) as f:
+                    assert '<svg' in f.read(2000)
+        assert matplotlib.get_backend().lower() == 'svg'
+    finally:
+        matplotlib.use(backend, force=True)
+    print("✓ Rendered SVG charts in-process")
+
+
+if __name__ == "__main__":
+    test_render_runs_parallel()
+    test_render_runs_svg_in_process()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the local resampler
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DataFetcher
+from resampler import base_frequency, base_path, load_bars, parse_frequency, periods_per_year, resample
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAILY = os.path.join(ROOT, 'data', '600600_2020-04-01_2025-04-01.csv')
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+
+def _daily():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataFetcher().load_data_from_csv(DAILY)
+
+
+def _five_minute(days=('2024-01-02', '2024-01-03')):
+    """Baostock-style 5-minute bars labeled by their end time"""
+    times = []
+    for day in days:
+        day = pd.Timestamp(day)
+        times += list(pd.date_range(day + pd.Timedelta('9h35min'), day + pd.Timedelta('11h30min'), freq='5min'))
+        times += list(pd.date_range(day + pd.Timedelta('13h05min'), day + pd.Timedelta('15h'), freq='5min'))
+    n = len(times)
+    close = 10 + np.cumsum(np.sin(np.arange(n)) * 0.05)
+    return pd.DataFrame({'code': 'sh.600600', 'open': close - 0.01, 'high': close + 0.05,
+                         'low': close - 0.05, 'close': close, 'volume': np.arange(1, n + 1) * 100.0},
+                        index=pd.DatetimeIndex(times, name='date'))
+
+
+def test_weekly_and_monthly():
+    """Calendar bars match a pandas groupby and carry the last trading day"""
+    df = _daily()
+    for frequency, period in (('w', 'W'), ('m', 'M')):
+        bars = resample(df, frequency)
+        groups = df.groupby(df.index.to_period(period))
+        expected = groups.agg(open=('open', 'first'), high=('high', 'max'), low=('low', 'min'),
+                              close=('close', 'last'), volume=('volume', 'sum'))
+        np.testing.assert_allclose(bars[OHLCV].to_numpy(), expected[OHLCV].to_numpy())
+        assert list(bars.index) == [group.index[-1] for _, group in groups]
+    # A week cut short by a holiday ends on its last trading day (2020-04-30, Labour Day week)
+    assert pd.Timestamp('2020-04-30') in resample(df, 'w').index
+    assert resample(df, 'd') is df
+    print("✓ Weekly and monthly bars")
+
+
+def test_minute_bars():
+    """N-minute bars restart at each session open and never cross the lunch break"""
+    df = _five_minute()
+    bars = resample(df, 30)
+    assert len(bars) == 16
+    labels = [t.strftime('%H:%M') for t in bars.index[:8]]
+    assert labels == ['10:00', '10:30', '11:00', '11:30', '13:30', '14:00', '14:30', '15:00']
+    assert bars['volume'].sum() == df['volume'].sum()
+    assert bars['open'].iloc[4] == df['open'].iloc[24] and bars['close'].iloc[3] == df['close'].iloc[23]
+
+    # 45 minutes do not divide a 120-minute session; the last bar of each session is shorter
+    assert [t.strftime('%H:%M') for t in resample(df, '45min').index[:6]] == \
+        ['10:15', '11:00', '11:30', '13:45', '14:30', '15:00']
+
+    daily = resample(df, 'd')
+    assert list(daily.index) == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')]
+    assert daily['high'].iloc[0] == df['high'].iloc[:48].max()
+    print("✓ Minute bars")
+
+
+def test_frequencies_and_cache():
+    """Frequencies map to stored base series and loaded bars are cached per file version"""
+    assert parse_frequency('W') == ('w', None) and parse_frequency('45min') == ('min', 45)
+    assert [base_frequency(f) for f in ('d', 'm', 120, '30', '45', '10')] == ['d', 'd', '60', '30', '15', '5']
+    assert [periods_per_year(f) for f in ('d', 'w', 'm', '60')] == [252, 52, 12, 1008]
+    for bad in ('x', '7'):
+        try:
+            base_frequency(bad)
+            raise AssertionError(f"{bad} accepted")
+        except ValueError:
+            pass
+    config = {'stock_code': 'sh.600600', 'start_date': '2020-04-01', 'end_date': '2025-04-01'}
+    assert base_path(dict(config, data_frequency='w')) == os.path.join('data', os.path.basename(DAILY))
+    assert base_path(dict(config, data_frequency='90')).endswith('600600_2020-04-01_2025-04-01_30min.csv')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = shutil.copy(DAILY, os.path.join(tmp, 'daily.csv'))
+        weekly = load_bars(path, 'w')
+        assert load_bars(path, 'w') is weekly
+        assert len(load_bars(path, 'm')) < len(weekly) < len(load_bars(path, 'd'))
+        os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+        assert load_bars(path, 'w') is not weekly
+    print("✓ Frequencies and cache")
+
+
+if __name__ == "__main__":
+    test_weekly_and_monthly()
+    test_minute_bars()
+    test_frequencies_and_cache()
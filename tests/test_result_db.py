@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite result store
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+import numpy as np
+
+from result_db import ResultStore
+from sweep import param_grid, run_sweep
+
+
+def test_top_runs_query():
+    """Ranking filters by strategy, stock and period and orders by the metric"""
+    rng = np.random.default_rng(0)
+    records = [{
+        'strategy': ['RSIStrategy', 'MAStrategy'][i % 2],
+        'stock_code': ['sh.603259', 'sh.600600'][(i // 2) % 2],
+        'start_date': f"{2020 + i % 5}-01-01",
+        'end_date': '2025-08-01',
+        'params': {'rsi_period': i},
+        'metrics': {'sharpe_ratio': float(rng.normal()), 'total_return': 'N/A'},
+    } for i in range(2000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultStore(os.path.join(tmp, 'results.db')) as store:
+            assert store.add_runs(records) == len(records)
+            top = store.top_runs('sharpe_ratio', n=20, strategy='RSIStrategy',
+                                 stock_code='sh.603259', since='2022-01-01')
+            expected = sorted((r['metrics']['sharpe_ratio'] for r in records
+                               if r['strategy'] == 'RSIStrategy' and r['stock_code'] == 'sh.603259'
+                               and r['start_date'] >= '2022-01-01'), reverse=True)[:20]
+            assert np.allclose(top['sharpe_ratio'], expected)
+            assert isinstance(top['params'][0], dict)
+            assert top['total_return'].isna().all()
+
+            run_id = store.add_run(strategy='MAStrategy', metrics={'sharpe_ratio': 9.0})
+            assert store.get_run(run_id)['sharpe_ratio'] == 9.0
+            assert store.count() == len(records) + 1
+    print("✓ Top runs query")
+
+
+def test_sweep_writes_runs():
+    """A small sweep stores one row per parameter set"""
+    config = {
+        'stock_code': 'sh.600600', 'start_date': '2020-04-01', 'end_date': '2021-04-01',
+        'strategy': 'MAStrategy', 'initial_cash': 100000,
+        'param_grid': {'short_window': [5, 10], 'long_window': [20, 30]},
+    }
+    assert len(param_grid(config['param_grid'])) == 4
+    data_path = 'data/600600_2020-04-01_2021-04-01.csv'
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'results.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            stored = run_sweep(config, data_path, db_path=db_path, workers=2, batch_size=3)
+        assert stored == 4
+        with ResultStore(db_path) as store:
+            top = store.top_runs('total_return', n=10, strategy='MAStrategy')
+        assert len(top) == 4
+        assert {tuple(sorted(p.items())) for p in top['params']} == \
+            {tuple(sorted(p.items())) for p in param_grid(config['param_grid'])}
+        assert top['data_hash'].nunique() == 1
+    print("✓ Sweep stored every run")
+
+
+if __name__ == "__main__":
+    test_top_runs_query()
+    test_sweep_writes_runs()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the rolling-window analytics
+"""
+
+import numpy as np
+import pandas as pd
+
+from performance_analyzer import PerformanceAnalyzer
+from rolling_analytics import rolling_max_drawdown, rolling_max, rolling_mean, rolling_std, rolling_beta_alpha
+
+
+def brute_force_max_drawdown(values, window):
+    """Reference rolling max drawdown computed window by window"""
+    out = np.full(len(values), np.nan)
+    for t in range(window - 1, len(values)):
+        segment = values[t - window + 1:t + 1]
+        out[t] = np.max(1 - segment / np.maximum.accumulate(segment))
+    return out
+
+
+def test_rolling_statistics_match_reference():
+    """O(n) rolling statistics equal pandas / brute-force results"""
+    rng = np.random.default_rng(1)
+    equity = 100 * np.cumprod(1 + rng.normal(0, 0.02, (3, 400)), axis=1)
+    returns = equity[:, 1:] / equity[:, :-1] - 1
+    
+    for window in [1, 5, 20, 63]:
+        drawdown = rolling_max_drawdown(equity, window)
+        for row in range(len(equity)):
+            assert np.allclose(drawdown[row], brute_force_max_drawdown(equity[row], window), equal_nan=True)
+        expected_max = pd.Series(equity[0]).rolling(window).max().to_numpy()
+        assert np.allclose(rolling_max(equity, window)[0], expected_max, equal_nan=True)
+    
+    expected_std = pd.Series(returns[0]).rolling(20).std(ddof=0).to_numpy()
+    assert np.allclose(rolling_std(returns, 20)[0], expected_std, equal_nan=True)
+    
+    beta, _ = rolling_beta_alpha(returns[0], returns[1], 30)
+    expected_beta = (pd.Series(returns[0]).rolling(30).cov(pd.Series(returns[1]), ddof=0)
+                     / pd.Series(returns[1]).rolling(30).var(ddof=0))
+    assert np.allclose(beta, expected_beta.to_numpy(), equal_nan=True)
+    print("✓ Rolling statistics match reference implementations")
+
+
+def test_rolling_analysis_with_benchmark():
+    """PerformanceAnalyzer.rolling_analysis handles many curves and a benchmark"""
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range('2021-01-01', periods=250)
+    equity = 100000 * np.cumprod(1 + rng.normal(0, 0.01, (10, 250)), axis=1)
+    benchmark_data = pd.DataFrame({'close': 4000 * np.cumprod(1 + rng.normal(0, 0.01, 250))}, index=dates)
+    
+    report = PerformanceAnalyzer().rolling_analysis(equity, dates, benchmark_data, window=20)
+    for name in ['sharpe', 'volatility', 'beta', 'alpha', 'max_drawdown', 'underwater']:
+        assert report[name].shape == (10, 250), name
+    assert np.all(report['underwater'] <= 0)
+    assert np.isnan(report['sharpe'][:, :20]).all() and not np.isnan(report['sharpe'][:, 20:]).any()
+    print("✓ Rolling analysis report works correctly")
+
+
+def test_nan_only_affects_its_windows():
+    """A NaN (e.g. a curve starting later) only blanks the windows that contain it"""
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0, 0.01, (2, 120))
+    returns[1, :30] = np.nan
+    returns[0, 60] = np.nan
+    for window in (5, 20):
+        expected_mean = pd.DataFrame(returns.T).rolling(window).mean().to_numpy().T
+        expected_std = pd.DataFrame(returns.T).rolling(window).std(ddof=0).to_numpy().T
+        assert np.allclose(rolling_mean(returns, window), expected_mean, equal_nan=True)
+        assert np.allclose(rolling_std(returns, window), expected_std, equal_nan=True)
+    mean = rolling_mean(returns, 20)
+    assert np.isnan(mean[0, 60:80]).all() and not np.isnan(mean[0, 80:]).any()
+    assert np.isnan(mean[1, :49]).all() and not np.isnan(mean[1, 49:]).any()
+    print("✓ NaN values only affect their windows")
+
+
+if __name__ == "__main__":
+    test_rolling_statistics_match_reference()
+    test_rolling_analysis_with_benchmark()
+    test_nan_only_affects_its_windows()
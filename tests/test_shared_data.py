@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared-memory data plane
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DataFetcher
+from shared_data import SharedDataPlane, attach, detach
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataFetcher().load_data_from_csv(os.path.join(ROOT, 'data', name))
+
+
+def _worker_summary(handle):
+    df = attach(handle)
+    summary = (os.getpid(), float(df['close'].sum()), len(df), df['close'].to_numpy().flags.writeable)
+    del df
+    detach(handle)
+    return summary
+
+
+def _backtest(df):
+    from backtest import BacktestEngine
+    from strategies import STRATEGIES
+    engine = BacktestEngine(use_analyzers=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, _, results = engine.run_backtest(STRATEGIES['MAStrategy'], df, short_window=10, long_window=30)
+    return engine.compute_run_metrics(results[0], len(df))
+
+
+def test_frame_views_and_refcount():
+    """Attached frames are read-only views with the published values"""
+    df = _load('600600_2020-04-01_2021-04-01.csv')
+    with SharedDataPlane() as plane:
+        handle = plane.publish('600600', df)
+        assert plane.publish('600600', df) is handle and plane.refcount('600600') == 2
+        assert 'code' not in handle['columns'] and 'close' in handle['columns']
+
+        view = attach(handle)
+        pd.testing.assert_frame_equal(view, df[handle['columns']].astype(np.float64), check_freq=False)
+        assert not view['close'].to_numpy().flags.writeable
+        # A second attachment maps the same pages
+        assert np.shares_memory(view['close'].to_numpy(), attach(handle)['close'].to_numpy())
+        detach(handle)
+        assert _backtest(view) == _backtest(df)
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            summaries = list(pool.map(_worker_summary, [handle] * 4))
+        assert {s[1:] for s in summaries} == {(float(df['close'].sum()), len(df), False)}
+
+        del view
+        detach(handle)
+        plane.release('600600')
+        assert plane.refcount('600600') == 1
+        plane.release('600600')
+        assert plane.refcount('600600') == 0 and plane.nbytes == 0
+        try:
+            attach(handle)
+            raise AssertionError("released segment is still attachable")
+        except FileNotFoundError:
+            pass
+    print("✓ Frame views and reference counts")
+
+
+def test_panel():
+    """A universe panel aligns symbols on their union of dates"""
+    frames = {'sh.600600': _load('600600_2020-04-01_2021-04-01.csv'),
+              'sh.603259': _load('603259_2022-02-01_2025-08-01.csv')}
+    with SharedDataPlane() as plane:
+        panel = attach(plane.publish_panel('universe', frames))
+        assert panel.codes == sorted(frames)
+        assert len(panel.dates) == sum(len(df) for df in frames.values())
+        for code, df in frames.items():
+            frame = panel.frame(code)
+            pd.testing.assert_frame_equal(frame, df[list(panel.fields)].astype(np.float64),
+                                          check_freq=False, check_names=False)
+            assert np.shares_memory(frame['close'].to_numpy(), panel.values)
+        close = panel.field('close')
+        assert close.shape == (len(panel.dates), 2)
+        assert close['sh.600600'].notna().sum() == len(frames['sh.600600'])
+        del panel, frame, close
+    print("✓ Universe panel")
+
+
+def test_no_resource_tracker_noise():
+    """Worker attachments neither unlink the segment nor upset the resource tracker"""
+    script = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from concurrent.futures import ProcessPoolExecutor\n"
+        "import pandas as pd\n"
+        "from shared_data import SharedDataPlane\n"
+        "from tests.test_shared_data import _worker_summary\n"
+        "df = pd.DataFrame({'close': [1.0, 2.0]}, index=pd.date_range('2024-01-01', periods=2))\n"
+        "with SharedDataPlane() as plane:\n"
+        "    handle = plane.publish('x', df)\n"
+        "    for _ in range(2):\n"
+        "        with ProcessPoolExecutor(max_workers=2) as pool:\n"
+        "            assert [s[1] for s in pool.map(_worker_summary, [handle] * 3)] == [3.0] * 3\n"
+        "print('done')\n" % ROOT)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT,
+                            timeout=120)
+    assert result.stdout.strip() == 'done', result.stderr
+    assert 'leaked' not in result.stderr and 'Traceback' not in result.stderr, result.stderr
+    print("✓ No resource tracker warnings")
+
+
+if __name__ == "__main__":
+    test_frame_views_and_refcount()
+    test_panel()
+    test_no_resource_tracker_noise()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the trade ledger and vectorized trade statistics
+"""
+
+import contextlib
+import io
+
+import numpy as np
+
+from backtest import BacktestEngine
+from data_fetcher import DataFetcher
+from strategies import RSIStrategy
+from trade_ledger import TRADE_DTYPE, batch_trade_stats, round_trips, trade_stats
+
+
+def run_rsi():
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataFetcher().load_data_from_csv('data/600600_2020-04-01_2025-04-01.csv')
+        _, _, results = BacktestEngine(use_analyzers=True).run_backtest(RSIStrategy, df)
+    return df, results[0]
+
+
+def test_ledger_matches_trade_analyzer():
+    """Ledger trades agree with TradeAnalyzer and can be rebuilt from fills"""
+    df, strat = run_rsi()
+    trades = strat.ledger.trades
+    analysis = strat.analyzers.trades.get_analysis()
+    assert len(trades) == analysis['total']['closed']
+    assert np.isclose(trades['pnlcomm'].sum(), analysis['pnl']['net']['total'])
+    assert trades['barlen'].sum() == analysis['len']['total']
+
+    rebuilt = round_trips(strat.ledger.fills)
+    for name in ('open_bar', 'close_bar', 'entry_price', 'exit_price', 'pnl', 'ret'):
+        assert np.allclose(rebuilt[name], trades[name])
+    assert df.index[trades['open_bar'][0]] == trades['open_date'][0]
+
+    stats = trade_stats(trades, df['high'].to_numpy(), df['low'].to_numpy())
+    assert stats['total_trades'] == len(trades)
+    assert stats['worst_mae'] <= 0 <= stats['best_mfe']
+    assert stats['worst_mae'] <= stats['worst_return'] and stats['best_mfe'] >= stats['best_return']
+    print(f"✓ Ledger matches TradeAnalyzer ({len(trades)} trades)")
+
+
+def test_batch_trade_stats():
+    """Batch statistics equal per-run statistics"""
+    rng = np.random.default_rng(2)
+    tables = []
+    for n in rng.integers(0, 20, 300):
+        trades = np.zeros(n, dtype=TRADE_DTYPE)
+        trades['ret'] = rng.normal(0.01, 0.1, n)
+        trades['pnlcomm'] = trades['ret'] * 1000
+        trades['barlen'] = rng.integers(1, 50, n)
+        tables.append(trades)
+
+    batch = batch_trade_stats(tables)
+    for i, trades in enumerate(tables):
+        single = trade_stats(trades)
+        assert batch['total_trades'][i] == single['total_trades']
+        for name in ('win_rate', 'avg_return', 'best_return', 'worst_return', 'avg_holding_bars', 'profit_factor'):
+            expected = np.nan if single[name] is None else single[name]
+            assert np.isclose(batch[name][i], expected, equal_nan=True)
+    print("✓ Batch trade statistics match single-run statistics")
+
+
+if __name__ == "__main__":
+    test_ledger_matches_trade_analyzer()
+    test_batch_trade_stats()
@@ -0,0 +1,314 @@
+"""
+Columnar order and trade ledger for backtest runs
+
+TradeLedger collects every fill (from notify_order) and every closed trade
+(from notify_trade) into NumPy structured arrays, so trade analysis is a few
+array operations instead of loops over Python tuples:
+
+- trade_stats: win rate, average/best/worst trade return, holding period,
+  profit factor and, given the bar highs and lows, MAE/MFE
+- batch_trade_stats: the same statistics for many runs at once, grouped with
+  bincount/reduceat over the concatenated ledgers
+- round_trips: rebuilds closed trades from a fills table (e.g. one read back
+  from the run artifacts)
+"""
+import numpy as np
+import pandas as pd
+
+
+FILL_DTYPE = np.dtype([
+    ('date', 'datetime64[s]'),
+    ('bar', np.int64),          # 0-based index of the bar the fill happened on
+    ('side', np.int8),          # +1 buy, -1 sell
+    ('size', np.float64),       # signed, negative for sells
+    ('price', np.float64),
+    ('value', np.float64),
+    ('commission', np.float64),
+    ('pnl', np.float64),        # realized by this fill
+])
+
+TRADE_DTYPE = np.dtype([
+    ('open_date', 'datetime64[s]'),
+    ('close_date', 'datetime64[s]'),
+    ('open_bar', np.int64),
+    ('close_bar', np.int64),
+    ('size', np.float64),       # signed size when opened
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('pnl', np.float64),
+    ('pnlcomm', np.float64),
+    ('commission', np.float64),
+    ('barlen', np.int64),
+    ('ret', np.float64),        # pnl / entry value, before commission
+])
+
+
+class _Table:
+    """Growable structured array"""
+
+    def __init__(self, dtype, capacity=64):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._size = 0
+
+    def append(self, row):
+        if self._size == len(self._data):
+            self._data = np.resize(self._data, 2 * len(self._data))
+        self._data[self._size] = row
+        self._size += 1
+
+    @property
+    def array(self):
+        return self._data[:self._size]
+
+
+class TradeLedger:
+    """
+    Fills and closed trades of one run
+
+    Attributes:
+        fills (numpy.ndarray): FILL_DTYPE rows in execution order
+        trades (numpy.ndarray): TRADE_DTYPE rows in closing order
+    """
+
+    def __init__(self):
+        self._fills = _Table(FILL_DTYPE)
+        self._trades = _Table(TRADE_DTYPE)
+        self._open_sizes = {}
+
+    @property
+    def fills(self):
+        return self._fills.array
+
+    @property
+    def trades(self):
+        return self._trades.array
+
+    def add_fill(self, date, bar, size, price, value, commission, pnl=0.0):
+        """
+        Record an executed order
+
+        Args:
+            date (datetime): Execution time
+            bar (int): 0-based bar index
+            size (float): Signed executed size (negative for sells)
+            price (float): Execution price
+            value (float): Executed value
+            commission (float): Commission paid
+            pnl (float): Profit realized by the fill
+        """
+        self._fills.append((np.datetime64(date, 's'), bar, 1 if size > 0 else -1,
+                            size, price, value, commission, pnl))
+
+    def open_trade(self, ref, size):
+        """Remember the opening size of a trade (Backtrader trade.ref)"""
+        self._open_sizes[ref] = size
+
+    def close_trade(self, ref, open_date, close_date, open_bar, close_bar, entry_price,
+                    pnl, pnlcomm, commission):
+        """
+        Record a closed trade
+
+        Args:
+            ref: Trade reference passed to open_trade
+            open_date, close_date (datetime): Opening and closing times
+            open_bar, close_bar (int): 0-based bar indexes
+            entry_price (float): Average entry price
+            pnl (float): Gross profit
+            pnlcomm (float): Profit after commission
+            commission (float): Total commission
+        """
+        size = self._open_sizes.pop(ref, 0.0)
+        entry_value = abs(size) * entry_price
+        exit_price = entry_price + pnl / size if size else np.nan
+        ret = pnl / entry_value if entry_value else np.nan
+        self._trades.append((np.datetime64(open_date, 's'), np.datetime64(close_date, 's'),
+                             open_bar, close_bar, size, entry_price, exit_price,
+                             pnl, pnlcomm, commission, close_bar - open_bar, ret))
+
+    def to_frames(self):
+        """
+        Returns:
+            tuple: (fills DataFrame, trades DataFrame)
+        """
+        return pd.DataFrame(self.fills), pd.DataFrame(self.trades)
+
+
+def excursions(trades, high, low):
+    """
+    Maximum adverse and favorable excursion of each trade
+
+    Args:
+        trades (numpy.ndarray): TRADE_DTYPE rows of one run
+        high, low (array-like): Bar highs and lows of the traded data
+
+    Returns:
+        tuple: (mae, mfe) as returns relative to the entry price; MAE <= 0 <= MFE
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    if len(trades) == 0:
+        return np.empty(0), np.empty(0)
+
+    # Segment i covers the bars from the opening to the closing fill
+    bounds = np.column_stack([trades['open_bar'], trades['close_bar'] + 1]).ravel()
+    bounds = np.minimum(bounds, len(high))
+    if bounds[-1] == len(high):
+        bounds = bounds[:-1]
+    lowest = np.minimum.reduceat(low, bounds)[::2]
+    highest = np.maximum.reduceat(high, bounds)[::2]
+
+    entry = trades['entry_price']
+    long = trades['size'] >= 0
+    mae = np.where(long, lowest / entry - 1.0, 1.0 - highest / entry)
+    mfe = np.where(long, highest / entry - 1.0, 1.0 - lowest / entry)
+    return np.minimum(mae, 0.0), np.maximum(mfe, 0.0)
+
+
+def trade_stats(trades, high=None, low=None):
+    """
+    Summary statistics of closed trades
+
+    Args:
+        trades (numpy.ndarray): TRADE_DTYPE rows (or a ledger's trades)
+        high, low (array-like): Bar highs and lows for MAE/MFE (optional)
+
+    Returns:
+        dict: total_trades, win_rate, avg_return, best_return, worst_return,
+        avg_holding_bars, max_holding_bars, profit_factor and, with prices,
+        avg_mae, worst_mae, avg_mfe, best_mfe. Undefined values are None.
+    """
+    stats = {
+        'total_trades': int(len(trades)),
+        'win_rate': None, 'avg_return': None, 'best_return': None, 'worst_return': None,
+        'avg_holding_bars': None, 'max_holding_bars': None, 'profit_factor': None,
+    }
+    if len(trades):
+        ret = trades['ret']
+        pnl = trades['pnlcomm']
+        losses = -pnl[pnl < 0].sum()
+        stats.update({
+            'win_rate': float(np.mean(pnl >= 0)),
+            'avg_return': float(np.mean(ret)),
+            'best_return': float(np.max(ret)),
+            'worst_return': float(np.min(ret)),
+            'avg_holding_bars': float(np.mean(trades['barlen'])),
+            'max_holding_bars': int(np.max(trades['barlen'])),
+            'profit_factor': float(pnl[pnl > 0].sum() / losses) if losses > 0 else None,
+        })
+    if high is not None and low is not None:
+        mae, mfe = excursions(trades, high, low)
+        stats.update({
+            'avg_mae': float(mae.mean()) if len(mae) else None,
+            'worst_mae': float(mae.min()) if len(mae) else None,
+            'avg_mfe': float(mfe.mean()) if len(mfe) else None,
+            'best_mfe': float(mfe.max()) if len(mfe) else None,
+        })
+    return stats
+
+
+def batch_trade_stats(trade_tables):
+    """
+    Trade statistics for many runs in one pass
+
+    Args:
+        trade_tables (list): TRADE_DTYPE arrays, one per run
+
+    Returns:
+        pandas.DataFrame: One row per run with total_trades, win_rate,
+        avg_return, best_return, worst_return, avg_holding_bars and
+        profit_factor (NaN where a run has no trades)
+    """
+    n_runs = len(trade_tables)
+    counts = np.array([len(t) for t in trade_tables], dtype=np.int64)
+    run = np.repeat(np.arange(n_runs), counts)
+    # Concatenating plain columns avoids NumPy's per-array structured dtype promotion
+    trades = {name: np.concatenate([t[name] for t in trade_tables]) if n_runs else np.empty(0)
+              for name in ('pnlcomm', 'ret', 'barlen')}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl = trades['pnlcomm']
+        gains = np.bincount(run, weights=np.maximum(pnl, 0.0), minlength=n_runs)
+        losses = np.bincount(run, weights=np.maximum(-pnl, 0.0), minlength=n_runs)
+        result = pd.DataFrame({
+            'total_trades': counts,
+            'win_rate': np.bincount(run, weights=(pnl >= 0), minlength=n_runs) / counts,
+            'avg_return': np.bincount(run, weights=trades['ret'], minlength=n_runs) / counts,
+            'best_return': _grouped(np.maximum, trades['ret'], counts),
+            'worst_return': _grouped(np.minimum, trades['ret'], counts),
+            'avg_holding_bars': np.bincount(run, weights=trades['barlen'], minlength=n_runs) / counts,
+            'profit_factor': np.where(losses > 0, gains / losses, np.nan),
+        })
+    return result
+
+
+def _grouped(ufunc, values, counts):
+    """ufunc.reduceat per run, NaN for runs without rows"""
+    out = np.full(len(counts), np.nan)
+    nonempty = counts > 0
+    if nonempty.any():
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        out[nonempty] = ufunc.reduceat(values, starts)
+    return out
+
+
+def round_trips(fills):
+    """
+    Rebuild closed trades from fills
+
+    A trade runs from the fill that leaves a flat position to the fill that
+    returns it to flat. A trade still open at the end is not included.
+
+    Args:
+        fills (pandas.DataFrame or numpy.ndarray): Columns date, size
+            (signed), price and optionally commission and bar
+
+    Returns:
+        numpy.ndarray: TRADE_DTYPE rows (pnlcomm includes commissions)
+    """
+    if isinstance(fills, pd.DataFrame):
+        fills = {name: fills[name].to_numpy() for name in fills.columns}
+    elif isinstance(fills, np.ndarray):
+        fills = {name: fills[name] for name in fills.dtype.names}
+    size = np.asarray(fills['size'], dtype=np.float64)
+    if len(size) == 0:
+        return np.empty(0, dtype=TRADE_DTYPE)
+    price = np.asarray(fills['price'], dtype=np.float64)
+    dates = np.asarray(fills['date'], dtype='datetime64[s]')
+    commission = np.asarray(fills['commission'], dtype=np.float64) if 'commission' in fills else np.zeros(len(size))
+    bar = np.asarray(fills['bar'], dtype=np.int64) if 'bar' in fills else np.zeros(len(size), dtype=np.int64)
+
+    position = np.cumsum(size)
+    flat = np.isclose(position, 0.0)
+    # A trade starts at the first fill and after every fill that ends flat
+    starts = np.flatnonzero(np.concatenate(([True], flat[:-1])))
+    ends = np.flatnonzero(flat)
+    starts = starts[:len(ends)]
+    if len(ends) == 0:
+        return np.empty(0, dtype=TRADE_DTYPE)
+
+    bounds = np.column_stack([starts, ends + 1]).ravel()
+    if bounds[-1] == len(size):
+        bounds = bounds[:-1]
+    # Fills in the direction of the opening fill add to the entry
+    trade_id = np.searchsorted(starts, np.arange(len(size)), side='right') - 1
+    entering = np.sign(size) == np.sign(size[starts])[trade_id]
+    entry_size = np.add.reduceat(np.where(entering, size, 0.0), bounds)[::2]
+    entry_value = np.add.reduceat(np.where(entering, size * price, 0.0), bounds)[::2]
+    cash_flow = np.add.reduceat(-size * price, bounds)[::2]
+    fees = np.add.reduceat(commission, bounds)[::2]
+
+    entry_price = entry_value / entry_size
+    trades = np.zeros(len(ends), dtype=TRADE_DTYPE)
+    trades['open_date'] = dates[starts]
+    trades['close_date'] = dates[ends]
+    trades['open_bar'] = bar[starts]
+    trades['close_bar'] = bar[ends]
+    trades['size'] = entry_size
+    trades['entry_price'] = entry_price
+    trades['exit_price'] = entry_price + cash_flow / entry_size
+    trades['pnl'] = cash_flow
+    trades['pnlcomm'] = cash_flow - fees
+    trades['commission'] = fees
+    trades['barlen'] = bar[ends] - bar[starts]
+    trades['ret'] = cash_flow / np.abs(entry_value)
+    return trades